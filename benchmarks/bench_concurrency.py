@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Compare the wall-clock time of a full read with streams run one after another and concurrently,
+against the time of the slowest stream read on its own.
+
+    python -m benchmarks.bench_concurrency --profiles 8 --concurrency 4 13
+"""
+
+import argparse
+import logging
+import time
+
+from airbyte_cdk.models import ConfiguredAirbyteCatalog, Type
+from source_sprout_social.source import SourceSproutSocial, SproutSocialStream
+
+from .stand_in_server import StandInSproutServer
+
+
+def configured_catalog(streams):
+    return ConfiguredAirbyteCatalog.parse_obj(
+        {
+            "streams": [
+                {"stream": stream.as_airbyte_stream().dict(exclude_unset=True), "sync_mode": "full_refresh", "destination_sync_mode": "overwrite"}
+                for stream in streams
+            ]
+        }
+    )
+
+
+def timed_read(config, catalog, logger):
+    started = time.perf_counter()
+    messages = list(SourceSproutSocial().read(logger, config, catalog))
+    records = sum(1 for message in messages if message.type == Type.RECORD)
+    return time.perf_counter() - started, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=8)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-metric-latency", type=float, default=0.002)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 13])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("airbyte")
+    logger.setLevel(logging.WARNING)
+
+    with StandInSproutServer(
+        profiles=args.profiles, days=args.days, base_latency=args.base_latency, per_metric_latency=args.per_metric_latency
+    ) as server:
+        SproutSocialStream.url_base = server.url
+        config = {"api_key": "stand-in"}
+        streams = SourceSproutSocial().streams(config)
+        catalog = configured_catalog(streams)
+
+        slowest = max(timed_read(config, configured_catalog([stream]), logger)[0] for stream in streams)
+        sequential_seconds, sequential_records = timed_read(config, catalog, logger)
+
+        print(f"{len(streams)} streams, slowest stream alone: {slowest:.3f}s")
+        print(f"{'stream_concurrency':<20}{'seconds':>10}{'records':>10}{'speedup':>10}")
+        print(f"{1:<20}{sequential_seconds:>10.3f}{sequential_records:>10}{1:>10.2f}")
+        for concurrency in args.concurrency:
+            seconds, records = timed_read(dict(config, stream_concurrency=concurrency), catalog, logger)
+            assert records == sequential_records, f"concurrent read emitted {records} records instead of {sequential_records}"
+            print(f"{concurrency:<20}{seconds:>10.3f}{records:>10}{sequential_seconds / seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Records/sec of the CDK output path versus the fast emission path on synthetic wide facebook_profile_analytics rows.
+
+    python -m benchmarks.bench_emit --records 50000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+
+from airbyte_cdk.entrypoint import AirbyteEntrypoint
+from airbyte_cdk.models import AirbyteMessage, AirbyteRecordMessage, Type
+from source_sprout_social import emit
+from source_sprout_social.networks import FACEBOOK
+
+
+def wide_record_messages(count):
+    return [
+        AirbyteMessage(
+            type=Type.RECORD,
+            record=AirbyteRecordMessage(
+                stream=FACEBOOK.profile_stream_name,
+                data={
+                    "dimensions": {"customer_profile_id": 1000 + i % 50, "reporting_period.by(day)": f"2023-01-{i % 28 + 1:02d}"},
+                    "metrics": {metric: (i * 7 + j) % 10000 for j, metric in enumerate(FACEBOOK.profile_metrics)},
+                },
+                emitted_at=1700000000000 + i,
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def cdk_emit(messages, devnull):
+    # what airbyte_cdk.entrypoint.launch does with every message
+    with contextlib.redirect_stdout(devnull):
+        for message in messages:
+            print(f"{AirbyteEntrypoint.airbyte_message_to_string(message)}\n", end="", flush=True)
+
+
+def fast_emit(messages, devnull):
+    writer = emit.BatchedWriter(devnull.buffer)
+    for message in messages:
+        writer.write(emit.serialize_message(message))
+    writer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    messages = wide_record_messages(args.records)
+    for message in messages[:100]:
+        assert json.loads(emit.serialize_message(message)) == json.loads(AirbyteEntrypoint.airbyte_message_to_string(message))
+
+    print(f"encoder: {'orjson' if emit.orjson else 'json'}, {len(FACEBOOK.profile_metrics)} metrics per record")
+    print(f"{'path':<8}{'records/s':>12}{'MB/s':>8}")
+    size = sum(len(emit.serialize_message(message)) + 1 for message in messages) / 1e6
+    with open(os.devnull, "w") as devnull:
+        baseline = None
+        for name, emit_fn in (("cdk", cdk_emit), ("fast", fast_emit)):
+            started = time.perf_counter()
+            emit_fn(messages, devnull)
+            seconds = time.perf_counter() - started
+            baseline = baseline or seconds
+            print(f"{name:<8}{args.records / seconds:>12.0f}{size / seconds:>8.1f}   x{baseline / seconds:.2f}")
+
+
+if __name__ == "__main__":
+    main()
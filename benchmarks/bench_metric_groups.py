@@ -0,0 +1,58 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Compare the latency of the single wide facebook_profile_analytics query with metric-group sharding.
+
+    python -m benchmarks.bench_metric_groups --profiles 4 --days 365 --group-sizes 10 23 45
+"""
+
+import argparse
+import time
+
+from airbyte_cdk.models import SyncMode
+from source_sprout_social.networks import FACEBOOK
+from source_sprout_social.source import ProfileAnalyticsStream, SproutSocialStream
+
+from .stand_in_server import StandInSproutServer
+
+
+def read_all(config):
+    profile_ids = ProfileAnalyticsStream(config=config, network=FACEBOOK, profile_ids=[])._get_customer_profile_ids()
+    stream = ProfileAnalyticsStream(config=config, network=FACEBOOK, profile_ids=profile_ids[FACEBOOK.network_type])
+    started = time.perf_counter()
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+    return time.perf_counter() - started, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=4)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-metric-latency", type=float, default=0.002)
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[10, 23, 45])
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with StandInSproutServer(
+        profiles=args.profiles, days=args.days, base_latency=args.base_latency, per_metric_latency=args.per_metric_latency
+    ) as server:
+        SproutSocialStream.url_base = server.url
+        config = {"api_key": "stand-in"}
+
+        wide_seconds, wide_records = read_all(config)
+        print(f"{'strategy':<24}{'seconds':>10}{'records':>10}{'speedup':>10}")
+        print(f"{'single wide query':<24}{wide_seconds:>10.3f}{len(wide_records):>10}{1:>10.2f}")
+
+        for group_size in args.group_sizes:
+            sharded_config = dict(config, metric_group_size=group_size, metric_group_concurrency=args.concurrency)
+            seconds, records = read_all(sharded_config)
+            assert records == wide_records, f"merged rows for group size {group_size} differ from the wide query"
+            label = f"groups of {group_size}"
+            print(f"{label:<24}{seconds:>10.3f}{len(records):>10}{wide_seconds / seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
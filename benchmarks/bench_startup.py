@@ -0,0 +1,70 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Track the cold-start time of `spec`, `check` and `discover` as launched from `main.py`.
+
+Each command is run in a fresh interpreter against the local stand-in server, once through the fast startup
+path (requires `python -m source_sprout_social.bundle` to have been run) and once through the CDK entrypoint.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from source_sprout_social.bundle import load_bundle
+
+from .stand_in_server import StandInSproutServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = {
+    "spec": ["spec"],
+    "check": ["check", "--config", "{config}"],
+    "discover": ["discover", "--config", "{config}"],
+}
+
+
+def run_command(args, env):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "main.py", *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    seconds = time.perf_counter() - started
+    messages = [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+    return seconds, [message for message in messages if message["type"] != "LOG"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if load_bundle() is None:
+        sys.exit("Build the bundle first: python -m source_sprout_social.bundle")
+
+    with StandInSproutServer(profiles=8) as server, tempfile.NamedTemporaryFile("w", suffix=".json") as config:
+        json.dump({"api_key": "stand-in"}, config)
+        config.flush()
+        env = dict(os.environ, SPROUT_SOCIAL_API_URL=server.url)
+
+        print(f"{'command':<12}{'fast ms':>10}{'cdk ms':>10}{'speedup':>10}")
+        for name, command in COMMANDS.items():
+            command = [arg.format(config=config.name) for arg in command]
+            timings = {}
+            outputs = {}
+            for path, fast_startup in (("fast", "1"), ("cdk", "0")):
+                runs = [run_command(command, dict(env, SPROUT_SOCIAL_FAST_STARTUP=fast_startup)) for _ in range(args.runs)]
+                timings[path] = statistics.median(seconds for seconds, _ in runs) * 1000
+                outputs[path] = runs[0][1]
+            assert outputs["fast"] == outputs["cdk"], f"`{name}` output differs between the fast path and the CDK"
+            print(f"{name:<12}{timings['fast']:>10.0f}{timings['cdk']:>10.0f}{timings['cdk'] / timings['fast']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Synthetic Sprout Social analytics payloads built from the metric lists of each network.
+
+Rows are deterministic, so the same arguments always give the same payload, and shaped like the API's:
+profile analytics rows hold `dimensions` and `metrics`, post analytics rows the `networks.POST_FIELDS` and `metrics`.
+They feed both the stand-in server and the CPU microbenchmarks. To write a payload to a file:
+
+    python -m benchmarks.payloads --kind posts --network facebook --profiles 100 --posts-per-profile 1000 --output posts.json
+"""
+
+import argparse
+import json
+import zlib
+from datetime import date, timedelta
+from typing import Any, List, Mapping, Optional, Sequence
+
+import requests
+from source_sprout_social.networks import NETWORKS
+
+START = date(2023, 1, 1)
+
+
+def profile_rows(profile_ids: Sequence[int], days: int, metrics: Sequence[str]) -> List[Mapping[str, Any]]:
+    """
+    One `analytics/profiles` row per profile and day, e.g. 500 profiles x 365 days.
+    """
+
+    return [
+        {
+            "dimensions": {"customer_profile_id": profile_id, "reporting_period.by(day)": str(START + timedelta(days=day))},
+            "metrics": {metric: (profile_id * 31 + day * 7 + _seed(metric)) % 1000 for metric in metrics},
+        }
+        for profile_id in profile_ids
+        for day in range(days)
+    ]
+
+
+def post_rows(profile_ids: Sequence[int], posts_per_profile: int, metrics: Sequence[str]) -> List[Mapping[str, Any]]:
+    """
+    `posts_per_profile` `analytics/posts` rows for each profile, e.g. 100 profiles x 1000 posts.
+    """
+
+    return [
+        {
+            "customer_profile_id": profile_id,
+            "created_time": f"{START + timedelta(days=post % 365)}T12:00:00Z",
+            "perma_link": f"https://example.com/{profile_id}/posts/{post}",
+            "text": f"Post {post} from profile {profile_id}: " + "lorem ipsum dolor sit amet " * (1 + post % 8),
+            "internal": {
+                "tags": [{"id": tag} for tag in range(post % 3)],
+                "sent_by": {"id": profile_id * 10 + post % 5, "email": f"user{post % 5}@example.com", "first_name": "Stand", "last_name": "In"},
+            },
+            "metrics": {metric: (profile_id * 13 + post * 3 + _seed(metric)) % 1000 for metric in metrics},
+        }
+        for profile_id in profile_ids
+        for post in range(posts_per_profile)
+    ]
+
+
+def page(rows: Sequence[Mapping[str, Any]], page_number: int = 1, page_size: Optional[int] = None) -> Mapping[str, Any]:
+    """
+    The body of one page of `rows`, with its `paging` object.
+    """
+
+    page_size = page_size or max(1, len(rows))
+    total_pages = max(1, -(-len(rows) // page_size))
+    start = (page_number - 1) * page_size
+    return {"data": list(rows[start : start + page_size]), "paging": {"current_page": page_number, "total_pages": total_pages}}
+
+
+def response(body: Mapping[str, Any]) -> requests.Response:
+    """
+    A `requests.Response` holding `body` as JSON, as the streams receive it from the API.
+    """
+
+    api_response = requests.Response()
+    api_response.status_code = 200
+    api_response.headers["Content-Type"] = "application/json"
+    api_response._content = json.dumps(body).encode()
+    return api_response
+
+
+def _seed(metric: str) -> int:
+    return zlib.crc32(metric.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=["profiles", "posts"], default="profiles")
+    parser.add_argument("--network", choices=sorted(NETWORKS), default="facebook")
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--posts-per-profile", type=int, default=1000)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    network = NETWORKS[args.network]
+    profile_ids = list(range(1, args.profiles + 1))
+    if args.kind == "profiles":
+        rows = profile_rows(profile_ids, args.days, network.profile_metrics)
+    else:
+        rows = post_rows(profile_ids, args.posts_per_profile, network.post_metrics)
+    with open(args.output, "w") as output:
+        json.dump(page(rows), output)
+    print(f"Wrote {len(rows)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
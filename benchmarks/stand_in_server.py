@@ -0,0 +1,143 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+A local stand-in for the parts of the Sprout Social API the connector talks to.
+
+The server answers the metadata and analytics endpoints with deterministic synthetic data from `payloads` and simulates
+Sprout's response time as a fixed base latency plus a cost per requested metric, so benchmarks can compare
+request strategies without touching the real API.
+
+    with StandInSproutServer(profiles=5, days=365) as server:
+        SproutSocialStream.url_base = server.url
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Mapping, Optional
+from urllib.parse import urlparse
+
+from . import payloads
+
+CUSTOMER_ID = 1234
+NETWORK_TYPES = ["facebook", "fb_instagram_account", "twitter", "tiktok"]
+
+
+class StandInSproutServer:
+    def __init__(
+        self,
+        profiles: int = 4,
+        days: int = 365,
+        posts_per_profile: int = 100,
+        page_size: int = 100,
+        base_latency: float = 0.02,
+        per_metric_latency: float = 0.002,
+        network_types: Optional[List[str]] = None,
+    ):
+        self.profiles = profiles
+        self.days = days
+        self.posts_per_profile = posts_per_profile
+        self.page_size = page_size
+        self.base_latency = base_latency
+        self.per_metric_latency = per_metric_latency
+        self.network_types = network_types or NETWORK_TYPES
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def __enter__(self) -> "StandInSproutServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def customer_profiles(self) -> List[Mapping[str, Any]]:
+        return [
+            {
+                "customer_profile_id": profile_id,
+                "network_type": self.network_types[(profile_id - 1) % len(self.network_types)],
+                "name": f"Profile {profile_id}",
+                "native_name": f"profile_{profile_id}",
+            }
+            for profile_id in range(1, self.profiles + 1)
+        ]
+
+    def profile_rows(self, profile_ids: List[int], metrics: List[str]) -> List[Mapping[str, Any]]:
+        return payloads.profile_rows(profile_ids, self.days, metrics)
+
+    def post_rows(self, profile_ids: List[int], fields: List[str], metrics: List[str]) -> List[Mapping[str, Any]]:
+        requested = {field.split(".")[0] for field in fields}
+        return [
+            {key: value for key, value in row.items() if key == "metrics" or key in requested or not fields}
+            for row in payloads.post_rows(profile_ids, self.posts_per_profile, metrics)
+        ]
+
+    def _page(self, rows: List[Mapping[str, Any]], page: int) -> Mapping[str, Any]:
+        return payloads.page(rows, page, self.page_size)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _reply(self, payload: Mapping[str, Any], status: int = 200) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.request_count += 1
+                path = urlparse(self.path).path
+                if path.endswith("/metadata/client"):
+                    return self._reply({"data": [{"customer_id": CUSTOMER_ID, "name": "Stand-in customer"}]})
+                if path.endswith(f"/{CUSTOMER_ID}/metadata/customer"):
+                    return self._reply({"data": server.customer_profiles()})
+                if path.endswith("/metadata/customer/tags"):
+                    return self._reply({"data": [{"tag_id": i, "text": f"tag {i}", "active": True} for i in range(1, 21)]})
+                if path.endswith("/metadata/customer/groups"):
+                    return self._reply({"data": [{"group_id": 1, "name": "All profiles", "customer_profile_ids": []}]})
+                if path.endswith("/metadata/customer/users"):
+                    return self._reply({"data": [{"id": i, "name": f"User {i}", "email": f"user{i}@example.com"} for i in range(1, 6)]})
+                self._reply({"error": f"unknown endpoint {self.path}"}, status=404)
+
+            def do_POST(self) -> None:
+                with server._lock:
+                    server.request_count += 1
+                path = urlparse(self.path).path
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                metrics = body.get("metrics", [])
+                profile_ids = _profile_ids(body.get("filters", []))
+                time.sleep(server.base_latency + server.per_metric_latency * len(metrics))
+                if path.endswith("/analytics/profiles"):
+                    return self._reply(server._page(server.profile_rows(profile_ids, metrics), body.get("page", 1)))
+                if path.endswith("/analytics/posts"):
+                    return self._reply(server._page(server.post_rows(profile_ids, body.get("fields", []), metrics), body.get("page", 1)))
+                self._reply({"error": f"unknown endpoint {self.path}"}, status=404)
+
+        return Handler
+
+
+def _profile_ids(filters: List[str]) -> List[int]:
+    for query_filter in filters:
+        match = re.fullmatch(r"customer_profile_id\.eq\((.*)\)", query_filter)
+        if match:
+            return [int(profile_id) for profile_id in match.group(1).split(",") if profile_id.strip()]
+    return []
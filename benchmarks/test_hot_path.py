@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+CPU microbenchmarks of the per-record hot path: parsing responses, transforming rows and emitting messages.
+
+    pip install '.[benchmarks]'
+    python -m pytest benchmarks/test_hot_path.py --benchmark-only
+    python -m pytest benchmarks/test_hot_path.py --benchmark-only --benchmark-autosave --benchmark-compare
+
+The payloads come from `payloads`, one realistic page of 1000 rows per benchmark.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from airbyte_cdk.entrypoint import AirbyteEntrypoint  # noqa: E402
+from airbyte_cdk.sources.utils.record_helper import stream_data_to_airbyte_message  # noqa: E402
+from source_sprout_social.change_detection import content_hash  # noqa: E402
+from source_sprout_social.emit import serialize_message  # noqa: E402
+from source_sprout_social.metric_groups import merge_metric_groups, split_metrics  # noqa: E402
+from source_sprout_social.networks import FACEBOOK  # noqa: E402
+from source_sprout_social.source import PostAnalyticsStream, ProfileAnalyticsStream  # noqa: E402
+
+from . import payloads  # noqa: E402
+
+ROWS_PER_PAGE = 1000
+
+
+@pytest.fixture(scope="module")
+def profile_stream():
+    return ProfileAnalyticsStream(config={"api_key": "key"}, customer_id=7, network=FACEBOOK, profile_ids=[1])
+
+
+@pytest.fixture(scope="module")
+def post_stream():
+    return PostAnalyticsStream(config={"api_key": "key"}, customer_id=7, network=FACEBOOK, profile_ids=[1])
+
+
+@pytest.fixture(scope="module")
+def profile_page():
+    # 10 profiles x 100 days
+    return payloads.profile_rows(range(1, 11), 100, FACEBOOK.profile_metrics)
+
+
+@pytest.fixture(scope="module")
+def post_page():
+    return payloads.post_rows(range(1, 11), ROWS_PER_PAGE // 10, FACEBOOK.post_metrics)
+
+
+@pytest.fixture(scope="module")
+def profile_messages(profile_stream, profile_page):
+    schema = profile_stream.get_json_schema()
+    return [stream_data_to_airbyte_message(profile_stream.name, row, profile_stream.transformer, schema) for row in profile_page]
+
+
+def test_parse_profile_analytics_page(benchmark, profile_stream, profile_page):
+    response = payloads.response(payloads.page(profile_page))
+
+    records = benchmark(lambda: list(profile_stream.parse_response(response)))
+
+    assert len(records) == ROWS_PER_PAGE
+
+
+def test_parse_post_analytics_page(benchmark, post_stream, post_page):
+    response = payloads.response(payloads.page(post_page))
+
+    records = benchmark(lambda: list(post_stream.parse_response(response)))
+
+    assert len(records) == ROWS_PER_PAGE
+
+
+def test_transform_rows_to_record_messages(benchmark, profile_stream, profile_page):
+    schema = profile_stream.get_json_schema()
+
+    messages = benchmark(
+        lambda: [stream_data_to_airbyte_message(profile_stream.name, row, profile_stream.transformer, schema) for row in profile_page]
+    )
+
+    assert len(messages) == ROWS_PER_PAGE
+
+
+def test_merge_metric_groups(benchmark, profile_page):
+    groups = split_metrics(FACEBOOK.profile_metrics, 10)
+    partials = [[dict(row, metrics={metric: row["metrics"][metric] for metric in group}) for row in profile_page] for group in groups]
+
+    merged = benchmark(merge_metric_groups, partials)
+
+    assert merged == [dict(row) for row in profile_page]
+
+
+def test_content_hash_of_post_rows(benchmark, post_page):
+    hashes = benchmark(lambda: [content_hash(row) for row in post_page])
+
+    assert len(set(hashes)) == ROWS_PER_PAGE
+
+
+def test_emit_with_cdk_serialization(benchmark, profile_messages):
+    lines = benchmark(lambda: [AirbyteEntrypoint.airbyte_message_to_string(message) for message in profile_messages])
+
+    assert len(lines) == ROWS_PER_PAGE
+
+
+def test_emit_with_fast_serialization(benchmark, profile_messages):
+    lines = benchmark(lambda: [serialize_message(message) for message in profile_messages])
+
+    assert len(lines) == ROWS_PER_PAGE
@@ -0,0 +1,15 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dagger import Container
+
+
+async def post_connector_install(connector_container: Container) -> Container:
+    # precompile the spec and stream catalog into source_sprout_social/bundle.json for fast spec/check/discover
+    return connector_container.with_exec(["python", "-m", "source_sprout_social.bundle"])
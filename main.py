@@ -5,9 +5,20 @@
 
 import sys
 
-from airbyte_cdk.entrypoint import launch
-from source_sprout_social import SourceSproutSocial
+from source_sprout_social.fast_entrypoint import run
 
 if __name__ == "__main__":
-    source = SourceSproutSocial()
-    launch(source, sys.argv[1:])
+    if sys.argv[1:2] == ["plan"]:
+        from source_sprout_social.planner import main
+
+        main(sys.argv[2:])
+    elif sys.argv[1:2] == ["export"]:
+        from source_sprout_social.export import main
+
+        main(sys.argv[2:])
+    elif not run(sys.argv[1:]):
+        from source_sprout_social import SourceSproutSocial
+        from source_sprout_social.emit import launch
+
+        source = SourceSproutSocial()
+        launch(source, sys.argv[1:])
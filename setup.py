@@ -9,6 +9,22 @@ MAIN_REQUIREMENTS = [
     "airbyte-cdk~=0.2",
 ]
 
+FAST_EMIT_REQUIREMENTS = [
+    "orjson>=3.9",
+]
+
+EXPORT_REQUIREMENTS = [
+    "pyarrow>=14",
+]
+
+ROLLUP_REQUIREMENTS = [
+    "numpy>=1.24",
+]
+
+BENCHMARK_REQUIREMENTS = [
+    "pytest-benchmark>=4",
+]
+
 TEST_REQUIREMENTS = [
     "requests-mock~=1.9.3",
     "pytest~=6.2",
@@ -26,5 +42,9 @@ setup(
     package_data={"": ["*.json", "*.yaml", "schemas/*.json", "schemas/shared/*.json"]},
     extras_require={
         "tests": TEST_REQUIREMENTS,
+        "fast_emit": FAST_EMIT_REQUIREMENTS,
+        "export": EXPORT_REQUIREMENTS,
+        "rollups": ROLLUP_REQUIREMENTS,
+        "benchmarks": BENCHMARK_REQUIREMENTS,
     },
 )
@@ -3,6 +3,13 @@
 #
 
 
-from .source import SourceSproutSocial
-
 __all__ = ["SourceSproutSocial"]
+
+
+def __getattr__(name):
+    # `source` imports the whole CDK, so it is only loaded when the source class is actually needed
+    if name == "SourceSproutSocial":
+        from .source import SourceSproutSocial
+
+        return SourceSproutSocial
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,76 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Plain `requests` helpers for the Sprout Social metadata endpoints.
+
+This module must not import `airbyte_cdk`: it is shared by the streams and by the fast startup path in
+`fast_entrypoint`, which answers `check` and `discover` without loading the CDK.
+"""
+
+import os
+from typing import Any, List, Mapping, Tuple
+
+import requests
+
+from . import deadlines, sharding
+
+API_URL_ENV = "SPROUT_SOCIAL_API_URL"
+API_URL = os.environ.get(API_URL_ENV, "https://api.sproutsocial.com/v1/")
+METADATA_TIMEOUT = deadlines.timeout({}, deadlines.METADATA)
+
+
+def auth_headers(api_key: str) -> Mapping[str, str]:
+    return {"Authorization": f"Bearer {api_key}", "Content-type": "application/json"}
+
+
+def get_customer_id(api_key: str, url_base: str = API_URL, timeout: Tuple[float, float] = METADATA_TIMEOUT) -> int:
+    """
+    Given an API key, make a request to the ClientMetadata endpoint to return the Customer ID.
+    """
+
+    response = requests.get(url_base + "metadata/client", headers=auth_headers(api_key), timeout=timeout)
+    response.raise_for_status()
+    return response.json()["data"][0]["customer_id"]
+
+
+def get_customer_profiles(
+    api_key: str, customer_id: int, url_base: str = API_URL, timeout: Tuple[float, float] = METADATA_TIMEOUT
+) -> List[Mapping[str, Any]]:
+    """
+    Return every row of the `{customer_id}/metadata/customer` endpoint.
+    """
+
+    response = requests.get(url_base + f"{customer_id}/metadata/customer", headers=auth_headers(api_key), timeout=timeout)
+    response.raise_for_status()
+    return response.json()["data"]
+
+
+def get_customer_metadata(
+    api_key: str, customer_id: int, resource: str, url_base: str = API_URL, timeout: Tuple[float, float] = METADATA_TIMEOUT
+) -> List[Mapping[str, Any]]:
+    """
+    Return every row of the `{customer_id}/metadata/customer/{resource}` endpoint, e.g. `tags` or `users`.
+    """
+
+    response = requests.get(url_base + f"{customer_id}/metadata/customer/{resource}", headers=auth_headers(api_key), timeout=timeout)
+    response.raise_for_status()
+    return response.json()["data"]
+
+
+def check_connection(config: Mapping[str, Any], url_base: str = API_URL) -> Tuple[bool, Any]:
+    """
+    :return Tuple[bool, any]: (True, None) if the API key can read the client metadata and the shard settings are
+    valid, (False, error) otherwise.
+    """
+
+    try:
+        sharding.validate(config)
+        response = requests.get(
+            url=url_base + "metadata/client", headers=auth_headers(config["api_key"]), timeout=deadlines.timeout(config, deadlines.METADATA)
+        )
+        response.raise_for_status()
+        return True, None
+    except Exception as e:
+        return False, e
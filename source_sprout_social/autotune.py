@@ -0,0 +1,140 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Adaptive concurrency of analytics requests, tuned with additive increase / multiplicative decrease (AIMD).
+
+When `adaptive_concurrency` is set in the config, the `sync_context.SyncContext` of a read holds a
+`ConcurrencyController`, and every analytics request attempt of the read waits until fewer than `limit` of them are in
+flight. Each time `limit`
+attempts in a row complete healthily the limit grows by one, up to `max_limit`. A throttled attempt (HTTP 429) or an
+attempt slower than `SPIKE_FACTOR` times the smoothed latency halves it: the first one right away, then at most once per
+`limit` attempts so one burst of errors only counts once. Server errors (5xx), timeouts and connection errors say
+nothing about the concurrency the API takes, so they neither grow nor shrink the limit, but do break a healthy streak.
+
+The last limit that completed a full window healthily is saved in the state of the `_adaptive_concurrency` pseudo
+stream (see `connector_state`), and the next sync starts from it; a warning is logged when the state it is given
+has lost it. The threads that send the requests come from
+`stream_concurrency`, `metric_group_concurrency` and `messages_concurrency`; the controller only decides how many of
+them have a request in flight.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping, Optional
+
+import requests
+from airbyte_cdk.models import AirbyteMessage
+
+from . import connector_state
+
+LEVEL_STREAM = "_adaptive_concurrency"
+DEFAULT_INITIAL_LIMIT = 2
+DEFAULT_MAX_LIMIT = 16
+SPIKE_FACTOR = 3.0
+# latencies needed before a slow attempt counts as a spike
+MIN_LATENCY_SAMPLES = 10
+THROTTLED_STATUSES = (429,)
+HEALTHY, OVERLOADED, FAILED = "healthy", "overloaded", "failed"
+
+
+class ConcurrencyController:
+    def __init__(self, initial_limit: int = DEFAULT_INITIAL_LIMIT, max_limit: int = DEFAULT_MAX_LIMIT, logger: Optional[logging.Logger] = None):
+        if max_limit < 1:
+            raise ValueError(f"the maximum concurrency must be a positive integer, got {max_limit}")
+        self.max_limit = max_limit
+        self.limit = max(1, min(initial_limit, max_limit))
+        self.good_limit = self.limit
+        self.logger = logger or logging.getLogger("airbyte")
+        self.in_flight = 0
+        self.requests = 0
+        self.increases = 0
+        self.decreases = 0
+        self.smoothed_latency: Optional[float] = None
+        self._samples = 0
+        self._healthy_in_a_row = 0
+        # the first overload halves the limit right away
+        self._since_decrease = self.limit
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(
+        cls, config: Mapping[str, Any], state: Any = None, logger: Optional[logging.Logger] = None
+    ) -> Optional["ConcurrencyController"]:
+        if not config.get("adaptive_concurrency"):
+            return None
+        saved = connector_state.read(state, LEVEL_STREAM, lost=f"adaptive concurrency starts again from {DEFAULT_INITIAL_LIMIT}") or {}
+        max_limit = config.get("max_concurrent_requests") or DEFAULT_MAX_LIMIT
+        return cls(initial_limit=saved.get("limit", DEFAULT_INITIAL_LIMIT), max_limit=max_limit, logger=logger)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one of the `limit` in-flight slots for the enclosed request attempt, and learn from how it went.
+        """
+
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            self.requests += 1
+        started = time.perf_counter()
+        outcome = FAILED
+        try:
+            yield
+            outcome = HEALTHY
+        except Exception as error:
+            outcome = self._outcome(error)
+            raise
+        finally:
+            self._complete(time.perf_counter() - started, outcome)
+
+    @staticmethod
+    def _outcome(error: Exception) -> str:
+        """
+        :return: what a failed attempt says about the concurrency: a rejected request, e.g. a 4xx or a bad record, is
+            as healthy as a successful one.
+        """
+
+        response = getattr(error, "response", None)
+        if response is not None and response.status_code in THROTTLED_STATUSES:
+            return OVERLOADED
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)) or (response is not None and response.status_code >= 500):
+            return FAILED
+        return HEALTHY
+
+    def _complete(self, latency: float, outcome: str) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._since_decrease += 1
+            spike = outcome == HEALTHY and self._samples >= MIN_LATENCY_SAMPLES and latency > SPIKE_FACTOR * self.smoothed_latency
+            if outcome == FAILED:
+                self._healthy_in_a_row = 0
+            elif outcome == HEALTHY and not spike:
+                self._samples += 1
+                self.smoothed_latency = latency if self.smoothed_latency is None else 0.9 * self.smoothed_latency + 0.1 * latency
+                self._healthy_in_a_row += 1
+                if self._healthy_in_a_row >= self.limit:
+                    self._healthy_in_a_row = 0
+                    self.good_limit = self.limit
+                    if self.limit < self.max_limit:
+                        self._set_limit(self.limit + 1, "healthy window")
+                        self.increases += 1
+            else:
+                self._healthy_in_a_row = 0
+                if self._since_decrease >= self.limit and self.limit > 1:
+                    self._since_decrease = 0
+                    self._set_limit(max(1, self.limit // 2), "latency spike" if spike else "throttled")
+                    self.good_limit = min(self.good_limit, self.limit)
+                    self.decreases += 1
+            self._condition.notify_all()
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        self.logger.info(f"Adaptive concurrency: {self.limit} -> {limit} in-flight analytics requests ({reason})")
+        self.limit = limit
+
+    def state_message(self) -> AirbyteMessage:
+        return connector_state.message(LEVEL_STREAM, {"limit": self.good_limit})
@@ -0,0 +1,70 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+The precompiled spec and catalog bundle.
+
+`python -m source_sprout_social.bundle` is run at image build time. It writes `bundle.json` next to this file,
+holding the connector spec and the `AirbyteStream` of every stream the connector can build, so `spec`, `check`
+and `discover` read one file instead of `spec.yaml` and a schema file per stream.
+
+This module must not import `airbyte_cdk` at import time; only building the bundle needs it.
+"""
+
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bundle.json")
+
+
+@lru_cache(maxsize=None)
+def load_bundle(path: str = BUNDLE_PATH) -> Optional[Mapping[str, Any]]:
+    """
+    :return: the bundle, or None when it has not been built, in which case callers fall back to the source files.
+    """
+
+    try:
+        with open(path) as bundle_file:
+            return json.load(bundle_file)
+    except FileNotFoundError:
+        return None
+
+
+def build_bundle(path: str = BUNDLE_PATH) -> Mapping[str, Any]:
+    from .networks import NETWORKS
+    from .rollups import PERIODS
+    from .source import SourceSproutSocial
+
+    # make sure the spec and schemas are read from the source files, not from a previous bundle
+    if os.path.exists(path):
+        os.remove(path)
+    load_bundle.cache_clear()
+
+    source = SourceSproutSocial()
+    spec = source.spec(logging.getLogger("airbyte"))
+    # with every rollup, so the bundle holds the stream of each period
+    config = {"profile_rollups": list(PERIODS)}
+    streams = source._build_streams(config=config, customer_id=0, profile_ids={network_type: [0] for network_type in NETWORKS})
+    metadata_streams = [stream.name for stream in streams if not hasattr(stream, "profile_ids")]
+    # streams over the profiles of every network, built whenever the customer has a profile
+    profile_streams = [stream.name for stream in streams if hasattr(stream, "profile_ids") and not hasattr(stream, "network")]
+    bundle = {
+        "spec": spec.dict(exclude_unset=True),
+        "metadata_streams": metadata_streams,
+        "profile_streams": profile_streams,
+        "streams": {stream.name: json.loads(stream.as_airbyte_stream().json(exclude_unset=True)) for stream in streams},
+    }
+
+    with open(path, "w") as bundle_file:
+        json.dump(bundle, bundle_file, separators=(",", ":"))
+    load_bundle.cache_clear()
+    return bundle
+
+
+if __name__ == "__main__":
+    build_bundle()
+    print(f"Wrote {BUNDLE_PATH}")
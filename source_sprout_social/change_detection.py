@@ -0,0 +1,59 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Change detection for the metadata streams.
+
+In incremental mode a metadata stream keeps a short content hash of every record it has emitted in its state,
+keyed by primary key, and only emits the records that are new or whose hash changed since the previous sync.
+Records that disappeared from the API can optionally be emitted as tombstones.
+"""
+
+import hashlib
+import json
+from typing import Any, Iterable, Mapping, MutableMapping, Optional
+
+CURSOR_FIELD = "_ab_cdc_updated_at"
+DELETED_AT_FIELD = "_ab_cdc_deleted_at"
+
+
+def content_hash(record: Mapping[str, Any]) -> str:
+    """
+    A 16 character hash of the record content, independent of the key order of its objects.
+    """
+
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+def state_key(value: Any) -> str:
+    """
+    State keys are the JSON encoding of the primary key value, so tombstones can restore its original type.
+    """
+
+    return json.dumps(value, sort_keys=True)
+
+
+class ChangeTracker:
+    def __init__(self, previous_hashes: Optional[Mapping[str, str]] = None):
+        self.previous_hashes = dict(previous_hashes or {})
+        self.hashes: MutableMapping[str, str] = {}
+
+    def observe(self, key: Any, record: Mapping[str, Any]) -> bool:
+        """
+        Remember the hash of `record` and return whether it is new or changed since the previous sync.
+        """
+
+        key = state_key(key)
+        record_hash = content_hash(record)
+        self.hashes[key] = record_hash
+        return self.previous_hashes.get(key) != record_hash
+
+    def deleted_keys(self) -> Iterable[Any]:
+        """
+        :return: the primary key values seen in the previous sync but not in this one.
+        """
+
+        for key in sorted(self.previous_hashes.keys() - self.hashes.keys()):
+            yield json.loads(key)
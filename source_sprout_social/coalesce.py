@@ -0,0 +1,80 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Cross-network request coalescing for the analytics endpoints.
+
+The profile (or post) analytics streams of every network call the same endpoint, only filtering on different
+profile IDs and asking for different metrics. With `coalesce_networks` set in the config, the selected streams of
+one endpoint share a `CoalescedRead`: a single query over the union of their profile IDs and metrics, paged once,
+whose rows are split back to each network by `customer_profile_id`.
+
+The rows of the networks are held in memory from the combined query until their stream takes them, which drops them.
+When the combined query fails, the error is raised to every stream sharing it, without running the query again.
+"""
+
+import threading
+from typing import Any, Callable, Iterable, List, Mapping, MutableMapping, Optional, Sequence
+
+from .networks import Network
+
+
+def combined_network(networks: Sequence[Network]) -> Network:
+    """
+    A `Network` asking for the metrics of all `networks`, in order and without duplicates.
+    """
+
+    def union(metric_lists: Iterable[Iterable[str]]) -> tuple:
+        return tuple(dict.fromkeys(metric for metrics in metric_lists for metric in metrics))
+
+    return Network(
+        network_type="+".join(network.network_type for network in networks),
+        stream_prefix="coalesced",
+        profile_metrics=union(network.profile_metrics for network in networks),
+        post_metrics=union(network.post_metrics for network in networks),
+    )
+
+
+class CoalescedRead:
+    def __init__(
+        self,
+        read_rows: Callable[[], Iterable[Mapping[str, Any]]],
+        profile_networks: Mapping[Any, str],
+        profile_id: Callable[[Mapping[str, Any]], Any],
+    ):
+        """
+        :param read_rows: reads every row of the combined query.
+        :param profile_networks: the `network_type` of each profile ID in the combined query.
+        :param profile_id: extracts the `customer_profile_id` of a row.
+        """
+
+        self.read_rows = read_rows
+        self.profile_networks = {str(profile): network_type for profile, network_type in profile_networks.items()}
+        self.profile_id = profile_id
+        self._rows: MutableMapping[str, List[Mapping[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._done = False
+        self._error: Optional[Exception] = None
+
+    def rows_for(self, network_type: str) -> List[Mapping[str, Any]]:
+        """
+        :return: the rows of `network_type`, running the combined query first if no other network has yet. The rows are
+            handed out once, later calls for the same network return none.
+        :raises: the error of the combined query, to every network once it failed.
+        """
+
+        with self._lock:
+            if not self._done:
+                self._done = True
+                try:
+                    for row in self.read_rows():
+                        owner = self.profile_networks.get(str(self.profile_id(row)))
+                        if owner is not None:
+                            self._rows.setdefault(owner, []).append(row)
+                except Exception as error:
+                    self._rows.clear()
+                    self._error = error
+            if self._error is not None:
+                raise self._error
+        return self._rows.pop(network_type, [])
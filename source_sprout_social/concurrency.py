@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Running independent message iterators concurrently.
+
+`interleave` drains several iterators from worker threads and yields their items from the calling thread as they
+arrive, so only the caller ever writes to stdout and each message is emitted whole. The items of one iterator keep
+their relative order, so a stream's state messages still follow the records they cover.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def interleave(sources: Sequence[Callable[[], Iterable[T]]], max_workers: int, max_queued: int = 1000) -> Iterator[T]:
+    """
+    Run each of `sources` in a pool of `max_workers` threads and yield their items as they are produced.
+
+    At most `max_queued` items wait for the caller, after which the workers block until it catches up.
+    The first exception raised by a source stops the others and is re-raised here.
+    """
+
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be a positive integer, got {max_workers}")
+
+    items: "queue.Queue" = queue.Queue(maxsize=max_queued)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(source: Callable[[], Iterable[T]]) -> None:
+        if stopped.is_set():
+            return
+        try:
+            for item in source():
+                if not put((item, None)):
+                    return
+        except BaseException as error:
+            put((_DONE, error))
+            return
+        put((_DONE, None))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="interleave")
+    try:
+        for source in sources:
+            executor.submit(drain, source)
+        remaining = len(sources)
+        while remaining:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stopped.set()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,47 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Connector-level state kept next to the state of the streams.
+
+Airbyte only persists per-stream state, so what the connector itself carries over between syncs, such as the cached
+customer metadata or the last good request concurrency, is stored as the state of a pseudo stream whose name starts
+with an underscore. No real stream is ever named that way.
+
+The state is read through the CDK's `ConnectorStateManager`, so per-stream, global and legacy dict states all work.
+A pseudo stream is in neither the catalog nor `discover`, and an orchestrator that only keeps the state of configured
+streams drops it; a read given a state without the entry logs that what it carried over was lost.
+"""
+
+import logging
+from typing import Any, Mapping, MutableMapping, Optional
+
+from airbyte_cdk.models import AirbyteMessage, AirbyteStateMessage, AirbyteStateType, AirbyteStreamState, StreamDescriptor, Type
+from airbyte_cdk.sources.connector_state_manager import ConnectorStateManager
+
+logger = logging.getLogger("airbyte")
+
+
+def read(state: Any, name: str, lost: Optional[str] = None) -> Optional[MutableMapping[str, Any]]:
+    """
+    :param lost: what is lost without the entry, logged as a warning when `state` holds the state of other streams only.
+    :return: the state of the pseudo stream `name` in the state the connector was started with, or None.
+    """
+
+    if not state:
+        return None
+    try:
+        manager = ConnectorStateManager(stream_instance_map={}, state=state)
+    except ValueError as error:
+        logger.warning(f"Cannot read the {name} state: {error}")
+        return None
+    entry = manager.get_stream_state(name, None)
+    if not entry and lost and manager.per_stream_states:
+        logger.warning(f"The state holds no {name} entry, e.g. because the orchestrator only keeps the state of configured streams; {lost}")
+    return entry or None
+
+
+def message(name: str, entry: Mapping[str, Any]) -> AirbyteMessage:
+    stream_state = AirbyteStreamState(stream_descriptor=StreamDescriptor(name=name), stream_state=dict(entry))
+    return AirbyteMessage(type=Type.STATE, state=AirbyteStateMessage(type=AirbyteStateType.STREAM, stream=stream_state))
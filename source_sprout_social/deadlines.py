@@ -0,0 +1,35 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Connect and read deadlines of every API request, per kind of endpoint.
+
+Every request the connector sends has a `(connect, read)` timeout, so a hung connection fails, and is retried by the
+CDK's backoff, instead of stalling the sync. The defaults can be overridden with `connect_timeout_seconds` and the
+`read_timeout_seconds` object of the config, e.g. {"post_analytics": 120}.
+
+This module must not import `airbyte_cdk`, see `api`.
+"""
+
+from typing import Any, Mapping, Tuple
+
+METADATA = "metadata"
+PROFILE_ANALYTICS = "profile_analytics"
+POST_ANALYTICS = "post_analytics"
+MESSAGES = "messages"
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUTS = {METADATA: 60.0, PROFILE_ANALYTICS: 300.0, POST_ANALYTICS: 300.0, MESSAGES: 120.0}
+
+
+def timeout(config: Mapping[str, Any], endpoint: str) -> Tuple[float, float]:
+    """
+    :return: the `(connect, read)` timeout in seconds of requests to `endpoint`, one of METADATA, PROFILE_ANALYTICS, POST_ANALYTICS or MESSAGES.
+    """
+
+    read_timeouts = config.get("read_timeout_seconds") or {}
+    return (
+        config.get("connect_timeout_seconds") or DEFAULT_CONNECT_TIMEOUT,
+        read_timeouts.get(endpoint) or DEFAULT_READ_TIMEOUTS[endpoint],
+    )
@@ -0,0 +1,65 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Enrichment of post analytics records with tag and user metadata.
+
+Post rows only carry the IDs of their tags (`internal.tags[].id`) and sender (`internal.sent_by.id`). With
+`enrich_posts` set in the config, the customer's tags and users are loaded once per sync into in-memory indexes
+shared by every post stream, and each post is given the `text` and `type` of its tags and the metadata of its
+sender as it is read.
+"""
+
+import threading
+from typing import Any, Mapping, MutableMapping, Optional, Tuple
+
+from . import api
+
+TAG_FIELDS = ("text", "type")
+USER_FIELDS_SKIPPED = ("id", "_ab_cdc_updated_at", "_ab_cdc_deleted_at")
+
+
+class LookupIndexes:
+    def __init__(self, api_key: str, customer_id: int, url_base: str = api.API_URL, timeout: Tuple[float, float] = api.METADATA_TIMEOUT):
+        self.api_key = api_key
+        self.customer_id = customer_id
+        self.url_base = url_base
+        self.timeout = timeout
+        self._tags: Optional[Mapping[str, Mapping[str, Any]]] = None
+        self._users: Optional[Mapping[str, Mapping[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._tags is None:
+                tags = api.get_customer_metadata(self.api_key, self.customer_id, "tags", url_base=self.url_base, timeout=self.timeout)
+                users = api.get_customer_metadata(self.api_key, self.customer_id, "users", url_base=self.url_base, timeout=self.timeout)
+                self._users = {str(user.get("id")): user for user in users}
+                self._tags = {str(tag.get("tag_id")): tag for tag in tags}
+
+    def enrich_post(self, row: Mapping[str, Any]) -> Mapping[str, Any]:
+        """
+        :return: `row` with the metadata of its tags and sender added under `internal`. Unknown IDs are left as they are.
+        """
+
+        internal = row.get("internal")
+        if not internal:
+            return row
+        if self._tags is None:
+            self._load()
+
+        enriched: MutableMapping[str, Any] = dict(internal)
+        if internal.get("tags"):
+            enriched["tags"] = [self._enrich_tag(tag) for tag in internal["tags"]]
+        sent_by = internal.get("sent_by")
+        if sent_by and str(sent_by.get("id")) in self._users:
+            user = self._users[str(sent_by["id"])]
+            enriched["sent_by"] = dict({key: value for key, value in user.items() if key not in USER_FIELDS_SKIPPED}, **sent_by)
+        return dict(row, internal=enriched)
+
+    def _enrich_tag(self, tag: Mapping[str, Any]) -> Mapping[str, Any]:
+        metadata = self._tags.get(str(tag.get("id")))
+        if metadata is None:
+            return tag
+        return dict({field: metadata.get(field) for field in TAG_FIELDS}, **tag)
@@ -0,0 +1,291 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Bulk export of the connector's streams straight to local files, for backfills staged into a warehouse.
+
+    python main.py export --config secrets/config.json --output-dir exports [--catalog integration_tests/configured_catalog.json]
+        [--state state.json] [--format parquet|jsonl] [--batch-rows 50000] [--writers 4]
+
+The streams are read through `SourceSproutSocial.read`, so every setting of the config applies as in a sync, e.g.
+`stream_concurrency` to read several streams at once. Instead of being printed as Airbyte messages, the records are
+buffered per stream and day and written, `--batch-rows` at a time, by `--writers` threads to
+
+    <output-dir>/<stream>/date=<YYYY-MM-DD>/part-<run>-<n>.parquet   (or .jsonl.gz)
+
+The day comes from the record's `created_time` or `reporting_period` dimension, and is the export date for streams
+that have neither. Parquet columns follow the stream's JSON schema; objects, arrays and fields missing from the schema
+are stored as JSON strings, and an integer column is stored as float in the files where it holds fractional values.
+Parquet needs `pyarrow`: `pip install '.[export]'`. Files are written under a temporary name and renamed once
+complete. The last state of each stream is written to `<output-dir>/state.json`, to continue incrementally with
+`--state`, and a summary is printed to stdout.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, MutableMapping, Optional, TextIO, Tuple
+
+from airbyte_cdk.models import AirbyteStateMessage, ConfiguredAirbyteCatalog, DestinationSyncMode, SyncMode, Type
+
+from .source import SourceSproutSocial
+
+FORMATS = ("parquet", "jsonl")
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_WRITERS = 4
+# buffered rows across every partition, past which the largest partition is written early
+MAX_BUFFERED_BATCHES = 10
+
+logger = logging.getLogger("airbyte")
+
+
+def partition_date(record: Mapping[str, Any], default: str) -> str:
+    created_time = record.get("created_time")
+    if isinstance(created_time, str) and len(created_time) >= 10:
+        return created_time[:10]
+    for key, value in (record.get("dimensions") or {}).items():
+        if key.startswith("reporting_period") and isinstance(value, str) and len(value) >= 10:
+            return value[:10]
+    return default
+
+
+class PartitionedWriter:
+    def __init__(
+        self,
+        output_dir: str,
+        file_format: str = "parquet",
+        schemas: Optional[Mapping[str, Mapping[str, Any]]] = None,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        writers: int = DEFAULT_WRITERS,
+    ):
+        if file_format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}, got {file_format}")
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ValueError("the parquet format needs pyarrow, install it with `pip install '.[export]'`") from None
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.schemas = schemas or {}
+        self.batch_rows = batch_rows
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.export_date = datetime.now(timezone.utc).date().isoformat()
+        self.files: List[str] = []
+        self.rows: MutableMapping[str, int] = {}
+        self._buffers: Dict[Tuple[str, str], List[Mapping[str, Any]]] = {}
+        self._buffered_rows = 0
+        self._parts: MutableMapping[Tuple[str, str], int] = {}
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=writers, thread_name_prefix="export")
+
+    def write(self, stream: str, record: Mapping[str, Any]) -> None:
+        """
+        Buffer `record`, and hand its partition to a writer thread once it holds `batch_rows` records.
+        """
+
+        partition = (stream, partition_date(record, self.export_date))
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(record)
+        self._buffered_rows += 1
+        if len(buffer) >= self.batch_rows:
+            self._flush(partition)
+        elif self._buffered_rows >= MAX_BUFFERED_BATCHES * self.batch_rows:
+            self._flush(max(self._buffers, key=lambda key: len(self._buffers[key])))
+
+    def close(self) -> None:
+        """
+        Write every partition still buffered, and wait for all the writes.
+        """
+
+        try:
+            for partition in list(self._buffers):
+                self._flush(partition)
+            for future in self._pending:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _flush(self, partition: Tuple[str, str]) -> None:
+        rows = self._buffers.pop(partition)
+        self._buffered_rows -= len(rows)
+        part = self._parts.get(partition, 0)
+        self._parts[partition] = part + 1
+        stream, day = partition
+        extension = "parquet" if self.file_format == "parquet" else "jsonl.gz"
+        path = os.path.join(self.output_dir, stream, f"date={day}", f"part-{self.run_id}-{part:05d}.{extension}")
+        self._pending.append(self._executor.submit(self._write_file, path, stream, rows))
+        # surface a failed write early instead of at the end of the export
+        for future in [future for future in self._pending if future.done()]:
+            future.result()
+            self._pending.remove(future)
+
+    def _write_file(self, path: str, stream: str, rows: List[Mapping[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = path + ".tmp"
+        if self.file_format == "parquet":
+            _write_parquet(temporary_path, rows, self.schemas.get(stream) or {})
+        else:
+            _write_jsonl(temporary_path, rows)
+        os.replace(temporary_path, path)
+        with self._lock:
+            self.files.append(path)
+            self.rows[stream] = self.rows.get(stream, 0) + len(rows)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _write_jsonl(path: str, rows: List[Mapping[str, Any]]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as output:
+        for row in rows:
+            output.write(_dumps(row))
+            output.write("\n")
+
+
+def _column_type(property_schema: Mapping[str, Any]) -> Tuple[str, Callable[[Any], Any]]:
+    """
+    :return: the pyarrow type name of a JSON schema property, and the function converting its non-null values.
+    """
+
+    types = property_schema.get("type") or []
+    types = [types] if isinstance(types, str) else types
+    if "object" in types or "array" in types or "string" in types or not types:
+        return "string", lambda value: value if isinstance(value, str) else _dumps(value)
+    if "number" in types:
+        return "float64", float
+    if "integer" in types:
+        return "int64", int
+    if "boolean" in types:
+        return "bool_", bool
+    return "string", _dumps
+
+
+def _is_integral(value: Any) -> bool:
+    try:
+        return float(value).is_integer()
+    except (TypeError, ValueError):
+        # not a number at all, which `int` rejects
+        return True
+
+
+def _write_parquet(path: str, rows: List[Mapping[str, Any]], json_schema: Mapping[str, Any]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    properties = json_schema.get("properties") or {}
+    extra_fields = sorted({field for row in rows for field in row} - properties.keys())
+    columns, fields = {}, []
+    for field in list(properties) + extra_fields:
+        type_name, convert = _column_type(properties.get(field) or {})
+        values = [row.get(field) for row in rows]
+        if type_name == "int64" and not all(_is_integral(value) for value in values if value is not None):
+            # `int` would truncate them
+            type_name, convert = "float64", float
+        columns[field] = pa.array([None if value is None else convert(value) for value in values], type=getattr(pa, type_name)())
+        fields.append(pa.field(field, columns[field].type))
+    pq.write_table(pa.Table.from_arrays(list(columns.values()), schema=pa.schema(fields)), path, compression="zstd")
+
+
+def _catalog(source: SourceSproutSocial, config: Mapping[str, Any], catalog_path: Optional[str]) -> ConfiguredAirbyteCatalog:
+    """
+    Without `catalog_path`, every stream is exported. The customer metadata looked up to list them is reused by the read.
+    """
+
+    if catalog_path:
+        return ConfiguredAirbyteCatalog.parse_file(catalog_path)
+    return ConfiguredAirbyteCatalog.parse_obj(
+        {
+            "streams": [
+                {
+                    "stream": json.loads(stream.as_airbyte_stream().json(exclude_unset=True)),
+                    "sync_mode": SyncMode.full_refresh.value,
+                    "destination_sync_mode": DestinationSyncMode.overwrite.value,
+                }
+                for stream in source.streams(config)
+            ]
+        }
+    )
+
+
+def export(
+    config: Mapping[str, Any],
+    output_dir: str,
+    catalog_path: Optional[str] = None,
+    state_path: Optional[str] = None,
+    file_format: str = "parquet",
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    writers: int = DEFAULT_WRITERS,
+) -> Mapping[str, Any]:
+    started = time.perf_counter()
+    source = SourceSproutSocial()
+    catalog = _catalog(source, config, catalog_path)
+    state = None
+    if state_path:
+        with open(state_path) as state_file:
+            state = [AirbyteStateMessage.parse_obj(message) for message in json.load(state_file)]
+
+    schemas = {configured_stream.stream.name: configured_stream.stream.json_schema for configured_stream in catalog.streams}
+    writer = PartitionedWriter(output_dir, file_format=file_format, schemas=schemas, batch_rows=batch_rows, writers=writers)
+    states: MutableMapping[str, Mapping[str, Any]] = {}
+    try:
+        for message in source.read(logger, config, catalog, state):
+            if message.type == Type.RECORD:
+                writer.write(message.record.stream, message.record.data)
+            elif message.type == Type.STATE and message.state.stream is not None:
+                states[message.state.stream.stream_descriptor.name] = json.loads(message.state.json(exclude_unset=True))
+            elif message.type == Type.LOG:
+                logger.info(message.log.message)
+    finally:
+        writer.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "state.json"), "w") as state_file:
+        json.dump(list(states.values()), state_file, indent=2)
+    return {
+        "format": file_format,
+        "files": len(writer.files),
+        "records": dict(sorted(writer.rows.items())),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(args: List[str], output: TextIO = sys.stdout) -> None:
+    parser = argparse.ArgumentParser(prog="export", description="Export the connector's streams to partitioned local files.")
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--catalog", help="Only export the streams of this configured catalog, in its sync modes.")
+    parser.add_argument("--state", help="Continue incremental streams from this state, e.g. the state.json of a previous export.")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Records per file, at most.")
+    parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS, help="Threads writing files.")
+    parsed_args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    with open(parsed_args.config) as config_file:
+        config = json.load(config_file)
+    summary = export(
+        config,
+        parsed_args.output_dir,
+        catalog_path=parsed_args.catalog,
+        state_path=parsed_args.state,
+        file_format=parsed_args.format,
+        batch_rows=parsed_args.batch_rows,
+        writers=parsed_args.writers,
+    )
+    json.dump(summary, output, indent=2)
+    output.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
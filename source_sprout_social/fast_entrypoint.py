@@ -0,0 +1,98 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+A startup-optimized path for the `spec`, `check` and `discover` commands.
+
+Importing `airbyte_cdk` dominates the cold start of the connector, and the orchestrator runs `check` and
+`discover` constantly. When the precompiled bundle is present, these commands are answered here with only the
+standard library and `requests`, printing the same Airbyte messages as the CDK entrypoint. Anything this path
+does not handle (other commands, extra flags, a missing bundle, an unreadable config or a failed lookup) makes
+`run` return False, and `main.py` falls back to `airbyte_cdk.entrypoint.launch`.
+
+Set `SPROUT_SOCIAL_FAST_STARTUP=0` to always go through the CDK.
+"""
+
+import json
+import os
+import sys
+from typing import Any, List, Mapping, Optional, TextIO
+
+from . import deadlines, sharding
+from .bundle import load_bundle
+from .networks import analytics_networks, group_profiles_by_network
+
+FAST_STARTUP_ENV = "SPROUT_SOCIAL_FAST_STARTUP"
+
+
+def run(args: List[str], output: TextIO = sys.stdout) -> bool:
+    """
+    :return: True if the command was answered, False if it must go through the CDK entrypoint.
+    """
+
+    bundle = load_bundle()
+    if bundle is None or os.environ.get(FAST_STARTUP_ENV) == "0":
+        return False
+
+    if args == ["spec"]:
+        _emit(output, {"type": "SPEC", "spec": bundle["spec"]})
+        return True
+
+    if len(args) != 3 or args[0] not in ("check", "discover") or args[1] != "--config":
+        return False
+    config = _read_config(args[2])
+    if config is None:
+        return False
+
+    # `requests` is only needed from here on, so `spec` does not pay for importing it
+    from . import api, filters
+
+    if args[0] == "check":
+        succeeded, error = api.check_connection(config)
+        if succeeded:
+            _emit(output, _log("INFO", "Check succeeded"))
+            _emit(output, {"type": "CONNECTION_STATUS", "connectionStatus": {"status": "SUCCEEDED"}})
+        else:
+            _emit(output, _log("ERROR", "Check failed"))
+            _emit(output, {"type": "CONNECTION_STATUS", "connectionStatus": {"status": "FAILED", "message": repr(error)}})
+        return True
+
+    try:
+        sharding.validate(config)
+        timeout = deadlines.timeout(config, deadlines.METADATA)
+        customer_id = api.get_customer_id(config["api_key"], timeout=timeout)
+        customer_profiles = api.get_customer_profiles(config["api_key"], customer_id, timeout=timeout)
+        customer_profiles = filters.in_groups(customer_profiles, filters.group_ids(config, customer_id, timeout=timeout))
+        profile_ids = group_profiles_by_network(customer_profiles)
+    except Exception:
+        return False
+    stream_names = list(bundle["metadata_streams"]) if sharding.is_primary_shard(config) else []
+    profile_ids = sharding.shard_profile_ids(config, customer_id, profile_ids)
+    for network in analytics_networks(profile_ids):
+        stream_names += [network.profile_stream_name, network.post_stream_name]
+        stream_names += [network.rollup_stream_name(period) for period in config.get("profile_rollups") or []]
+    if profile_ids:
+        stream_names += bundle["profile_streams"]
+    _emit(output, {"type": "CATALOG", "catalog": {"streams": [bundle["streams"][name] for name in stream_names]}})
+    return True
+
+
+def _read_config(path: str) -> Optional[Mapping[str, Any]]:
+    try:
+        with open(path) as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(config, dict) or not isinstance(config.get("api_key"), str):
+        return None
+    return config
+
+
+def _log(level: str, message: str) -> Mapping[str, Any]:
+    return {"type": "LOG", "log": {"level": level, "message": message}}
+
+
+def _emit(output: TextIO, message: Mapping[str, Any]) -> None:
+    output.write(json.dumps(message) + "\n")
+    output.flush()
@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Filters pushed down into the API queries, so only the profiles and posts that are reported on are transferred.
+
+- `filter_groups`: names or IDs of customer groups, resolved through the endpoint of the `customer_groups` stream.
+  Only the profiles in at least one of these groups get analytics and messages.
+- `filter_tags`: texts or IDs of message tags, resolved through the endpoint of the `customer_tags` stream, and sent
+  as a `tag_id.eq(...)` filter of the post analytics queries.
+- `filter_post_types`: post types, e.g. `TWEET` or `INSTAGRAM_MEDIA`, sent as a `post_type.eq(...)` filter of the post
+  analytics queries.
+
+Profile analytics are per profile and day, so only the group filter applies to them. A name or ID matching no group
+or tag is a configuration error. Like `api`, this module must not import `airbyte_cdk`.
+"""
+
+import threading
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from . import api
+
+
+def resolve(rows: Iterable[Mapping[str, Any]], id_field: str, name_field: str, wanted: Sequence[str], kind: str) -> List[str]:
+    """
+    :return: the IDs of the `rows` whose ID or name (case-insensitively) is one of `wanted`, in the order of `wanted`.
+    """
+
+    ids_by_key = {}
+    for row in rows:
+        ids_by_key.setdefault(str(row.get(name_field, "")).casefold(), []).append(str(row.get(id_field)))
+        ids_by_key.setdefault(str(row.get(id_field)).casefold(), []).append(str(row.get(id_field)))
+    unknown = [value for value in wanted if str(value).casefold() not in ids_by_key]
+    if unknown:
+        raise ValueError(f"no customer {kind} is named or has the ID {', '.join(map(str, unknown))}")
+    return list(dict.fromkeys(resolved for value in wanted for resolved in ids_by_key[str(value).casefold()]))
+
+
+def group_ids(
+    config: Mapping[str, Any], customer_id: int, url_base: str = api.API_URL, timeout: Tuple[float, float] = api.METADATA_TIMEOUT
+) -> Optional[Set[str]]:
+    """
+    :return: the IDs of the groups of `filter_groups`, or None when profiles are not filtered by group.
+    """
+
+    wanted = config.get("filter_groups")
+    if not wanted:
+        return None
+    groups = api.get_customer_metadata(config["api_key"], customer_id, "groups", url_base=url_base, timeout=timeout)
+    return set(resolve(groups, "group_id", "name", wanted, "group"))
+
+
+def in_groups(customer_profiles: Iterable[Mapping[str, Any]], ids: Optional[Set[str]]) -> List[Mapping[str, Any]]:
+    """
+    :return: the `customer_profiles` rows in at least one of the groups `ids`, or all of them when `ids` is None.
+    """
+
+    if ids is None:
+        return list(customer_profiles)
+    return [profile for profile in customer_profiles if ids & {str(group) for group in profile.get("groups") or []}]
+
+
+class PostFilters:
+    """
+    The extra `filters` of the post analytics queries, shared by every post stream and resolved once, on first use.
+    """
+
+    def __init__(
+        self, config: Mapping[str, Any], customer_id: int, url_base: str = api.API_URL, timeout: Tuple[float, float] = api.METADATA_TIMEOUT
+    ):
+        self.config = config
+        self.customer_id = customer_id
+        self.url_base = url_base
+        self.timeout = timeout
+        self._filters: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def configured(config: Mapping[str, Any]) -> bool:
+        return bool(config.get("filter_tags") or config.get("filter_post_types"))
+
+    def filters(self) -> List[str]:
+        with self._lock:
+            if self._filters is None:
+                filters = []
+                if self.config.get("filter_tags"):
+                    tags = api.get_customer_metadata(self.config["api_key"], self.customer_id, "tags", url_base=self.url_base, timeout=self.timeout)
+                    filters.append(f"tag_id.eq({','.join(resolve(tags, 'tag_id', 'text', self.config['filter_tags'], 'tag'))})")
+                if self.config.get("filter_post_types"):
+                    filters.append(f"post_type.eq({','.join(self.config['filter_post_types'])})")
+                self._filters = filters
+            return list(self._filters)
@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Hedged requests to cut the tail latency of page requests.
+
+When `hedge_percentile` is set in the config, the `sync_context.SyncContext` of a read holds a `Hedger`. It tracks the
+recent latencies of each stream's requests, and once a request attempt has run longer than the given percentile of them,
+sends a duplicate; whichever attempt succeeds first is used and the other one is left to finish in the background. Both
+attempts go through `send_attempt`, which is expected to wait for the shared request budget, so hedges count against
+it like any other request.
+
+Only the first attempt of a request is hedged and timed; the retries of the CDK's backoff loop are sent as they are.
+While a request of a stream is backing off, e.g. after a 429, the API is throttling it, so a slow answer is expected:
+nothing of the stream is hedged or timed until the backoff is over. Failed attempts are not timed either, so the
+percentiles only hold the latencies of healthy first attempts. Hedging only starts once a stream has `min_samples` of them.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Mapping, MutableMapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._latencies: MutableMapping[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, percentile: float, min_samples: int) -> Optional[float]:
+        """
+        :return: the `percentile` of the recent latencies of `key`, or None while fewer than `min_samples` were recorded.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+
+class Hedger:
+    def __init__(self, percentile: float, min_samples: int = 20, max_workers: int = 32):
+        if not 0 < percentile < 100:
+            raise ValueError(f"hedge_percentile must be between 0 and 100, got {percentile}")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker()
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self._backing_off: MutableMapping[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> Optional["Hedger"]:
+        percentile = config.get("hedge_percentile")
+        return cls(percentile) if percentile else None
+
+    def send(self, key: str, send_attempt: Callable[[], T], retry: bool = False) -> T:
+        """
+        Send one attempt of a request of `key`, hedged unless it is a `retry` or a request of `key` is backing off.
+        """
+
+        with self._lock:
+            self.requests += 1
+            backing_off = self._backing_off.get(key, 0) > 0
+        if retry or backing_off:
+            return send_attempt()
+
+        threshold = self.latencies.percentile(key, self.percentile, self.min_samples)
+        started = time.perf_counter()
+        primary = self._executor.submit(send_attempt)
+        if threshold is None or not wait([primary], timeout=threshold).not_done:
+            result = primary.result()
+            self.latencies.record(key, time.perf_counter() - started)
+            return result
+
+        with self._lock:
+            self.hedges += 1
+        hedge = self._executor.submit(send_attempt)
+        winner = self._first_success(primary, hedge)
+        if winner is hedge:
+            with self._lock:
+                self.hedges_won += 1
+        result = winner.result()
+        self.latencies.record(key, time.perf_counter() - started)
+        return result
+
+    def backoff_started(self, key: str) -> None:
+        with self._lock:
+            self._backing_off[key] = self._backing_off.get(key, 0) + 1
+
+    def backoff_ended(self, key: str) -> None:
+        with self._lock:
+            self._backing_off[key] -= 1
+
+    @staticmethod
+    def _first_success(*attempts: Future) -> Future:
+        """
+        :return: the first attempt to succeed, or the last one to fail when none does.
+        """
+
+        pending = set(attempts)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None or not pending:
+                    return attempt
+
+    def close(self) -> None:
+        # losing attempts are not waited for
+        self._executor.shutdown(wait=False)
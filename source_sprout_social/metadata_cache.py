@@ -0,0 +1,81 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Customer metadata kept in the connector state between syncs.
+
+Every sync needs the customer ID and the profiles of each network before it can build its streams, and they rarely
+change. `read` keeps them in the state of a `_customer_metadata` pseudo stream (see `connector_state`), with the time
+they were fetched and a hash of the API key and `filter_groups`, and a later sync with the same key and groups reuses
+them for `customer_metadata_ttl_hours`, skipping the metadata requests. The cache is off unless the TTL is set.
+
+Discover always looks the metadata up, so the catalog can name streams of a network or profile added since it was
+cached. A read whose catalog names a stream the cached metadata does not build looks the metadata up again, and so does
+a read of the messages stream, whose cursor would otherwise move past the windows of profiles missing from the cache.
+
+An analytics request rejected with a status in `REJECTED_PROFILE_STATUSES` may mean a cached profile is gone. The
+metadata is then fetched again at the end of the sync, and the refreshed entry is emitted for the next one.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+from airbyte_cdk.models import AirbyteMessage
+
+from . import connector_state
+from .change_detection import content_hash
+
+CACHE_STREAM = "_customer_metadata"
+DEFAULT_TTL_HOURS = 0
+REJECTED_PROFILE_STATUSES = (400, 403, 404)
+
+
+@dataclass(frozen=True)
+class CustomerMetadata:
+    customer_id: int
+    profile_ids: Dict[str, List[int]]
+    fetched_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    cached: bool = False
+
+
+def ttl(config: Mapping[str, Any]) -> timedelta:
+    return timedelta(hours=config.get("customer_metadata_ttl_hours", DEFAULT_TTL_HOURS))
+
+
+def _key_hash(config: Mapping[str, Any]) -> str:
+    """
+    A hash of what the cached profiles depend on: the API key, and the groups they are filtered on, if any.
+    """
+
+    key = {"api_key": config["api_key"]}
+    if config.get("filter_groups"):
+        key["filter_groups"] = sorted(config["filter_groups"])
+    return content_hash(key)
+
+
+def load(config: Mapping[str, Any], state: Any) -> Optional[CustomerMetadata]:
+    """
+    :return: the cached metadata when `state` holds an entry for the configured API key and groups younger than the TTL, or None.
+    """
+
+    entry = connector_state.read(state, CACHE_STREAM, lost="the customer metadata is looked up again") if ttl(config) else None
+    if entry is None:
+        return None
+    if entry.get("api_key_hash") != _key_hash(config):
+        return None
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    if datetime.now(timezone.utc) - fetched_at > ttl(config):
+        return None
+    return CustomerMetadata(customer_id=entry["customer_id"], profile_ids=entry["profile_ids"], fetched_at=fetched_at, cached=True)
+
+
+def state_message(config: Mapping[str, Any], metadata: CustomerMetadata) -> AirbyteMessage:
+    entry = {
+        "customer_id": metadata.customer_id,
+        "profile_ids": metadata.profile_ids,
+        "fetched_at": metadata.fetched_at.isoformat(),
+        "api_key_hash": _key_hash(config),
+    }
+    return connector_state.message(CACHE_STREAM, entry)
@@ -0,0 +1,46 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+
+import json
+from typing import Any, Iterable, List, Mapping, MutableMapping, Sequence
+
+
+def split_metrics(metrics: Sequence[str], group_size: int) -> List[List[str]]:
+    """
+    Split a metric list into consecutive groups of at most `group_size` metrics.
+
+    The order of the metrics is preserved, so the same list always produces the same groups.
+    """
+
+    if group_size < 1:
+        raise ValueError(f"metric group size must be a positive integer, got {group_size}")
+    return [list(metrics[i : i + group_size]) for i in range(0, len(metrics), group_size)]
+
+
+def dimensions_key(row: Mapping[str, Any]) -> str:
+    """
+    Build a hashable key from the `dimensions` object of an analytics row, e.g.
+    {"customer_profile_id": 123, "reporting_period.by(day)": "2023-01-01"}
+    """
+
+    return json.dumps(row.get("dimensions"), sort_keys=True)
+
+
+def merge_metric_groups(partials: Iterable[Iterable[Mapping[str, Any]]]) -> List[MutableMapping[str, Any]]:
+    """
+    Merge the rows returned for each metric group back into one row per `dimensions` key.
+
+    Rows are emitted in the order their key was first seen, and the `metrics` objects of rows
+    sharing a key are combined into one.
+    """
+
+    merged: MutableMapping[str, MutableMapping[str, Any]] = {}
+    for rows in partials:
+        for row in rows:
+            key = dimensions_key(row)
+            if key not in merged:
+                merged[key] = {"dimensions": row.get("dimensions"), "metrics": {}}
+            merged[key]["metrics"].update(row.get("metrics") or {})
+    return list(merged.values())
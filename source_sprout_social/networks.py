@@ -0,0 +1,487 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+# Fields requested from the `analytics/posts` endpoint for every network
+POST_FIELDS = (
+    "customer_profile_id",
+    "created_time",
+    "perma_link",
+    "text",
+    "internal.tags.id",
+    "internal.sent_by.id",
+    "internal.sent_by.email",
+    "internal.sent_by.first_name",
+    "internal.sent_by.last_name",
+)
+
+
+@dataclass(frozen=True)
+class Network:
+    """
+    Describes the analytics available for one Sprout `network_type`.
+
+    `stream_prefix` names the streams built for the network, e.g. `facebook` gives
+    `facebook_profile_analytics` and `facebook_post_analytics`, and the rollups `facebook_profile_analytics_weekly`
+    and `facebook_profile_analytics_monthly`.
+    """
+
+    network_type: str
+    stream_prefix: str
+    profile_metrics: Tuple[str, ...]
+    post_metrics: Tuple[str, ...]
+
+    @property
+    def profile_stream_name(self) -> str:
+        return f"{self.stream_prefix}_profile_analytics"
+
+    @property
+    def post_stream_name(self) -> str:
+        return f"{self.stream_prefix}_post_analytics"
+
+    def rollup_stream_name(self, period: str) -> str:
+        return f"{self.profile_stream_name}_{period}"
+
+
+TIKTOK = Network(
+    network_type="tiktok",
+    stream_prefix="tiktok",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "lifetime_snapshot.followers_by_country",
+        "lifetime_snapshot.followers_by_gender",
+        "lifetime_snapshot.followers_online",
+        "net_follower_growth",
+        "impressions",
+        "profile_views_total",
+        "video_views_total",
+        "comments_count_total",
+        "shares_count_total",
+        "likes_total",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+    ),
+    post_metrics=(
+        "lifetime.likes",
+        "lifetime.reactions",
+        "lifetime.shares_count",
+        "lifetime.comments_count",
+        "lifetime.video_view_time_per_view",
+        "lifetime.video_views_p100_per_view",
+        "lifetime.impression_source_follow",
+        "lifetime.impression_source_for_you",
+        "lifetime.impression_source_hashtag",
+        "lifetime.impression_source_personal_profile",
+        "lifetime.impression_source_sound",
+        "lifetime.impression_source_unspecified",
+        "lifetime.video_view_time",
+        "lifetime.video_views",
+        "lifetime.impressions_unique",
+        "lifetime.impressions",
+        "video_length",
+    ),
+)
+
+FACEBOOK = Network(
+    network_type="facebook",
+    stream_prefix="facebook",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "lifetime_snapshot.followers_by_country",
+        "lifetime_snapshot.followers_by_age_gender",
+        "lifetime_snapshot.followers_by_city",
+        "net_follower_growth",
+        "followers_gained",
+        "followers_gained_organic",
+        "followers_gained_paid",
+        "followers_lost",
+        "impressions",
+        "impressions_organic",
+        "impressions_viral",
+        "impressions_nonviral",
+        "impressions_paid",
+        "tab_views",
+        "tab_views_login",
+        "tab_views_logout",
+        "post_impressions",
+        "post_impressions_organic",
+        "post_impressions_viral",
+        "post_impressions_nonviral",
+        "post_impressions_paid",
+        "impressions_unique",
+        "impressions_organic_unique",
+        "impressions_viral_unique",
+        "impressions_nonviral_unique",
+        "impressions_paid_unique",
+        "profile_views",
+        "profile_views_login",
+        "profile_views_logout",
+        "profile_views_login_unique",
+        "reactions",
+        "comments_count",
+        "shares_count",
+        "post_link_clicks",
+        "post_content_clicks_other",
+        "likes",
+        "reactions_love",
+        "reactions_haha",
+        "reactions_wow",
+        "reactions_sad",
+        "reactions_angry",
+        "post_photo_view_clicks",
+        "post_video_play_clicks",
+        "profile_actions",
+        "post_engagements",
+        "cta_clicks_login",
+        "question_answers",
+        "offer_claims",
+        "positive_feedback_other",
+        "event_rsvps",
+        "place_checkins",
+        "place_checkins_mobile",
+        "profile_content_activity",
+        "negative_feedback",
+        "video_views",
+        "video_views_organic",
+        "video_views_paid",
+        "video_views_autoplay",
+        "video_views_click_to_play",
+        "video_views_repeat",
+        "video_view_time",
+        "video_views_unique",
+        "video_views_30s_complete",
+        "video_views_30s_complete_organic",
+        "video_views_30s_complete_paid",
+        "video_views_30s_complete_autoplay",
+        "video_views_30s_complete_click_to_play",
+        "video_views_30s_complete_unique",
+        "video_views_30s_complete_repeat",
+        "video_views_partial",
+        "video_views_partial_organic",
+        "video_views_partial_paid",
+        "video_views_partial_autoplay",
+        "video_views_partial_click_to_play",
+        "video_views_partial_repeat",
+        "video_views_10s",
+        "video_views_10s_organic",
+        "video_views_10s_paid",
+        "video_views_10s_autoplay",
+        "video_views_10s_click_to_play",
+        "video_views_10s_repeat",
+        "video_views_10s_unique",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+        "posts_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.impressions",
+        "lifetime.impressions_viral",
+        "lifetime.impressions_nonviral",
+        "lifetime.impressions_paid",
+        "lifetime.impressions_follower",
+        "lifetime.impressions_follower_organic",
+        "lifetime.impressions_follower_paid",
+        "lifetime.impressions_nonfollower",
+        "lifetime.impressions_nonfollower_organic",
+        "lifetime.impressions_nonfollower_paid",
+        "lifetime.impressions_unique",
+        "lifetime.impressions_organic_unique",
+        "lifetime.impressions_viral_unique",
+        "lifetime.impressions_nonviral_unique",
+        "lifetime.impressions_paid_unique",
+        "lifetime.impressions_follower_unique",
+        "lifetime.impressions_follower_paid_unique",
+        "lifetime.likes",
+        "lifetime.reactions_love",
+        "lifetime.reactions_haha",
+        "lifetime.reactions_wow",
+        "lifetime.reactions_sad",
+        "lifetime.reactions_angry",
+        "lifetime.shares_count",
+        "lifetime.question_answers",
+        "lifetime.post_content_clicks",
+        "lifetime.post_photo_view_clicks",
+        "lifetime.post_video_play_clicks",
+        "lifetime.post_content_clicks_other",
+        "lifetime.negative_feedback",
+        "lifetime.engagements_unique",
+        "lifetime.engagements_follower_unique",
+        "lifetime.reactions_unique",
+        "lifetime.comments_count_unique",
+        "lifetime.shares_count_unique",
+        "lifetime.question_answers_unique",
+        "lifetime.post_link_clicks_unique",
+        "lifetime.post_content_clicks_unique",
+        "lifetime.post_photo_view_clicks_unique",
+        "lifetime.post_video_play_clicks_unique",
+        "lifetime.post_other_clicks_unique",
+        "lifetime.negative_feedback_unique",
+        "video_length",
+        "lifetime.video_views",
+        "lifetime.video_views_unique",
+        "lifetime.video_views_organic",
+        "lifetime.video_views_organic_unique",
+        "lifetime.video_views_paid",
+        "lifetime.video_views_paid_unique",
+        "lifetime.video_views_autoplay",
+        "lifetime.video_views_click_to_play",
+        "lifetime.video_views_sound_on",
+        "lifetime.video_views_sound_off",
+        "lifetime.video_views_10s",
+        "lifetime.video_views_10s_organic",
+        "lifetime.video_views_10s_paid",
+        "lifetime.video_views_10s_autoplay",
+        "lifetime.video_views_10s_click_to_play",
+        "lifetime.video_views_10s_sound_on",
+        "lifetime.video_views_10s_sound_off",
+        "lifetime.video_views_partial",
+        "lifetime.video_views_partial_organic",
+        "lifetime.video_views_partial_paid",
+        "lifetime.video_views_partial_autoplay",
+        "lifetime.video_views_partial_click_to_play",
+        "lifetime.video_views_30s_complete",
+        "lifetime.video_views_30s_complete_organic",
+        "lifetime.video_views_30s_complete_paid",
+        "lifetime.video_views_30s_complete_autoplay",
+        "lifetime.video_views_30s_complete_click_to_play",
+        "lifetime.video_views_p95",
+        "lifetime.video_views_p95_organic",
+        "lifetime.video_views_p95_paid",
+        "lifetime.video_views_10s_unique",
+        "lifetime.video_views_30s_complete_unique",
+        "lifetime.video_views_p95_paid_unique",
+        "lifetime.video_views_p95_organic_unique",
+        "lifetime.video_view_time_per_view",
+        "lifetime.video_view_time",
+        "lifetime.video_view_time_organic",
+        "lifetime.video_view_time_paid",
+        "lifetime.video_ad_break_impressions",
+        "lifetime.video_ad_break_earnings",
+        "lifetime.video_ad_break_cost_per_impression",
+    ),
+)
+
+INSTAGRAM = Network(
+    network_type="fb_instagram_account",
+    stream_prefix="instagram",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "lifetime_snapshot.followers_by_country",
+        "lifetime_snapshot.followers_by_age_gender",
+        "lifetime_snapshot.followers_by_city",
+        "net_follower_growth",
+        "followers_gained",
+        "followers_lost",
+        "lifetime_snapshot.following_count",
+        "impressions",
+        "impressions_unique",
+        "profile_views_unique",
+        "video_views",
+        "reactions",
+        "comments_count",
+        "shares_count",
+        "likes",
+        "saves",
+        "story_replies",
+        "email_contacts",
+        "get_directions_clicks",
+        "phone_call_clicks",
+        "text_message_clicks",
+        "website_clicks",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+        "posts_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.impressions",
+        "lifetime.impressions_unique",
+        "lifetime.likes",
+        "lifetime.reactions",
+        "lifetime.shares_count",
+        "lifetime.comments_count",
+        "lifetime.saves",
+        "lifetime.story_taps_back",
+        "lifetime.story_taps_forward",
+        "lifetime.story_exits",
+        "lifetime.video_views",
+    ),
+)
+
+TWITTER = Network(
+    network_type="twitter",
+    stream_prefix="twitter",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "net_follower_growth",
+        "impressions",
+        "post_media_views",
+        "video_views",
+        "reactions",
+        "likes",
+        "comments_count",
+        "shares_count",
+        "post_link_clicks",
+        "post_content_clicks",
+        "post_content_clicks_other",
+        "post_media_clicks",
+        "post_hashtag_clicks",
+        "post_detail_expand_clicks",
+        "post_profile_clicks",
+        "engagements_other",
+        "post_app_engagements",
+        "post_app_installs",
+        "post_app_opens",
+        "post_sent_count",
+        "post_sent_by_post_type",
+        "post_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.impressions",
+        "lifetime.post_media_views",
+        "lifetime.video_views",
+        "lifetime.reactions",
+        "lifetime.likes",
+        "lifetime.comments_count",
+        "lifetime.shares_count",
+        "lifetime.post_content_clicks",
+        "lifetime.post_link_clicks",
+        "lifetime.post_content_clicks_other",
+        "lifetime.post_media_clicks",
+        "lifetime.post_hashtag_clicks",
+        "lifetime.post_detail_expand_clicks",
+        "lifetime.post_profile_clicks",
+        "lifetime.engagements_other",
+        "lifetime.post_followers_gained",
+        "lifetime.post_followers_lost",
+        "lifetime.post_app_engagements",
+        "lifetime.post_app_installs",
+        "lifetime.post_app_opens",
+    ),
+)
+
+LINKEDIN = Network(
+    network_type="linkedin_company",
+    stream_prefix="linkedin",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "lifetime_snapshot.followers_by_job_function",
+        "lifetime_snapshot.followers_by_seniority",
+        "net_follower_growth",
+        "followers_gained",
+        "followers_gained_organic",
+        "followers_gained_paid",
+        "followers_lost",
+        "impressions",
+        "impressions_unique",
+        "reactions",
+        "comments_count",
+        "shares_count",
+        "post_content_clicks",
+        "engagements",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+        "posts_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.impressions",
+        "lifetime.impressions_unique",
+        "lifetime.reactions",
+        "lifetime.comments_count",
+        "lifetime.shares_count",
+        "lifetime.post_content_clicks",
+        "lifetime.video_views",
+    ),
+)
+
+YOUTUBE = Network(
+    network_type="youtube",
+    stream_prefix="youtube",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "net_follower_growth",
+        "followers_gained",
+        "followers_lost",
+        "reactions",
+        "likes",
+        "dislikes",
+        "comments_count",
+        "shares_count",
+        "video_views",
+        "video_view_time",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+        "posts_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.video_views",
+        "lifetime.video_view_time",
+        "lifetime.reactions",
+        "lifetime.likes",
+        "lifetime.dislikes",
+        "lifetime.comments_count",
+        "lifetime.shares_count",
+        "lifetime.followers_gained",
+        "lifetime.followers_lost",
+        "video_length",
+    ),
+)
+
+PINTEREST = Network(
+    network_type="pinterest",
+    stream_prefix="pinterest",
+    profile_metrics=(
+        "lifetime_snapshot.followers_count",
+        "net_follower_growth",
+        "followers_gained",
+        "followers_lost",
+        "impressions",
+        "reactions",
+        "comments_count",
+        "saves",
+        "post_link_clicks",
+        "post_content_clicks",
+        "posts_sent_count",
+        "posts_sent_by_post_type",
+        "posts_sent_by_content_type",
+    ),
+    post_metrics=(
+        "lifetime.impressions",
+        "lifetime.reactions",
+        "lifetime.comments_count",
+        "lifetime.saves",
+        "lifetime.post_link_clicks",
+        "lifetime.post_content_clicks",
+        "lifetime.video_views",
+    ),
+)
+
+# Every network type the connector builds analytics streams for, in stream order
+NETWORKS: Mapping[str, Network] = {
+    network.network_type: network for network in (TIKTOK, FACEBOOK, INSTAGRAM, TWITTER, LINKEDIN, YOUTUBE, PINTEREST)
+}
+
+
+def group_profiles_by_network(customer_profiles: Iterable[Mapping[str, Any]]) -> Dict[str, List[int]]:
+    """
+    Group the rows of the `metadata/customer` endpoint by `network_type`, e.g.
+    {"facebook": [123, 456], "fb_instagram_account": [789]}
+
+    Network types with no profile do not appear in the result.
+    """
+
+    profile_ids: Dict[str, List[int]] = {}
+    for profile in customer_profiles:
+        profile_ids.setdefault(profile["network_type"], []).append(profile["customer_profile_id"])
+    return profile_ids
+
+
+def analytics_networks(profile_ids: Mapping[str, List[int]]) -> List[Network]:
+    """
+    Return the networks to build analytics streams for, in stream order: every known network with at least one profile.
+    """
+
+    return [network for network in NETWORKS.values() if profile_ids.get(network.network_type)]
@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+A memory-bounded producer/consumer pipeline between fetching pages and emitting their records.
+
+A producer thread fetches pages ahead of emission and hands them over through a queue bounded by
+`max_buffered_bytes`, the combined size of the raw responses of every page fetched but not yet fully emitted.
+When the budget is used up the producer simply waits until the consumer has emitted a page (backpressure),
+so nothing is ever spilled to disk and the buffered data stays under the cap, plus the one page the producer
+holds while it waits, however slowly stdout is read.
+A single page larger than the cap is still let through once the queue is empty, so the pipeline cannot stall.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# (records of one page, raw size of the page in bytes)
+Page = Tuple[List[Mapping[str, Any]], int]
+
+
+class PipelineStats:
+    def __init__(self):
+        self.pages = 0
+        self.max_queue_depth = 0
+        self.max_buffered_bytes = 0
+        self.producer_wait_seconds = 0.0
+        self.consumer_wait_seconds = 0.0
+
+    def as_dict(self) -> Mapping[str, Any]:
+        return dict(vars(self))
+
+
+class BoundedPagePipeline:
+    def __init__(self, max_buffered_bytes: int, name: str = "pipeline", logger: Optional[logging.Logger] = None):
+        if max_buffered_bytes < 1:
+            raise ValueError(f"max_buffered_bytes must be a positive integer, got {max_buffered_bytes}")
+        self.max_buffered_bytes = max_buffered_bytes
+        self.name = name
+        self.logger = logger or logging.getLogger("airbyte")
+        self.stats = PipelineStats()
+        self._condition = threading.Condition()
+        self._pages: Deque[Page] = deque()
+        self._buffered_bytes = 0
+        self._producer_done = False
+        self._consumer_closed = False
+        self._error: Optional[BaseException] = None
+
+    def run(self, pages: Iterable[Page]) -> Iterator[List[Mapping[str, Any]]]:
+        """
+        Fetch `pages` in a background thread and yield the records of each page in order.
+        """
+
+        producer = threading.Thread(target=self._produce, args=(pages,), name=f"{self.name}-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                with self._condition:
+                    started = time.perf_counter()
+                    while not self._pages and not self._producer_done:
+                        self._condition.wait()
+                    self.stats.consumer_wait_seconds += time.perf_counter() - started
+                    if not self._pages:
+                        break
+                    records, size = self._pages.popleft()
+
+                # the page stays in the budget until all of its records have been emitted
+                yield records
+
+                with self._condition:
+                    self._buffered_bytes -= size
+                    self._condition.notify_all()
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            with self._condition:
+                self._consumer_closed = True
+                self._condition.notify_all()
+            producer.join()
+            self.logger.info(f"Fetch pipeline stats for {self.name}: {self.stats.as_dict()}")
+
+    def _produce(self, pages: Iterable[Page]) -> None:
+        try:
+            for records, size in pages:
+                with self._condition:
+                    started = time.perf_counter()
+                    while not self._consumer_closed and self._buffered_bytes and self._buffered_bytes + size > self.max_buffered_bytes:
+                        self._condition.wait()
+                    self.stats.producer_wait_seconds += time.perf_counter() - started
+                    if self._consumer_closed:
+                        return
+                    self._pages.append((records, size))
+                    self._buffered_bytes += size
+                    self.stats.pages += 1
+                    self.stats.max_queue_depth = max(self.stats.max_queue_depth, len(self._pages))
+                    self.stats.max_buffered_bytes = max(self.stats.max_buffered_bytes, self._buffered_bytes)
+                    self._condition.notify_all()
+        except BaseException as error:
+            self._error = error
+        finally:
+            with self._condition:
+                self._producer_done = True
+                self._condition.notify_all()
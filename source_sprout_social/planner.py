@@ -0,0 +1,248 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+A dry-run planner estimating what a sync will cost before it is run.
+
+    python main.py plan --config secrets/config.json [--catalog integration_tests/configured_catalog.json] [--by-profile]
+
+For every selected stream and slice, the planner runs only the page-count query the analytics streams already send
+before reading, and prints a JSON report of the estimated pages, requests and records, and the expected duration at
+the configured `max_requests_per_second`, `stream_concurrency` and metric group settings. With `--by-profile`, the
+analytics streams are also broken down per profile, at the cost of one more page-count request per profile.
+
+Estimates assume every page is full, so record counts are upper bounds, and that every request takes as long as the
+page-count requests did. Those ask for a single metric, so durations are lower bounds.
+
+The analytics streams are planned the way a read runs them. With `coalesce_networks`, the selected streams of each
+endpoint are planned as the one query they share, listed before them, and each of them costs nothing of its own and
+names it as `coalesced_into`. With `post_window_max_pages`, post queries are planned as the windows their read splits
+them into, with the same page-count queries, paged `post_window_concurrency` at a time. Messages are paged by cursor, with no page count to query, so only their minimum of one request
+per window and profile group is estimated, and their records are left unknown. Rollup streams cost nothing beyond
+their daily stream, which is read once for all of them.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Any, List, Mapping, MutableMapping, Optional, Sequence, TextIO, Tuple
+
+from airbyte_cdk.models import ConfiguredAirbyteCatalog
+from airbyte_cdk.sources.streams import Stream
+
+from .metric_groups import split_metrics
+from .source import (
+    AnalyticsStream,
+    CustomerProfiles,
+    Messages,
+    PostAnalyticsStream,
+    ProfileAnalyticsRollupStream,
+    ProfileAnalyticsStream,
+    SourceSproutSocial,
+    is_preview,
+)
+from .sync_context import SyncContext
+from .throttle import RequestBudget
+
+
+class SyncPlanner:
+    def __init__(self, config: Mapping[str, Any], by_profile: bool = False):
+        self.config = config
+        self.by_profile = by_profile
+        self.planning_requests = 0
+        self.planning_seconds = 0.0
+        self.profile_count = 0
+        self._coalesced_into: MutableMapping[str, str] = {}
+
+    def plan(self, stream_names: Optional[Sequence[str]] = None) -> Mapping[str, Any]:
+        started = time.perf_counter()
+        customer_profiles = CustomerProfiles(config=self.config)
+        customer_id = customer_profiles._get_customer_id()
+        profile_ids = customer_profiles._get_customer_profile_ids()
+        self.planning_requests += 2
+        self.planning_seconds += time.perf_counter() - started
+
+        self.profile_count = sum(len(ids) for ids in profile_ids.values())
+        streams = SourceSproutSocial._build_streams(self.config, customer_id, profile_ids)
+
+        if stream_names is not None:
+            streams = [stream for stream in streams if stream.name in stream_names]
+        # a preview caps each stream on its own, so its queries are not coalesced
+        if self.config.get("coalesce_networks") and not is_preview(self.config):
+            for combined, members in SourceSproutSocial._coalesce_analytics_streams(streams, logging.getLogger("airbyte")).items():
+                streams.insert(streams.index(members[0]), combined)
+                self._coalesced_into.update({member.name: combined.name for member in members})
+        self._planned_streams = streams
+        stream_plans = [self._plan_stream(stream) for stream in streams]
+
+        request_seconds = self.planning_seconds / self.planning_requests
+        for stream_plan in stream_plans:
+            stream_plan["seconds"] = self._seconds(stream_plan["requests"] * request_seconds / stream_plan.pop("parallel_requests"), stream_plan["requests"])
+
+        return {
+            "streams": stream_plans,
+            "total": self._total(stream_plans),
+            "assumptions": {
+                "request_seconds": round(request_seconds, 3),
+                "max_requests_per_second": self.config.get("max_requests_per_second"),
+                "max_concurrent_requests": self.config.get("max_concurrent_requests"),
+                "stream_concurrency": self.config.get("stream_concurrency", 1),
+                "metric_group_size": self.config.get("metric_group_size"),
+                "coalesce_networks": bool(self._coalesced_into),
+                "post_window_max_pages": self.config.get("post_window_max_pages"),
+                "post_window_concurrency": self.config.get("post_window_concurrency", 4),
+            },
+            "planning_requests": self.planning_requests,
+        }
+
+    def _plan_stream(self, stream: Stream) -> MutableMapping[str, Any]:
+        if isinstance(stream, Messages):
+            return self._plan_messages(stream)
+        if isinstance(stream, ProfileAnalyticsRollupStream):
+            return self._plan_rollup(stream)
+        if not isinstance(stream, AnalyticsStream):
+            # metadata endpoints answer in one unpaged request, sent once more by the CDK's availability check
+            records = self.profile_count if isinstance(stream, CustomerProfiles) else None
+            estimate = {"pages": 1, "requests": 2, "records": records}
+            return dict(stream=stream.name, slices=[dict(slice={}, **estimate)], parallel_requests=1, **estimate)
+
+        if stream.name in self._coalesced_into:
+            estimate = {"pages": 0, "requests": 0, "records": None}
+            return dict(stream=stream.name, coalesced_into=self._coalesced_into[stream.name], slices=[dict(slice={}, **estimate)], parallel_requests=1, **estimate)
+
+        groups, parallel_requests = self._metric_groups(stream)
+        endpoint = stream.path(stream_state={})
+        # the CDK's availability check reads the first page once more, except for a shared query, which skips it
+        checked = not stream.combines_networks
+        slice_plan = dict(slice={}, **self._estimate(stream, stream.site_profile_id, endpoint, groups, checked))
+        if isinstance(stream, PostAnalyticsStream) and self.config.get("post_window_max_pages"):
+            return self._plan_post_windows(stream, slice_plan, checked)
+        if self.by_profile:
+            slice_plan["profiles"] = [
+                dict(customer_profile_id=profile_id, **self._estimate(stream, profile_id, endpoint, groups, checked)) for profile_id in stream.profile_ids
+            ]
+        totals = {key: slice_plan[key] for key in ("pages", "requests", "records")}
+        return dict(stream=stream.name, slices=[slice_plan], parallel_requests=parallel_requests, **totals)
+
+    def _plan_post_windows(self, stream: PostAnalyticsStream, whole: Mapping[str, Any], checked: bool) -> MutableMapping[str, Any]:
+        """
+        Plan the windows of a post stream with its own page-count queries, which its read sends again.
+
+        :param whole: the estimate of the whole query, whose records per page the windows are estimated with.
+        """
+
+        # the stream sends the page-count queries itself, counted by the budget
+        budget = RequestBudget()
+        context, stream.sync_context = stream.sync_context, SyncContext(budget=budget)
+        started = time.perf_counter()
+        try:
+            windows = stream._plan_windows(stream.year_ago, stream.yesterday, self.config["post_window_max_pages"])
+        finally:
+            stream.sync_context = context
+        self.planning_requests += budget.requests
+        self.planning_seconds += time.perf_counter() - started
+
+        records_per_page = whole["records"] / whole["pages"] if whole["pages"] else 0
+        slice_plans = [
+            dict(
+                slice={"start": window["start"], "end": window["end"]},
+                pages=window["total_pages"],
+                requests=window["total_pages"],
+                records=round(window["total_pages"] * records_per_page),
+            )
+            for window in windows
+        ]
+        totals = {key: sum(slice_plan[key] for slice_plan in slice_plans) for key in ("pages", "records")}
+        # the windows' page-count queries, then one request per page, plus the first page read by the availability check
+        requests = budget.requests + totals["pages"] + int(checked)
+        parallel_requests = max(1, min(self.config.get("post_window_concurrency", 4), len(windows)))
+        return dict(stream=stream.name, slices=slice_plans, parallel_requests=parallel_requests, requests=requests, **totals)
+
+    def _plan_messages(self, stream: Messages) -> MutableMapping[str, Any]:
+        group_size = self.config.get("messages_profiles_per_query", 50)
+        groups = -(-len(stream.profile_ids) // group_size)
+        slice_plans = [dict(slice=window, pages=groups, requests=groups, records=None) for window in stream.stream_slices()]
+        parallel_requests = max(1, min(self.config.get("messages_concurrency", 4), groups))
+        totals = {key: sum(slice_plan[key] for slice_plan in slice_plans) for key in ("pages", "requests")}
+        return dict(stream=stream.name, slices=slice_plans, parallel_requests=parallel_requests, records=None, **totals)
+
+    def _plan_rollup(self, stream: ProfileAnalyticsRollupStream) -> MutableMapping[str, Any]:
+        """
+        A rollup reads the rows of its daily stream, for free when the daily stream or an earlier rollup is planned too.
+        """
+
+        earlier_streams = self._planned_streams[: self._planned_streams.index(stream)]
+        if any(planned is stream.daily or getattr(planned, "daily", None) is stream.daily for planned in earlier_streams):
+            estimate = {"pages": 0, "requests": 0, "records": None}
+            return dict(stream=stream.name, slices=[dict(slice={}, **estimate)], parallel_requests=1, **estimate)
+        return dict(self._plan_stream(stream.daily), stream=stream.name, records=None)
+
+    def _estimate(self, stream: AnalyticsStream, site_profile_id: Any, endpoint: str, groups: int, checked: bool = True) -> Mapping[str, int]:
+        started = time.perf_counter()
+        first_page = stream._get_first_page(site_profile_id=site_profile_id, endpoint=endpoint)
+        self.planning_requests += 1
+        self.planning_seconds += time.perf_counter() - started
+
+        pages = first_page["paging"]["total_pages"]
+        # one page-count request before reading, then one request per page and metric group,
+        # plus the first page read once more by the CDK's availability check when it is `checked`
+        return {"pages": pages, "requests": 1 + (pages + int(checked)) * groups, "records": pages * len(first_page.get("data") or [])}
+
+    def _metric_groups(self, stream: AnalyticsStream) -> Tuple[int, int]:
+        """
+        :return: the number of requests sent for each page of `stream`, and how many of them are sent at once.
+        """
+
+        group_size = self.config.get("metric_group_size")
+        if not group_size or not isinstance(stream, ProfileAnalyticsStream):
+            return 1, 1
+        groups = len(split_metrics(stream.metrics, group_size))
+        return groups, min(groups, self.config.get("metric_group_concurrency", 4))
+
+    def _seconds(self, seconds: float, requests: int) -> float:
+        rate = self.config.get("max_requests_per_second")
+        if rate:
+            seconds = max(seconds, requests / rate)
+        return round(seconds, 3)
+
+    def _total(self, stream_plans: Sequence[Mapping[str, Any]]) -> Mapping[str, Any]:
+        # plus the customer and profile lookups of the sync itself, and the tag and user lookups of post enrichment
+        requests = 2 + sum(stream_plan["requests"] for stream_plan in stream_plans)
+        if self.config.get("enrich_posts") and any(stream_plan["stream"].endswith("_post_analytics") for stream_plan in stream_plans):
+            requests += 2
+        stream_seconds = [stream_plan["seconds"] for stream_plan in stream_plans] or [0.0]
+        stream_concurrency = max(1, min(self.config.get("stream_concurrency", 1), len(stream_seconds)))
+        # concurrent streams take at least as long as the slowest of them, and share the request budget
+        seconds = max(sum(stream_seconds) / stream_concurrency, max(stream_seconds))
+        return {
+            "pages": sum(stream_plan["pages"] for stream_plan in stream_plans),
+            "requests": requests,
+            "records": sum(stream_plan["records"] or 0 for stream_plan in stream_plans),
+            "seconds": self._seconds(seconds, requests),
+        }
+
+
+def main(args: List[str], output: TextIO = sys.stdout) -> None:
+    parser = argparse.ArgumentParser(prog="plan", description="Estimate the pages, requests, records and duration of a sync.")
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--catalog", help="Only plan the streams of this configured catalog.")
+    parser.add_argument("--by-profile", action="store_true", help="Break the analytics streams down per profile.")
+    parsed_args = parser.parse_args(args)
+
+    with open(parsed_args.config) as config_file:
+        config = json.load(config_file)
+    stream_names = None
+    if parsed_args.catalog:
+        catalog = ConfiguredAirbyteCatalog.parse_file(parsed_args.catalog)
+        stream_names = [configured_stream.stream.name for configured_stream in catalog.streams]
+
+    plan = SyncPlanner(config, by_profile=parsed_args.by_profile).plan(stream_names)
+    json.dump(plan, output, indent=2)
+    output.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,87 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Post-level change data capture.
+
+With `post_change_store_dir` set in the config, each post analytics stream synced in an append mode keeps a SQLite file
+in that directory mapping every `perma_link` it has emitted to an 8 byte hash of the whole post, fields and metrics, and
+only emits the posts that are new or changed since the previous sync. A stream overwriting its destination table emits
+every post and keeps no store, since the posts it left out would be deleted from the destination. Posts are looked up
+and stored a page-sized batch at a time against the primary key index, so memory stays bounded however many posts the
+store holds.
+
+The store is committed once the stream has emitted all of its posts, i.e. during a read once the stream's records
+have reached the caller; a failed or interrupted sync leaves it as it was, and the same posts are emitted again by the
+next one. Streams coalesced into one query each keep their own store, the shared query none. The directory must persist
+between syncs, e.g. on a mounted volume.
+"""
+
+import os
+import sqlite3
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping
+
+from .change_detection import content_hash
+
+BATCH_SIZE = 500
+
+
+class PostHashStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        # a stream's read can be resumed from another thread than the one it started in
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS post_content_hashes (perma_link TEXT PRIMARY KEY, content_hash BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.seen = 0
+        self.changed = 0
+
+    def changed_posts(self, rows: Iterable[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+        """
+        Yield the rows that are new or changed, and record their new hashes.
+        Rows without a `perma_link` are always yielded.
+        """
+
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                return
+            yield from self._changed_in_batch(batch)
+
+    def _changed_in_batch(self, batch: List[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+        hashes = {row["perma_link"]: bytes.fromhex(content_hash(row)) for row in batch if row.get("perma_link")}
+        placeholders = ",".join("?" * len(hashes))
+        stored = dict(
+            self._connection.execute(f"SELECT perma_link, content_hash FROM post_content_hashes WHERE perma_link IN ({placeholders})", list(hashes))
+        )
+
+        updates = []
+        for row in batch:
+            perma_link = row.get("perma_link")
+            self.seen += 1
+            if perma_link and stored.get(perma_link) == hashes[perma_link]:
+                continue
+            if perma_link:
+                updates.append((perma_link, hashes[perma_link]))
+                # a post repeated within the batch is only emitted once
+                stored[perma_link] = hashes[perma_link]
+            self.changed += 1
+            yield row
+        self._connection.executemany("INSERT OR REPLACE INTO post_content_hashes (perma_link, content_hash) VALUES (?, ?)", updates)
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Close the store, discarding whatever was not committed.
+        """
+
+        self._connection.close()
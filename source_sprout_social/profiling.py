@@ -0,0 +1,78 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Opt-in profiling of a sync.
+
+Profiling is switched on by setting `profiling_dir` in the config or the `SPROUT_SOCIAL_PROFILING_DIR`
+environment variable to a local directory. Each profiled `read` then writes two files there:
+
+- `sync-<timestamp>.prof`: a cProfile dump of the main thread, readable with `pstats`, `snakeviz` or
+  converted to a flamegraph with `flameprof`;
+- `sync-<timestamp>-phases.json`: the wall-clock time and call count of each phase of each stream
+  (metadata lookups, page counting, HTTP waits, JSON parsing and record emission).
+
+The profiler is held by the `sync_context.SyncContext` of the read, which streams time their phases through.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator, Mapping, MutableMapping, Optional
+
+PROFILING_DIR_ENV = "SPROUT_SOCIAL_PROFILING_DIR"
+
+
+class SyncProfiler:
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.phases: MutableMapping[str, MutableMapping[str, MutableMapping[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._profile = cProfile.Profile()
+        self._started = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> Optional["SyncProfiler"]:
+        output_dir = config.get("profiling_dir") or os.environ.get(PROFILING_DIR_ENV)
+        return cls(output_dir) if output_dir else None
+
+    def record(self, stream: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.phases.setdefault(stream, {}).setdefault(phase, {"seconds": 0.0, "calls": 0})
+            timing["seconds"] += seconds
+            timing["calls"] += 1
+
+    @contextmanager
+    def phase(self, stream: str, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as phase `name` of `stream`.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stream, name, time.perf_counter() - started)
+
+    def __enter__(self) -> "SyncProfiler":
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._profile.disable()
+        self.write(total_seconds=time.perf_counter() - self._started)
+
+    def write(self, total_seconds: float) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"sync-{datetime.now().strftime('%Y%m%dT%H%M%S')}")
+        self._profile.dump_stats(f"{prefix}.prof")
+        with open(f"{prefix}-phases.json", "w") as summary:
+            json.dump({"total_seconds": total_seconds, "streams": self.phases}, summary, indent=2, sort_keys=True)
+        return prefix
+
@@ -0,0 +1,208 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Weekly and monthly rollups of the daily profile analytics rows.
+
+With `profile_rollups` set in the config, e.g. `["weekly", "monthly"]`, every network with profile analytics gets a
+`<network>_profile_analytics_weekly` / `_monthly` stream, computed in the connector from the daily rows the sync reads.
+Each metric is rolled up according to its kind:
+
+- `lifetime_snapshot.*` metrics are snapshots, and take the last value of the period, maps included;
+- metrics whose values are maps, e.g. `posts_sent_by_post_type`, are merged, summing the values of each key;
+- `*_unique` metrics cannot be added up across days, and are left out;
+- every other metric is summed over the days of the period.
+
+A period holds the days of one profile from its Monday (weekly) or its first day (monthly), and `days` tells how many
+daily rows it was built from, so partial periods at the ends of the reporting window can be told apart.
+
+The rows of every profile are sorted once, and the summed and last-value metrics are aggregated as columns of one
+matrix with `numpy.add.reduceat` / `numpy.maximum.reduceat` over the period boundaries when `numpy` is installed
+(`pip install '.[rollups]'`), or with plain loops giving the same result otherwise.
+"""
+
+import threading
+from datetime import date, timedelta
+from typing import Any, Callable, Iterable, List, Mapping, MutableMapping, Optional, Sequence
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+# the period unit of each rollup, as named in the `reporting_period.by(<unit>)` dimension of its rows
+PERIODS: Mapping[str, str] = {"weekly": "week", "monthly": "month"}
+DAY_DIMENSION = "reporting_period.by(day)"
+PROFILE_DIMENSION = "customer_profile_id"
+
+SUM = "sum"
+LAST = "last"
+MERGE = "merge"
+
+
+def period_start(day: date, period: str) -> date:
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    if period == "monthly":
+        return day.replace(day=1)
+    raise ValueError(f"rollup period must be one of {', '.join(PERIODS)}, got {period}")
+
+
+def metric_kind(metric: str, values: Iterable[Any]) -> Optional[str]:
+    """
+    :return: how `metric` is rolled up given its daily `values`, or None when it cannot be.
+    """
+
+    if metric.startswith("lifetime_snapshot."):
+        return LAST
+    if metric.endswith("_unique"):
+        return None
+    if any(isinstance(value, Mapping) for value in values):
+        return MERGE
+    return SUM
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _plain(value: float) -> Any:
+    return int(value) if value.is_integer() else value
+
+
+def roll_up(rows: Iterable[Mapping[str, Any]], period: str) -> List[MutableMapping[str, Any]]:
+    """
+    :return: one row per profile and `period` of the daily profile analytics `rows`, ordered by profile and period.
+    """
+
+    unit = PERIODS[period]
+    days = []
+    for row in rows:
+        dimensions = row.get("dimensions") or {}
+        day = dimensions.get(DAY_DIMENSION)
+        if day:
+            days.append((str(dimensions.get(PROFILE_DIMENSION)), date.fromisoformat(day[:10]), row))
+    if not days:
+        return []
+    days.sort(key=lambda item: item[:2])
+
+    keys = [(profile, period_start(day, period)) for profile, day, _ in days]
+    starts = [index for index, key in enumerate(keys) if index == 0 or key != keys[index - 1]]
+    ends = starts[1:] + [len(keys)]
+    daily_metrics = [row.get("metrics") or {} for _, _, row in days]
+    metrics = list(dict.fromkeys(metric for row_metrics in daily_metrics for metric in row_metrics))
+    kinds = {metric: metric_kind(metric, (row_metrics.get(metric) for row_metrics in daily_metrics)) for metric in metrics}
+
+    sum_metrics = [metric for metric in metrics if kinds[metric] == SUM]
+    sums = _sum_columns([[_number(row_metrics.get(metric)) for metric in sum_metrics] for row_metrics in daily_metrics], starts)
+    last_metrics = [metric for metric in metrics if kinds[metric] == LAST]
+    last_rows = _last_present([[row_metrics.get(metric) is not None for metric in last_metrics] for row_metrics in daily_metrics], starts)
+    merge_metrics = [metric for metric in metrics if kinds[metric] == MERGE]
+
+    rolled_up = []
+    for group, (start, end) in enumerate(zip(starts, ends)):
+        group_metrics = {}
+        for column, metric in enumerate(sum_metrics):
+            if sums[group][column] is not None:
+                group_metrics[metric] = _plain(sums[group][column])
+        for column, metric in enumerate(last_metrics):
+            if last_rows[group][column] >= 0:
+                group_metrics[metric] = daily_metrics[last_rows[group][column]][metric]
+        for metric in merge_metrics:
+            merged = _merge_maps(daily_metrics[index].get(metric) for index in range(start, end))
+            if merged is not None:
+                group_metrics[metric] = merged
+        dimensions = days[start][2]["dimensions"]
+        rolled_up.append(
+            {
+                "dimensions": {PROFILE_DIMENSION: dimensions.get(PROFILE_DIMENSION), f"reporting_period.by({unit})": keys[start][1].isoformat()},
+                "metrics": group_metrics,
+                "days": end - start,
+            }
+        )
+    return rolled_up
+
+
+def _sum_columns(values: Sequence[Sequence[Optional[float]]], starts: Sequence[int]) -> List[List[Optional[float]]]:
+    """
+    :return: the sum of each column over the rows of each group starting at `starts`, or None where it has no value.
+    """
+
+    columns = len(values[0])
+    if numpy is not None and columns:
+        matrix = numpy.array(values, dtype=float)
+        present = ~numpy.isnan(matrix)
+        sums = numpy.add.reduceat(numpy.where(present, matrix, 0.0), starts, axis=0)
+        counts = numpy.add.reduceat(present.astype(numpy.int64), starts, axis=0)
+        return [[float(total) if count else None for total, count in zip(group_sums, group_counts)] for group_sums, group_counts in zip(sums, counts)]
+
+    ends = list(starts[1:]) + [len(values)]
+    result = []
+    for start, end in zip(starts, ends):
+        group = []
+        for column in range(columns):
+            present = [values[index][column] for index in range(start, end) if values[index][column] is not None]
+            group.append(sum(present) if present else None)
+        result.append(group)
+    return result
+
+
+def _last_present(present: Sequence[Sequence[bool]], starts: Sequence[int]) -> List[List[int]]:
+    """
+    :return: the index of the last row of each group where each column is present, or -1 where it never is.
+    """
+
+    columns = len(present[0])
+    if numpy is not None and columns:
+        indexes = numpy.where(numpy.array(present, dtype=bool), numpy.arange(len(present))[:, None], -1)
+        return numpy.maximum.reduceat(indexes, starts, axis=0).tolist()
+
+    ends = list(starts[1:]) + [len(present)]
+    return [
+        [max((index for index in range(start, end) if present[index][column]), default=-1) for column in range(columns)]
+        for start, end in zip(starts, ends)
+    ]
+
+
+def _merge_maps(maps: Iterable[Any]) -> Optional[MutableMapping[str, Any]]:
+    """
+    Merge the daily maps of one metric, summing numeric values key by key; other values keep their last one.
+    """
+
+    merged: Optional[MutableMapping[str, Any]] = None
+    for value in maps:
+        if not isinstance(value, Mapping):
+            continue
+        merged = {} if merged is None else merged
+        for key, item in value.items():
+            number, total = _number(item), _number(merged.get(key))
+            if number is not None and (total is not None or key not in merged):
+                merged[key] = _plain((total or 0.0) + number)
+            else:
+                merged[key] = item
+    return merged
+
+
+class DailyRows:
+    """
+    The daily rows of one profile analytics stream, read once per sync and shared by the stream and its rollups.
+
+    The rows are held in memory until the end of the read.
+    """
+
+    def __init__(self, read_rows: Callable[[], Iterable[Mapping[str, Any]]]):
+        self.read_rows = read_rows
+        self._rows: Optional[List[Mapping[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def rows(self) -> List[Mapping[str, Any]]:
+        with self._lock:
+            if self._rows is None:
+                self._rows = list(self.read_rows())
+            return self._rows
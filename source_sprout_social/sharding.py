@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Horizontal sharding of one account across several connector instances.
+
+With `shard_count` and `shard_index` set in the config, each instance (one Airbyte connection per shard) only builds
+analytics streams over its share of the customer's profiles. A profile belongs to shard
+`crc32("<customer_id>:<profile_id>") % shard_count`, so the split is deterministic, the shards never overlap, and
+adding a profile never moves the others. The customer-level metadata streams are only built on shard 0.
+
+Each shard is its own connection with its own state, and local stores are named after the shard, so shards never
+share state even when they run on the same node.
+"""
+
+import zlib
+from typing import Any, Dict, List, Mapping
+
+
+def validate(config: Mapping[str, Any]) -> None:
+    """
+    Check the shard settings of `config`, if any; an unsharded config has nothing to check.
+    """
+
+    if "shard_count" not in config and "shard_index" not in config:
+        return
+    shard_count = config.get("shard_count", 1)
+    shard_index = config.get("shard_index", 0)
+    if shard_count < 1:
+        raise ValueError(f"shard_count must be a positive integer, got {shard_count}")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be between 0 and shard_count - 1 ({shard_count - 1}), got {shard_index}")
+
+
+def is_sharded(config: Mapping[str, Any]) -> bool:
+    return config.get("shard_count", 1) > 1
+
+
+def is_primary_shard(config: Mapping[str, Any]) -> bool:
+    """
+    Whether this instance reads the customer-level metadata streams.
+    """
+
+    return config.get("shard_index", 0) == 0
+
+
+def shard_of(customer_id: Any, profile_id: Any, shard_count: int) -> int:
+    return zlib.crc32(f"{customer_id}:{profile_id}".encode()) % shard_count
+
+
+def shard_profile_ids(config: Mapping[str, Any], customer_id: Any, profile_ids: Mapping[str, List[int]]) -> Dict[str, List[int]]:
+    """
+    Keep the profile IDs of each network that belong to this instance's shard. Networks left without a profile are dropped.
+    """
+
+    if not is_sharded(config):
+        return dict(profile_ids)
+    shard_count, shard_index = config["shard_count"], config.get("shard_index", 0)
+    sharded = {
+        network_type: [profile_id for profile_id in ids if shard_of(customer_id, profile_id, shard_count) == shard_index]
+        for network_type, ids in profile_ids.items()
+    }
+    return {network_type: ids for network_type, ids in sharded.items() if ids}
+
+
+def shard_suffix(config: Mapping[str, Any]) -> str:
+    """
+    A suffix for the names of local stores, e.g. `-shard2of4`, empty when the account is not sharded.
+    """
+
+    if not is_sharded(config):
+        return ""
+    return f"-shard{config.get('shard_index', 0)}of{config['shard_count']}"
@@ -3,19 +3,76 @@
 #
 
 
-from abc import ABC
-from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Tuple
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Tuple
 
 import requests
+from airbyte_cdk.models import (
+    AirbyteMessage,
+    AirbyteStreamStatus,
+    ConfiguredAirbyteCatalog,
+    ConnectorSpecification,
+    DestinationSyncMode,
+    FailureType,
+    SyncMode,
+    TraceType,
+    Type,
+)
 from airbyte_cdk.sources import AbstractSource
-from airbyte_cdk.sources.streams import Stream
+from airbyte_cdk.sources.streams import IncrementalMixin, Stream
+from airbyte_cdk.sources.streams.availability_strategy import AvailabilityStrategy
 from airbyte_cdk.sources.streams.http import HttpStream
 from airbyte_cdk.sources.streams.http.auth import TokenAuthenticator
+from airbyte_cdk.sources.streams.http.exceptions import UserDefinedBackoffException
+from airbyte_cdk.sources.streams.http.rate_limiting import TRANSIENT_EXCEPTIONS
+from airbyte_cdk.utils.traced_exception import AirbyteTracedException
 from urllib.parse import parse_qsl, urlparse
 import json
-from datetime import date
+from datetime import date, datetime, timezone
 from datetime import timedelta
 
+from . import api, deadlines, filters, metadata_cache, rollups, sharding
+from .bundle import load_bundle
+from .change_detection import CURSOR_FIELD, DELETED_AT_FIELD, ChangeTracker
+from .coalesce import CoalescedRead, combined_network
+from .concurrency import interleave
+from .enrichment import LookupIndexes
+from .metric_groups import merge_metric_groups, split_metrics
+from .networks import NETWORKS, POST_FIELDS, Network, analytics_networks, group_profiles_by_network
+from .pipeline import BoundedPagePipeline, Page
+from .post_changes import PostHashStore
+from .sync_context import IDLE, SyncContext
+
+logger = logging.getLogger("airbyte")
+
+# the errors the CDK retries a request after
+RETRYABLE_EXCEPTIONS = TRANSIENT_EXCEPTIONS + (UserDefinedBackoffException,)
+
+
+def completed_stream(message: AirbyteMessage) -> Optional[str]:
+    """
+    :return: the name of the stream whose read `message` reports as complete, if it does.
+    """
+
+    if message.type != Type.TRACE or message.trace.type != TraceType.STREAM_STATUS:
+        return None
+    status = message.trace.stream_status
+    return status.stream_descriptor.name if status.status == AirbyteStreamStatus.COMPLETE else None
+
+
+def is_preview(config: Mapping[str, Any]) -> bool:
+    """
+    Whether the sync only reads the first pages or records of each stream, for development and smoke checks.
+    """
+
+    return bool(config.get("preview_max_pages") or config.get("preview_max_records"))
+
 
 # Basic full refresh stream
 class SproutSocialStream(HttpStream, ABC):
@@ -23,31 +80,47 @@ class SproutSocialStream(HttpStream, ABC):
     Parent class extended by all stream-specific classes
     """
 
-    url_base = "https://api.sproutsocial.com/v1/"
+    url_base = api.API_URL
+    endpoint_kind = deadlines.METADATA
+    # whether the stream's requests are tuned by the adaptive concurrency controller
+    concurrency_tuned = False
+    # the state of the read the stream is built for, see `sync_context`
+    sync_context: SyncContext = IDLE
 
-    def __init__(self, config, **kwargs):
+    def __init__(self, config, customer_id=None, **kwargs):
         super().__init__(**kwargs)
         self.config = config
-        self.url_base = "https://api.sproutsocial.com/v1/"
+        self._customer_id = customer_id
         self.current_date = date.today()
         self.yesterday = self.current_date - timedelta(days = 1)
         self.year_ago = self.yesterday - timedelta(days = 365)
         self.page = 1
         self.total_pages = 1 # overridden in child classes with pagination
+        self._attempts = threading.local()
 
-    def _get_total_pages(self, platform_name, endpoint):
+    def _get_total_pages(self, site_profile_id, endpoint):
         """
         This method is used to get the total number of pages for a given endpoint.
         """
 
-        site_profile_id = self._get_customer_profile_ids()[platform_name]
+        return self._get_first_page(site_profile_id, endpoint)['paging']['total_pages']
+
+    def _get_first_page(self, site_profile_id, endpoint, start: Optional[date] = None, end: Optional[date] = None):
+        """
+        Request the first page of a cheap version of the endpoint's query, whose `paging` holds the page count.
+
+        Post queries can be limited to the days from `start` to `end`, which default to `year_ago` and `yesterday`, and
+        carry the stream's `extra_filters`, so the page count matches the query that is read.
+        """
+
         url = self.url_base + endpoint
         headers = {"Authorization": f"Bearer {self.config['api_key']}", "Content-type": "application/json"}
         if "posts" in endpoint:
             get_page_count = {
               "filters": [
                 f"customer_profile_id.eq({site_profile_id})",
-                f"created_time.in({self.year_ago}T00:00:00..{self.yesterday}T23:59:59)"
+                f"created_time.in({start or self.year_ago}T00:00:00..{end or self.yesterday}T23:59:59)",
+                *self.extra_filters(),
               ],
               "page": 1
             }
@@ -57,14 +130,33 @@ class SproutSocialStream(HttpStream, ABC):
                 f"customer_profile_id.eq({site_profile_id})",
                 f"reporting_period.in({self.year_ago}...{self.yesterday})"
               ],
+              # any metric of the network pages the same, and not every network has impressions
               "metrics": [
-                "impressions"
+                self.network.profile_metrics[0]
               ],
               "page": 1
             }
         data = json.dumps(get_page_count)
-        total_pages = requests.post(url=url, data=data, headers=headers).json()['paging']['total_pages']
-        return total_pages
+        with self.sync_context.phase(self.name, "page_count"), self.sync_context.request_slot(tuned=self.concurrency_tuned):
+            with self.sync_context.timed_request():
+                response = requests.post(url=url, data=data, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+        return response.json()
+
+    def extra_filters(self) -> List[str]:
+        """
+        Filters pushed down into the stream's queries besides the profiles and dates, see `filters`.
+        """
+
+        return []
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """
+        The `(connect, read)` deadline of this stream's requests, see `deadlines`.
+        """
+
+        return deadlines.timeout(self.config, self.endpoint_kind)
 
     def _get_customer_id(self):
         """
@@ -75,60 +167,34 @@ class SproutSocialStream(HttpStream, ABC):
         customer_id = self._get_customer_id()
         endpoint = f"{customer_id}/metadata/customer"
 
+        The customer ID is looked up once per stream, or not at all when it was passed to the constructor.
         """
 
-        client_metadata_endpoint = "metadata/client"
-        client_metadata_url = self.url_base + client_metadata_endpoint
-        headers = {"Authorization": f"Bearer {self.config['api_key']}" }
-        customer_id = requests.get(client_metadata_url, headers=headers).json()["data"][0]["customer_id"]
+        if self._customer_id is None:
+            with self.sync_context.phase(self.name, "metadata"):
+                self._customer_id = api.get_customer_id(self.config["api_key"], url_base=self.url_base, timeout=self.timeout)
 
-        return customer_id
+        return self._customer_id
 
     def _get_customer_profile_ids(self):
         """
-        Given an API key, and customer_id, make a request to the CustomerProfiles endpoint to return the Customer ID. This is required for all `analytics` endpoints .
+        Given an API key, and customer_id, make a request to the CustomerProfiles endpoint to return the profile IDs of every network. This is required for all `analytics` endpoints.
 
-        This method can be called in streams that require a customer_profile_id, for example when creating a {SocialMediaSite}ProfileAnalytics stream:
+        The result maps each `network_type` that has at least one profile to the list of its profile IDs, e.g.
 
-        Since this method returns a dictionary, take care to utilize the key when calling it in subsequent functions.
-
-        e.g.
-        site_profile_id = self._get_customer_profile_ids()[{site}]
+        {"facebook": [123, 456], "fb_instagram_account": [789]}
 
+        Network types without any profile are left out, so no analytics stream is built for them. With `filter_groups`
+        set in the config, only the profiles of those groups are kept, see `filters`.
         """
         # Retreive CustomerProfile endpoint
         customer_id = self._get_customer_id()
-        customer_profile_endpoint = f"{customer_id}/metadata/customer"
-        customer_profile_url = self.url_base + customer_profile_endpoint
-        headers = {"Authorization": f"Bearer {self.config['api_key']}" }
-        customer_profiles = requests.get(customer_profile_url, headers=headers).json()["data"]
-
-        # Create lists of every site's profile ids and create dict and add list of ids to dict   
-        facebook_list = []
-        instagram_list = []
-        tiktok_list = []
-        twitter_list = []
-        customer_profile_ids = {}
-        for i in range(len(customer_profiles)-1):
-            if customer_profiles[i]["network_type"] == "facebook":
-                facebook_list.append(customer_profiles[i]["customer_profile_id"])
-            elif customer_profiles[i]["network_type"] == "tiktok":
-                tiktok_list.append(customer_profiles[i]["customer_profile_id"])
-            elif customer_profiles[i]["network_type"] == "fb_instagram_account":
-                instagram_list.append(customer_profiles[i]["customer_profile_id"])
-            elif customer_profiles[i]["network_type"] == "twitter":
-                twitter_list.append(customer_profiles[i]["customer_profile_id"])
-
-        customer_profile_ids["tiktok"] = tiktok_list
-        customer_profile_ids["facebook"] = facebook_list
-        customer_profile_ids["instagram"] = instagram_list
-        customer_profile_ids["twitter"] = twitter_list
-
-        # Convert lists to strings
-        for list in customer_profile_ids:
-            customer_profile_ids[list] = ','.join([str(element) for element in customer_profile_ids[list]])
-
-        return customer_profile_ids
+        with self.sync_context.phase(self.name, "metadata"):
+            customer_profiles = api.get_customer_profiles(self.config["api_key"], customer_id, url_base=self.url_base, timeout=self.timeout)
+            group_ids = filters.group_ids(self.config, customer_id, url_base=self.url_base, timeout=self.timeout)
+        customer_profiles = filters.in_groups(customer_profiles, group_ids)
+
+        return group_profiles_by_network(customer_profiles)
 
     def request_headers(
         self,
@@ -143,8 +209,13 @@ class SproutSocialStream(HttpStream, ABC):
     ):
         """
         Pagination for all endpoints is achieved by incrementing the value of `page` in the request body.
+
+        In preview mode, pagination stops after `preview_max_pages` pages.
         """
 
+        max_pages = self.config.get("preview_max_pages")
+        if max_pages and self.page >= max_pages:
+            return None
         if self.page < self.total_pages:
             self.page += 1
             return {"page": self.page}
@@ -161,12 +232,120 @@ class SproutSocialStream(HttpStream, ABC):
             params.update(**next_page_token)
         return params
 
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        """
+        When `max_buffered_bytes` is set in the config, pages are fetched ahead of emission in a background thread,
+        through a `pipeline.BoundedPagePipeline` that never holds more than that many bytes of responses.
+
+        In preview mode, reading stops after `preview_max_records` records.
+        """
+
+        pages = self._read_record_pages(stream_slice=stream_slice, stream_state=stream_state or {})
+        max_records = self.config.get("preview_max_records")
+        if max_records:
+            pages = self._pages_up_to(pages, max_records)
+        max_buffered_bytes = self.config.get("max_buffered_bytes")
+        if max_buffered_bytes:
+            pages = ((records, 0) for records in BoundedPagePipeline(max_buffered_bytes, name=self.name, logger=self.logger).run(pages))
+        records = (record for page_records, _ in pages for record in page_records)
+        yield from islice(records, max_records)
+
+    @staticmethod
+    def _pages_up_to(pages: Iterable[Page], max_records: int) -> Iterable[Page]:
+        """
+        Stop fetching once the pages hold `max_records` records, so a page pipeline does not prefetch past them.
+        """
+
+        fetched = 0
+        for page in pages:
+            yield page
+            fetched += len(page[0])
+            if fetched >= max_records:
+                return
+
+    @property
+    def preview(self) -> bool:
+        return is_preview(self.config)
+
+    def _read_record_pages(self, stream_slice: Mapping[str, Any] = None, stream_state: Mapping[str, Any] = None) -> Iterable[Page]:
+        """
+        :return: the records of each page, along with the size of the response they were parsed from.
+        """
+
+        next_page_token = None
+        while True:
+            request, response = self._fetch_next_page(stream_slice, stream_state, next_page_token)
+            yield list(self.parse_response(response, stream_slice=stream_slice, stream_state=stream_state)), len(response.content)
+
+            next_page_token = self.next_page_token(response)
+            if not next_page_token:
+                break
+
+    def get_json_schema(self) -> Mapping[str, Any]:
+        """
+        Schemas come from the precompiled bundle when it was built, instead of one schema file per stream.
+        """
+
+        bundled_stream = (load_bundle() or {}).get("streams", {}).get(self.name)
+        if bundled_stream:
+            return bundled_stream["json_schema"]
+        return super().get_json_schema()
+
+    def request_kwargs(self, **kwargs) -> Mapping[str, Any]:
+        return {"timeout": self.timeout}
+
+    def _send_request(self, request: requests.PreparedRequest, request_kwargs: Mapping[str, Any]) -> requests.Response:
+        """
+        The CDK's retry loop, which calls `_send` for each attempt. The attempts of the request in flight on each thread
+        are counted in `_attempts`.
+        """
+
+        self._attempts.count = 0
+        self._attempts.backing_off = False
+        try:
+            with self.sync_context.phase(self.name, "http"):
+                return super()._send_request(request, request_kwargs)
+        finally:
+            if self._attempts.backing_off:
+                self.sync_context.backoff_ended(self.name)
+
+    def _send(self, request: requests.PreparedRequest, request_kwargs: Mapping[str, Any]) -> requests.Response:
+        """
+        One attempt of the CDK's retry loop. When the sync hedges requests, first attempts are hedged on their own, and
+        from an attempt failing with a retryable error until the request is done, the stream counts as backing off.
+        """
+
+        self._attempts.count += 1
+        try:
+            return self.sync_context.send(self.name, partial(self._send_attempt, request, request_kwargs), retry=self._attempts.count > 1)
+        except RETRYABLE_EXCEPTIONS:
+            if not self._attempts.backing_off:
+                self._attempts.backing_off = True
+                self.sync_context.backoff_started(self.name)
+            raise
+
+    def _send_attempt(self, request: requests.PreparedRequest, request_kwargs: Mapping[str, Any]) -> requests.Response:
+        """
+        Every attempt, retries and hedges included, waits for its own slot of the request budget, and of the
+        concurrency controller when the stream is `concurrency_tuned`, so backoff sleeps hold no slot.
+        """
+
+        with self.sync_context.request_slot(tuned=self.concurrency_tuned):
+            return super()._send(request, request_kwargs)
+
     def parse_response(self, response: requests.Response, **kwargs) -> Iterable[Mapping]:
         """
         :return an iterable containing each record in the response
         """
 
-        response_json = response.json()["data"]
+        with self.sync_context.phase(self.name, "parse"):
+            response_json = response.json()["data"]
         yield from response_json
 
 
@@ -186,7 +365,58 @@ class ClientMetadata(SproutSocialStream):
         endpoint = "metadata/client"
         return endpoint
     
-class CustomerProfiles(SproutSocialStream):
+class MetadataStream(SproutSocialStream, IncrementalMixin, ABC):
+    """
+    Parent class of the customer metadata streams, which rarely change between syncs.
+
+    Every record gets the sync time as `_ab_cdc_updated_at`, the stream's cursor. In incremental mode the stream keeps
+    a content hash of each record in its state, keyed by primary key, and only emits the records that are new or
+    changed since the previous sync. With `metadata_tombstones` set in the config, records that are gone from the
+    API are emitted once more as a tombstone holding only their primary key and `_ab_cdc_deleted_at`.
+    """
+
+    cursor_field = CURSOR_FIELD
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._state = {}
+
+    @property
+    def state(self) -> MutableMapping[str, Any]:
+        return self._state
+
+    @state.setter
+    def state(self, value: MutableMapping[str, Any]):
+        self._state = value or {}
+
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        synced_at = datetime.now(timezone.utc).isoformat()
+        incremental = sync_mode == SyncMode.incremental
+        tracker = ChangeTracker(self._state.get("hashes"))
+
+        for record in super().read_records(sync_mode, cursor_field=cursor_field, stream_slice=stream_slice, stream_state=stream_state):
+            changed = tracker.observe(record.get(self.primary_key), record)
+            if changed or not incremental:
+                yield dict(record, **{CURSOR_FIELD: synced_at})
+
+        if self.preview:
+            # a preview only sees part of the records, so it can neither tell deletions apart nor replace the state
+            return
+
+        if incremental and self.config.get("metadata_tombstones"):
+            for key in tracker.deleted_keys():
+                yield {self.primary_key: key, CURSOR_FIELD: synced_at, DELETED_AT_FIELD: synced_at}
+
+        self._state = {"hashes": tracker.hashes}
+
+
+class CustomerProfiles(MetadataStream):
     primary_key = "customer_profile_id"
 
     """This endpoint retrieves data from the `{customer_id}/metadata/customer` endpoint as a get request.   
@@ -205,7 +435,7 @@ class CustomerProfiles(SproutSocialStream):
         
         return endpoint
     
-class CustomerTags(SproutSocialStream):
+class CustomerTags(MetadataStream):
     primary_key = "tag_id"
 
     """This endpoint retrieves data from the `{customer_id}/metadata/customer/tags` endpoint as a get request.   
@@ -224,7 +454,7 @@ class CustomerTags(SproutSocialStream):
 
         return endpoint
     
-class CustomerGroups(SproutSocialStream):
+class CustomerGroups(MetadataStream):
     primary_key = "group_id"
 
     """This endpoint retrieves data from the `{customer_id}/metadata/customer/groups` endpoint as a get request.   
@@ -244,7 +474,7 @@ class CustomerGroups(SproutSocialStream):
 
         return endpoint
     
-class CustomerUsers(SproutSocialStream):
+class CustomerUsers(MetadataStream):
     primary_key = "id"
 
     """This endpoint retrieves data from the `{customer_id}/metadata/customer/users` endpoint as a get request.   
@@ -262,557 +492,570 @@ class CustomerUsers(SproutSocialStream):
         endpoint = f"{customer_id}/metadata/customer/users"
 
         return endpoint
-    
-class TiktokProfileAnalytics(SproutSocialStream):
-    primary_key = "dimensions"
+
+
+class AnalyticsStream(SproutSocialStream, ABC):
+    """
+    Parent class for the analytics streams, built once for every network that has at least one profile.
+
+    The stream name, metrics and profile filter all come from the `Network` it is built for, so supporting a new
+    `network_type` only needs a new entry in `networks.NETWORKS` and a schema file.
+
+    When the stream is given a `coalesce.CoalescedRead`, its rows come from the query shared with the other networks
+    instead, keeping only the metrics of its own network.
+
+    A query over several profiles fails as a whole when one of them is disconnected or unauthorized. When the read is
+    rejected that way before any record is emitted, the profile list is bisected with page-count queries to isolate the
+    rejected profiles, which are logged and left out, and the stream is read again over the others.
+    """
+
     http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/profiles` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]     
-     """
-    
-    def __init__(self, **kwargs):
+    endpoint = None
+    concurrency_tuned = True
+    coalesced_read: Optional[CoalescedRead] = None
+    # set on the stream that runs the query a `coalesce.CoalescedRead` shares between the streams of several networks
+    combines_networks = False
+    # set when a request of the stream was rejected in a way a removed profile would cause, see `metadata_cache`
+    profiles_rejected = False
+    # the page-count queries isolating rejected profiles may send before the stream gives up with the rejection
+    max_bisection_requests = 32
+
+    def __init__(self, network: Network, profile_ids: List[int], **kwargs):
         super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="tiktok", endpoint=f"{self._get_customer_id()}/analytics/profiles")
-    
-    def request_body_json(
-        self,
-        stream_state: Optional[Mapping[str, Any]],
-        stream_slice: Optional[Mapping[str, Any]] = None,
-        next_page_token: Optional[Mapping[str, Any]] = None,
-    ) -> Optional[Mapping[str, Any]]:
-        """
-        Override when creating POST/PUT/PATCH requests to populate the body of the request with a JSON payload.
+        self.network = network
+        self.profile_ids = profile_ids
+        self.excluded_profile_ids: List[int] = []
+        self._total_pages = None
+
+    @property
+    def site_profile_id(self) -> str:
+        return ",".join(str(profile_id) for profile_id in self.profile_ids)
 
-        At the same time only one of the 'request_body_data' and 'request_body_json' functions can be overridden.
+    @property
+    def total_pages(self) -> int:
+        """
+        The page count is looked up on first use rather than when the stream is built, so `discover` never pays for it.
         """
 
-        site_profile_id = self._get_customer_profile_ids()['tiktok']
+        if self._total_pages is None:
+            self._total_pages = self._get_total_pages(site_profile_id=self.site_profile_id, endpoint=self.path(stream_state={}))
+        return self._total_pages
 
-        tiktok_analytics_profiles = {
-            "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"reporting_period.in({self.year_ago}...{self.yesterday})"
-            ],
-            "metrics": [
-                "lifetime_snapshot.followers_count",
-                "lifetime_snapshot.followers_by_country",
-                "lifetime_snapshot.followers_by_gender",
-                "lifetime_snapshot.followers_online",
-                "net_follower_growth",
-                "impressions",
-                "profile_views_total",
-                "video_views_total"
-                "comments_count_total",
-                "shares_count_total",
-                "likes_total",
-                "posts_sent_count",
-                "posts_sent_by_post_type",
-            ],
-            "sort": [
-                "created_time:asc"
-            ],
-            "page": self.page
-            }
+    @total_pages.setter
+    def total_pages(self, value: int):
+        self._total_pages = value
 
-        return tiktok_analytics_profiles
+    def planned_pages(self) -> Optional[int]:
+        """
+        :return: the requests the read of the stream waits for one after the other, one per page by default, for the
+            time box to plan it; None for a coalesced stream, whose rows come from a query shared with other streams,
+            or when the page count fails, which the read reports.
+        """
 
-    def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/profiles"
+        if self.coalesced_read is not None:
+            return None
+        try:
+            return self.total_pages
+        except requests.RequestException:
+            return None
 
-        return endpoint
+    @property
+    def availability_strategy(self) -> Optional[AvailabilityStrategy]:
+        """
+        A coalesced read hands out the rows of each network once, so the CDK's availability check would take them away
+        from the read itself; the shared query reports its own errors.
+        """
 
-    
-class TiktokPostAnalytics(SproutSocialStream):
-    primary_key = "perma_link"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/posts` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]
-     """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="tiktok", endpoint=f"{self._get_customer_id()}/analytics/posts")
+        if self.coalesced_read is not None:
+            return None
+        return super().availability_strategy
 
-    def request_body_json(
-        self,
-        stream_state: Optional[Mapping[str, Any]],
-        stream_slice: Optional[Mapping[str, Any]] = None,
-        next_page_token: Optional[Mapping[str, Any]] = None,
-        ) -> Optional[Mapping[str, Any]]:
+    @property
+    @abstractmethod
+    def metrics(self) -> Tuple[str, ...]:
+        """
+        The metrics of the stream's network that its rows carry.
+        """
 
-        site_profile_id = self._get_customer_profile_ids()['tiktok']
-        
-        tiktok_analytics_posts = {
-            "fields": [
-                "customer_profile_id",
-                "created_time",
-                "perma_link",
-                "text",
-                "internal.tags.id",
-                "internal.sent_by.id",
-                "internal.sent_by.email",
-                "internal.sent_by.first_name",
-                "internal.sent_by.last_name"
-            ],
-            "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"created_time.in({self.year_ago}T00:00:00..{self.yesterday}T23:59:59)"
-            ],
-            "metrics": [
-                "lifetime.likes",
-                "lifetime.reactions",
-                "lifetime.shares_count",
-                "lifetime.comments_count",
-                "lifetime.video_view_time_per_view",
-                "lifetime.video_views_p100_per_view",
-                "lifetime.impression_source_follow",
-                "lifetime.impression_source_for_you",
-                "lifetime.impression_source_hashtag",
-                "lifetime.impression_source_personal_profile",
-                "lifetime.impression_source_sound",
-                "lifetime.impression_source_unspecified",
-                "lifetime.video_view_time",
-                "lifetime.video_views",
-                "lifetime.impressions_unique",
-                "lifetime.impressions",
-                "video_length"
-            ],
-            "sort": [
-                "created_time:asc"
-            ],
-            "page": self.page
-            }
-        return tiktok_analytics_posts
-    
-    def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/posts"
+    @staticmethod
+    @abstractmethod
+    def row_profile_id(row: Mapping[str, Any]) -> Any:
+        """
+        :return: the customer profile ID a row of the stream belongs to.
+        """
 
-        return endpoint
-    
-class FacebookProfileAnalytics(SproutSocialStream):
-    primary_key = "dimensions"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/profiles` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]     
-     """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="facebook", endpoint=f"{self._get_customer_id()}/analytics/profiles")
-    
-    def request_body_json(
+    def read_records(
         self,
-        stream_state: Optional[Mapping[str, Any]],
-        stream_slice: Optional[Mapping[str, Any]] = None,
-        next_page_token: Optional[Mapping[str, Any]] = None,
-    ) -> Optional[Mapping[str, Any]]:
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        while True:
+            emitted = False
+            try:
+                if self.coalesced_read is None:
+                    for record in super().read_records(sync_mode, cursor_field=cursor_field, stream_slice=stream_slice, stream_state=stream_state):
+                        emitted = True
+                        yield record
+                    return
+
+                metrics = set(self.metrics)
+                for row in self.coalesced_read.rows_for(self.network.network_type):
+                    yield dict(row, metrics={metric: value for metric, value in (row.get("metrics") or {}).items() if metric in metrics})
+                return
+            except requests.HTTPError as error:
+                if not self._rejects_profiles(error):
+                    raise
+                self.profiles_rejected = True
+                # records already emitted cannot be taken back, and a list is only bisected once
+                if emitted or self.coalesced_read is not None or len(self.profile_ids) < 2 or self.excluded_profile_ids:
+                    raise
+                if not self._exclude_rejected_profiles(error):
+                    raise
+
+    @staticmethod
+    def _rejects_profiles(error: requests.HTTPError) -> bool:
+        return error.response is not None and error.response.status_code in metadata_cache.REJECTED_PROFILE_STATUSES
+
+    @staticmethod
+    def _names_profiles(error: requests.HTTPError) -> bool:
+        return error.response is not None and "profile" in error.response.text.lower()
+
+    def _exclude_rejected_profiles(self, error: requests.HTTPError) -> bool:
         """
-        Override when creating POST/PUT/PATCH requests to populate the body of the request with a JSON payload.
+        Isolate the rejected profiles by bisecting the profile list, then go on with the others only.
 
-        At the same time only one of the 'request_body_data' and 'request_body_json' functions can be overridden.
+        Each half of a rejected list is queried on its own, down to single profiles, so `k` rejected profiles out of
+        `n` take about `2k log2(n/k)` page-count queries, and at most `max_bisection_requests`, past which `error` is
+        raised. Unless `error` names profiles, it may as well come from a filter or metric, which every profile gets:
+        `error` is then raised as soon as both halves of the first split are rejected.
+
+        :return: whether any profile was accepted.
         """
-        site_profile_id = self._get_customer_profile_ids()['facebook']
 
-        facebook_analytics_profiles = {
-            "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"reporting_period.in({self.year_ago}...{self.yesterday})"
-            ],
-            "metrics": [
-                "lifetime_snapshot.followers_count",
-                "lifetime_snapshot.followers_by_country",
-                "lifetime_snapshot.followers_by_age_gender",
-                "lifetime_snapshot.followers_by_city",
-                "net_follower_growth",
-                "followers_gained",
-                "followers_gained_organic",
-                "followers_gained_paid",
-                "followers_lost",
-                "impressions",
-                "impressions_organic",
-                "impressions_viral",
-                "impressions_nonviral",
-                "impressions_paid",
-                "tab_views",
-                "tab_views_login",
-                "tab_views_logout",
-                "post_impressions",
-                "post_impressions_organic",
-                "post_impressions_viral",
-                "post_impressions_nonviral",
-                "post_impressions_paid",
-                "impressions_unique",
-                "impressions_organic_unique",
-                "impressions_viral_unique",
-                "impressions_nonviral_unique",
-                "impressions_paid_unique",
-                "profile_views",
-                "profile_views_login",
-                "profile_views_logout",
-                "profile_views_login_unique",
-                "reactions",
-                "comments_count",
-                "shares_count",
-                "post_link_clicks",
-                "post_content_clicks_other",
-                "likes",
-                "reactions_love",
-                "reactions_haha",
-                "reactions_wow",
-                "reactions_sad",
-                "reactions_angry",
-                "post_photo_view_clicks",
-                "post_video_play_clicks",
-                "profile_actions",
-                "post_engagements",
-                "cta_clicks_login",
-                "question_answers",
-                "offer_claims",
-                "positive_feedback_other",
-                "event_rsvps",
-                "place_checkins",
-                "place_checkins_mobile",
-                "profile_content_activity",
-                "negative_feedback",
-                "video_views",
-                "video_views_organic",
-                "video_views_paid",
-                "video_views_autoplay",
-                "video_views_click_to_play",
-                "video_views_repeat",
-                "video_view_time",
-                "video_views_unique",
-                "video_views_30s_complete",
-                "video_views_30s_complete_organic",
-                "video_views_30s_complete_paid",
-                "video_views_30s_complete_autoplay",
-                "video_views_30s_complete_click_to_play",
-                "video_views_30s_complete_unique",
-                "video_views_30s_complete_repeat",
-                "video_views_partial",
-                "video_views_partial_organic",
-                "video_views_partial_paid",
-                "video_views_partial_autoplay",
-                "video_views_partial_click_to_play",
-                "video_views_partial_repeat",
-                "video_views_10s",
-                "video_views_10s_organic",
-                "video_views_10s_paid",
-                "video_views_10s_autoplay",
-                "video_views_10s_click_to_play",
-                "video_views_10s_repeat",
-                "video_views_10s_unique",
-                "posts_sent_count",
-                "posts_sent_by_post_type",
-                "posts_sent_by_content_type"
-            ],
-            "sort": [
-                "created_time:asc"
-            ],
-            "page": self.page
-            }
+        endpoint = self.path(stream_state={})
+        sent = 0
+
+        def rejected(profile_ids: List[int]) -> bool:
+            nonlocal sent
+            if sent == self.max_bisection_requests:
+                self.logger.warning(f"{self.name}: gave up isolating the rejected profiles after {sent} queries")
+                raise error
+            sent += 1
+            try:
+                self._get_first_page(site_profile_id=",".join(str(profile_id) for profile_id in profile_ids), endpoint=endpoint)
+                return False
+            except requests.HTTPError as rejection:
+                if not self._rejects_profiles(rejection):
+                    raise
+                return True
+
+        def accepted(profile_ids: List[int], is_rejected: Optional[bool] = None) -> List[int]:
+            if not (rejected(profile_ids) if is_rejected is None else is_rejected):
+                return profile_ids
+            if len(profile_ids) == 1:
+                return []
+            return accepted(profile_ids[: len(profile_ids) // 2]) + accepted(profile_ids[len(profile_ids) // 2 :])
+
+        # the whole list is already known to be rejected
+        middle = len(self.profile_ids) // 2
+        first, second = self.profile_ids[:middle], self.profile_ids[middle:]
+        first_rejected, second_rejected = rejected(first), rejected(second)
+        if first_rejected and second_rejected and not self._names_profiles(error):
+            raise error
+        healthy = accepted(first, first_rejected) + accepted(second, second_rejected)
+        self.excluded_profile_ids = [profile_id for profile_id in self.profile_ids if profile_id not in healthy]
+        self.logger.warning(
+            f"{self.name}: excluding rejected profiles {', '.join(str(profile_id) for profile_id in self.excluded_profile_ids)}, "
+            f"reading the other {len(healthy)}"
+        )
+        if not healthy:
+            return False
+        self.profile_ids = healthy
+        self.page = 1
+        self._total_pages = None
+        return True
 
-        return facebook_analytics_profiles
-    
     def error_message(self, response: requests.Response) -> str:
         return response.text
 
     def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
+        self, stream_state: Mapping[str, Any] = None,
+        stream_slice: Mapping[str, Any] = None,
         next_page_token: Mapping[str, Any] = None,
         **kwargs,
     ) -> str:
-        
+
         customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/profiles"
+        return f"{customer_id}/{self.endpoint}"
 
-        return endpoint
 
-    
-    
-class FacebookPostAnalytics(SproutSocialStream):
-    primary_key = "perma_link"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/posts` endpoint as a post request.   
-    The request needs: 
+class ProfileAnalyticsStream(AnalyticsStream):
+    """
+    This endpoint retrieves data from the `analytics/profiles` endpoint as a post request.
+    The request needs:
       - a customer_id from _get_customer_id(),
       - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]
-     """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="facebook", endpoint=f"{self._get_customer_id()}/analytics/posts")
-        
+        - dates: spanning from `year_ago` to `yesterday`
+        - site_profile_id: the comma-joined profile IDs of the network
+
+    Profile analytics requests ask for every metric of a network at once, which ties each page to the slowest
+    metric Sprout has to compute. When `metric_group_size` is set in the config, the metric list is split into
+    groups that are requested concurrently, and the partial rows are merged back into one row per `dimensions`
+    key before they are emitted.
+
+    When one of its rollup streams is selected, the stream is given a `rollups.DailyRows`, and its rows are read once
+    for itself and its rollups.
+    """
+
+    primary_key = "dimensions"
+    endpoint = "analytics/profiles"
+    endpoint_kind = deadlines.PROFILE_ANALYTICS
+    daily_rows: Optional[rollups.DailyRows] = None
+
+    @property
+    def name(self) -> str:
+        return self.network.profile_stream_name
+
+    @property
+    def metrics(self) -> Tuple[str, ...]:
+        return self.network.profile_metrics
+
+    @staticmethod
+    def row_profile_id(row: Mapping[str, Any]) -> Any:
+        return (row.get("dimensions") or {}).get("customer_profile_id")
+
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        if self.daily_rows is not None:
+            yield from self.daily_rows.rows()
+            return
+        yield from super().read_records(sync_mode, cursor_field=cursor_field, stream_slice=stream_slice, stream_state=stream_state)
+
+    def planned_pages(self) -> Optional[int]:
+        # each page waits for its metric groups, `metric_group_concurrency` at a time
+        pages = super().planned_pages()
+        group_size = self.config.get("metric_group_size")
+        if pages is None or not group_size:
+            return pages
+        groups = len(split_metrics(self.metrics, group_size))
+        return pages * -(-groups // max(self.config.get("metric_group_concurrency", 4), 1))
+
+    def _read_daily_rows(self) -> Iterable[Mapping[str, Any]]:
+        return super().read_records(SyncMode.full_refresh)
+
     def request_body_json(
         self,
         stream_state: Optional[Mapping[str, Any]],
         stream_slice: Optional[Mapping[str, Any]] = None,
         next_page_token: Optional[Mapping[str, Any]] = None,
-        ) -> Optional[Mapping[str, Any]]:
+    ) -> Optional[Mapping[str, Any]]:
 
-        site_profile_id = self._get_customer_profile_ids()['facebook']
-        
-        facebook_analytics_posts = {
-            "fields": [
-                "customer_profile_id",
-                "created_time",
-                "perma_link",
-                "text",
-                "internal.tags.id",
-                "internal.sent_by.id",
-                "internal.sent_by.email",
-                "internal.sent_by.first_name",
-                "internal.sent_by.last_name"
-            ],
+        analytics_profiles = {
             "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"created_time.in({self.year_ago}T00:00:00..{self.yesterday}T23:59:59)"
-            ],
-            "metrics": [
-                "lifetime.impressions",
-                "lifetime.impressions_viral",
-                "lifetime.impressions_nonviral",
-                "lifetime.impressions_paid",
-                "lifetime.impressions_follower",
-                "lifetime.impressions_follower_organic",
-                "lifetime.impressions_follower_paid",
-                "lifetime.impressions_nonfollower",
-                "lifetime.impressions_nonfollower_organic",
-                "lifetime.impressions_nonfollower_paid",
-                "lifetime.impressions_unique",
-                "lifetime.impressions_organic_unique",
-                "lifetime.impressions_viral_unique",
-                "lifetime.impressions_nonviral_unique",
-                "lifetime.impressions_paid_unique",
-                "lifetime.impressions_follower_unique",
-                "lifetime.impressions_follower_paid_unique",
-                "lifetime.likes",
-                "lifetime.reactions_love",
-                "lifetime.reactions_haha",
-                "lifetime.reactions_wow",
-                "lifetime.reactions_sad",
-                "lifetime.reactions_angry",
-                "lifetime.shares_count",
-                "lifetime.question_answers",
-                "lifetime.post_content_clicks",
-                "lifetime.post_photo_view_clicks",
-                "lifetime.post_video_play_clicks",
-                "lifetime.post_content_clicks_other",
-                "lifetime.negative_feedback",
-                "lifetime.engagements_unique",
-                "lifetime.engagements_follower_unique",
-                "lifetime.reactions_unique",
-                "lifetime.comments_count_unique",
-                "lifetime.shares_count_unique",
-                "lifetime.question_answers_unique",
-                "lifetime.post_link_clicks_unique",
-                "lifetime.post_content_clicks_unique",
-                "lifetime.post_photo_view_clicks_unique",
-                "lifetime.post_video_play_clicks_unique",
-                "lifetime.post_other_clicks_unique",
-                "lifetime.negative_feedback_unique",
-                "video_length",
-                "lifetime.video_views",
-                "lifetime.video_views_unique",
-                "lifetime.video_views_organic",
-                "lifetime.video_views_organic_unique",
-                "lifetime.video_views_paid",
-                "lifetime.video_views_paid_unique",
-                "lifetime.video_views_autoplay",
-                "lifetime.video_views_click_to_play",
-                "lifetime.video_views_sound_on",
-                "lifetime.video_views_sound_off",
-                "lifetime.video_views_10s",
-                "lifetime.video_views_10s_organic",
-                "lifetime.video_views_10s_paid",
-                "lifetime.video_views_10s_autoplay",
-                "lifetime.video_views_10s_click_to_play",
-                "lifetime.video_views_10s_sound_on",
-                "lifetime.video_views_10s_sound_off",
-                "lifetime.video_views_partial",
-                "lifetime.video_views_partial_organic",
-                "lifetime.video_views_partial_paid",
-                "lifetime.video_views_partial_autoplay",
-                "lifetime.video_views_partial_click_to_play",
-                "lifetime.video_views_30s_complete",
-                "lifetime.video_views_30s_complete_organic",
-                "lifetime.video_views_30s_complete_paid",
-                "lifetime.video_views_30s_complete_autoplay",
-                "lifetime.video_views_30s_complete_click_to_play",
-                "lifetime.video_views_p95",
-                "lifetime.video_views_p95_organic",
-                "lifetime.video_views_p95_paid",
-                "lifetime.video_views_10s_unique",
-                "lifetime.video_views_30s_complete_unique",
-                "lifetime.video_views_p95_paid_unique",
-                "lifetime.video_views_p95_organic_unique",
-                "lifetime.video_view_time_per_view",
-                "lifetime.video_view_time",
-                "lifetime.video_view_time_organic",
-                "lifetime.video_view_time_paid",
-                "lifetime.video_ad_break_impressions",
-                "lifetime.video_ad_break_earnings",
-                "lifetime.video_ad_break_cost_per_impression",
+                f"customer_profile_id.eq({self.site_profile_id})",
+                f"reporting_period.in({self.year_ago}...{self.yesterday})"
             ],
+            "metrics": list(self.network.profile_metrics),
             "sort": [
                 "created_time:asc"
             ],
             "page": self.page
             }
-        return facebook_analytics_posts
 
-    def path(
-        self, stream_state: Mapping[str, Any] = None, 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/posts"
-        return endpoint
+        return analytics_profiles
+
+    def _read_record_pages(self, stream_slice: Mapping[str, Any] = None, stream_state: Mapping[str, Any] = None) -> Iterable[Page]:
+        group_size = self.config.get("metric_group_size")
+        if not group_size:
+            yield from super()._read_record_pages(stream_slice=stream_slice, stream_state=stream_state)
+            return
+
+        concurrency = self.config.get("metric_group_concurrency", 4)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                body = self.request_body_json(stream_state=stream_state, stream_slice=stream_slice)
+                futures = [
+                    executor.submit(self._fetch_metric_group, dict(body, metrics=group), stream_slice, stream_state)
+                    for group in split_metrics(body["metrics"], group_size)
+                ]
+                responses = [future.result() for future in futures]
+                partials = [list(self.parse_response(response, stream_slice=stream_slice, stream_state=stream_state)) for response in responses]
+                yield merge_metric_groups(partials), sum(len(response.content) for response in responses)
+
+                if not self.next_page_token(responses[0]):
+                    break
+
+    def _fetch_metric_group(
+        self, body: Mapping[str, Any], stream_slice: Mapping[str, Any] = None, stream_state: Mapping[str, Any] = None
+    ) -> requests.Response:
+        request = self._create_prepared_request(
+            path=self.path(stream_state=stream_state, stream_slice=stream_slice),
+            headers=dict(self.request_headers(stream_state=stream_state, stream_slice=stream_slice), **self.authenticator.get_auth_header()),
+            params=self.request_params(stream_state=stream_state, stream_slice=stream_slice),
+            json=body,
+        )
+        return self._send_request(request, self.request_kwargs(stream_state=stream_state, stream_slice=stream_slice))
+
+
+class ProfileAnalyticsRollupStream(Stream):
+    """
+    The rows of a `ProfileAnalyticsStream` rolled up per profile and week or month in the connector, see `rollups`.
+    The stream sends no request of its own; it reads the rows of its daily stream, which are shared during a sync.
+    """
 
-class InstagramProfileAnalytics(SproutSocialStream):
     primary_key = "dimensions"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/profiles` endpoint as a post request.   
-    The request needs: 
+
+    def __init__(self, daily: ProfileAnalyticsStream, period: str):
+        super().__init__()
+        self.daily = daily
+        self.period = period
+
+    @property
+    def name(self) -> str:
+        return self.daily.network.rollup_stream_name(self.period)
+
+    @property
+    def network(self) -> Network:
+        return self.daily.network
+
+    @property
+    def profile_ids(self) -> List[int]:
+        return self.daily.profile_ids
+
+    def get_json_schema(self) -> Mapping[str, Any]:
+        return {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "type": "object",
+            "properties": {
+                "dimensions": {"type": ["object"]},
+                "metrics": {"type": ["object"]},
+                "days": {"type": ["integer"]},
+            },
+        }
+
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        daily_rows = self.daily.read_records(SyncMode.full_refresh)
+        with self.daily.sync_context.phase(self.name, "rollup"):
+            rows = rollups.roll_up(daily_rows, self.period)
+        yield from rows
+
+
+class PostAnalyticsStream(AnalyticsStream):
+    """
+    This endpoint retrieves data from the `analytics/posts` endpoint as a post request.
+    The request needs:
       - a customer_id from _get_customer_id(),
       - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]    
-     """
-    
-    def __init__(self, **kwargs):
+        - dates: spanning from `year_ago` to `yesterday`
+        - site_profile_id: the comma-joined profile IDs of the network
+    """
+
+    primary_key = "perma_link"
+    endpoint = "analytics/posts"
+    endpoint_kind = deadlines.POST_ANALYTICS
+    # set during a read, which commits the post change stores handed over here once the stream's records are emitted
+    pending_change_stores: Optional[List[PostHashStore]] = None
+    # set during a read when the stream appends to its destination and keeps a post change store, see `post_changes`
+    changes_only = False
+
+    def __init__(self, lookups: Optional[LookupIndexes] = None, post_filters: Optional[filters.PostFilters] = None, **kwargs):
         super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="instagram", endpoint=f"{self._get_customer_id()}/analytics/profiles")
-    
-    def request_body_json(
+        self.lookups = lookups
+        self.post_filters = post_filters
+        self._windows = None
+
+    @property
+    def name(self) -> str:
+        return self.network.post_stream_name
+
+    @property
+    def metrics(self) -> Tuple[str, ...]:
+        return self.network.post_metrics
+
+    @staticmethod
+    def row_profile_id(row: Mapping[str, Any]) -> Any:
+        return row.get("customer_profile_id")
+
+    def extra_filters(self) -> List[str]:
+        """
+        The tag and post type filters of the config, shared by every post stream.
+        """
+
+        return self.post_filters.filters() if self.post_filters is not None else []
+
+    def planned_pages(self) -> Optional[int]:
+        """
+        Split into windows, the stream is planned from its windows, which the read then reuses, rather than from a
+        page count over the whole year, the query windows avoid.
+        """
+
+        max_pages = self.config.get("post_window_max_pages")
+        if not max_pages:
+            return super().planned_pages()
+        if self.coalesced_read is not None:
+            return None
+        try:
+            windows = self._planned_windows(max_pages)
+        except requests.RequestException:
+            return None
+        # the windows are paged `post_window_concurrency` at a time, and none is read faster than its own pages
+        concurrency = max(self.config.get("post_window_concurrency", 4), 1)
+        return max(-(-sum(window["total_pages"] for window in windows) // concurrency), *(window["total_pages"] for window in windows))
+
+    def _exclude_rejected_profiles(self, error: requests.HTTPError) -> bool:
+        # windows planned over the rejected list are planned again over the others
+        self._windows = None
+        return super()._exclude_rejected_profiles(error)
+
+    def read_records(
         self,
-        stream_state: Optional[Mapping[str, Any]],
-        stream_slice: Optional[Mapping[str, Any]] = None,
-        next_page_token: Optional[Mapping[str, Any]] = None,
-    ) -> Optional[Mapping[str, Any]]:
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
         """
-        Override when creating POST/PUT/PATCH requests to populate the body of the request with a JSON payload.
+        When the stream is `changes_only`, only the posts that changed since the previous sync are emitted, see
+        `post_changes`. The query shared by coalesced streams keeps no store; each of its streams filters its own rows.
 
-        At the same time only one of the 'request_body_data' and 'request_body_json' functions can be overridden.
+        With `enrich_posts` set in the config, each post gets the metadata of its tags and sender from the shared `lookups`.
         """
-        site_profile_id = self._get_customer_profile_ids()['instagram']
-      
-        instagram_analytics_profiles = {
-            "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"reporting_period.in({self.year_ago}...{self.yesterday})"
-            ],
-            "metrics": [
-                "lifetime_snapshot.followers_count",
-                "lifetime_snapshot.followers_by_country",
-                "lifetime_snapshot.followers_by_age_gender",
-                "lifetime_snapshot.followers_by_city",
-                "net_follower_growth",
-                "followers_gained",
-                "followers_lost",
-                "lifetime_snapshot.following_count"
-                "impressions",
-                "impressions_unique",
-                "profile_views_unique",
-                "video_views"
-                "reactions",
-                "comments_count",
-                "shares_count",
-                "likes",
-                "saves",
-                "story_replies",
-                "email_contacts",
-                "get_directions_clicks",
-                "phone_call_clicks",
-                "text_message_clicks",
-                "website_clicks",
-                "posts_sent_count",
-                "posts_sent_by_post_type",
-                "posts_sent_by_content_type"
-            ],
-            "sort": [
-                "created_time:asc"
-            ],
-            "page": self.page
-            }
 
-        return instagram_analytics_profiles
-    
-    def error_message(self, response: requests.Response) -> str:
-        return response.text
+        records = super().read_records(sync_mode, cursor_field=cursor_field, stream_slice=stream_slice, stream_state=stream_state)
+        if self.changes_only:
+            records = self._changed_posts(records)
+        if self.lookups is None:
+            yield from records
+            return
+        for record in records:
+            yield self.lookups.enrich_post(record)
 
-    def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/profiles"
+    def _changed_posts(self, records: Iterable[Mapping[str, Any]]) -> Iterable[Mapping[str, Any]]:
+        """
+        The store is committed once every post has been read, or, during a read, handed over to `pending_change_stores`
+        and committed once the records have been emitted, since a sync interrupted in between would otherwise lose them.
+        """
 
-        return endpoint
+        store = PostHashStore(os.path.join(self.config["post_change_store_dir"], f"{self.name}{sharding.shard_suffix(self.config)}.sqlite"))
+        handed_over = False
+        try:
+            yield from store.changed_posts(records)
+            self.logger.info(f"{self.name}: {store.changed} of {store.seen} posts are new or changed")
+            # a preview only sees part of the posts, and must not hide them from the next real sync
+            if self.preview:
+                return
+            if self.pending_change_stores is None:
+                store.commit()
+            else:
+                self.pending_change_stores.append(store)
+                handed_over = True
+        finally:
+            if not handed_over:
+                store.close()
+
+    def commit_changes(self) -> None:
+        """
+        Commit and close the post change stores handed over since the last call.
+        """
 
-    
-    
-class InstagramPostAnalytics(SproutSocialStream):
-    primary_key = "perma_link"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/posts` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]       
-     """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="instagram", endpoint=f"{self._get_customer_id()}/analytics/posts")
+        while self.pending_change_stores:
+            store = self.pending_change_stores.pop()
+            try:
+                store.commit()
+            finally:
+                store.close()
+
+    def discard_changes(self) -> None:
+        while self.pending_change_stores:
+            self.pending_change_stores.pop().close()
+
+    def _read_record_pages(self, stream_slice: Mapping[str, Any] = None, stream_state: Mapping[str, Any] = None) -> Iterable[Page]:
+        """
+        When `post_window_max_pages` is set in the config, the `created_time` window is first split into pieces of at
+        most that many pages, see `_plan_windows`, and `post_window_concurrency` pieces are paged at the same time.
+        """
+
+        max_pages = self.config.get("post_window_max_pages")
+        if not max_pages:
+            yield from super()._read_record_pages(stream_slice=stream_slice, stream_state=stream_state)
+            return
+
+        sources = [partial(self._read_window_pages, window, stream_state) for window in self._planned_windows(max_pages)]
+        concurrency = min(self.config.get("post_window_concurrency", 4), len(sources))
+        if concurrency > 1:
+            yield from interleave(sources, max_workers=concurrency)
+        else:
+            for source in sources:
+                yield from source()
+
+    def _planned_windows(self, max_pages: int) -> List[Mapping[str, Any]]:
+        """
+        The windows are planned once per stream, so the time box, the CDK's availability check and the read share the
+        page-count requests.
+        """
+
+        if self._windows is None:
+            self._windows = self._plan_windows(self.year_ago, self.yesterday, max_pages)
+            self.logger.info(f"{self.name}: split into {len(self._windows)} windows of at most {max_pages} pages")
+        return self._windows
+
+    def _plan_windows(self, start: date, end: date, max_pages: int) -> List[Mapping[str, Any]]:
+        """
+        Split the days from `start` to `end` until each window has at most `max_pages` pages, or is a single day.
+
+        A window over the threshold is cut into as many equal pieces as it needs pages, so a burst of posts only
+        splits its own pieces further. A page count that times out or fails on the server is taken as oversized, and
+        the window is halved.
+        """
+
+        try:
+            first_page = self._get_first_page(site_profile_id=self.site_profile_id, endpoint=self.path(stream_state={}), start=start, end=end)
+            total_pages = first_page["paging"]["total_pages"]
+        except (requests.Timeout, requests.HTTPError) as error:
+            oversized = isinstance(error, requests.Timeout) or (error.response is not None and error.response.status_code >= 500)
+            if start == end or not oversized:
+                raise
+            pieces = 2
+        else:
+            if total_pages <= max_pages or start == end:
+                return [{"start": start.isoformat(), "end": end.isoformat(), "total_pages": total_pages}]
+            pieces = -(-total_pages // max_pages)
+
+        days = (end - start).days + 1
+        pieces = min(pieces, days)
+        windows = []
+        for piece in range(pieces):
+            piece_start = start + timedelta(days=days * piece // pieces)
+            piece_end = start + timedelta(days=days * (piece + 1) // pieces - 1)
+            windows += self._plan_windows(piece_start, piece_end, max_pages)
+        return windows
+
+    def _read_window_pages(self, window: Mapping[str, Any], stream_state: Mapping[str, Any] = None) -> Iterable[Page]:
+        """
+        Page through one window. Its page count is known from planning, and the page number is passed explicitly
+        rather than kept on the stream, so several windows can be paged at once.
+        """
+
+        total_pages = window["total_pages"]
+        max_pages = self.config.get("preview_max_pages")
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        for page in range(1, total_pages + 1):
+            _, response = self._fetch_next_page(window, stream_state, {"page": page})
+            yield list(self.parse_response(response, stream_slice=window, stream_state=stream_state)), len(response.content)
 
     def request_body_json(
         self,
@@ -820,220 +1063,168 @@ class InstagramPostAnalytics(SproutSocialStream):
         stream_slice: Optional[Mapping[str, Any]] = None,
         next_page_token: Optional[Mapping[str, Any]] = None,
         ) -> Optional[Mapping[str, Any]]:
-        
-        site_profile_id = self._get_customer_profile_ids()['instagram']
-
-        instagram_analytics_posts = {
-            "fields": [
-                "customer_profile_id",
-                "created_time",
-                "perma_link",
-                "text",
-                "internal.tags.id",
-                "internal.sent_by.id",
-                "internal.sent_by.email",
-                "internal.sent_by.first_name",
-                "internal.sent_by.last_name"
-            ],
+        """
+        The window spans from `year_ago` to `yesterday`, unless the `stream_slice` is one of the windows of `_plan_windows`.
+        """
+
+        start, end = self.year_ago, self.yesterday
+        if stream_slice and "start" in stream_slice:
+            start, end = stream_slice["start"], stream_slice["end"]
+        analytics_posts = {
+            "fields": list(POST_FIELDS),
             "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"created_time.in({self.year_ago}T00:00:00..{self.yesterday}T23:59:59)"
-            ],
-            "metrics": [
-                "lifetime.impressions",
-                "lifetime.impressions_unique",
-                "lifetime.likes",
-                "lifetime.reactions",
-                "lifetime.shares_count",
-                "lifetime.comments_count",
-                "lifetime.saves",
-                "lifetime.story_taps_back",
-                "lifetime.story_taps_forward",
-                "lifetime.story_exits",
-                "lifetime.video_views"
+                f"customer_profile_id.eq({self.site_profile_id})",
+                f"created_time.in({start}T00:00:00..{end}T23:59:59)",
+                *self.extra_filters(),
             ],
+            "metrics": list(self.network.post_metrics),
             "sort": [
                 "created_time:asc"
             ],
-            "page": self.page
+            "page": next_page_token["page"] if next_page_token else self.page
             }
-        return instagram_analytics_posts
+        return analytics_posts
 
-    def path(
-        self, stream_state: Mapping[str, Any] = None, 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/posts"
-        return endpoint
-    
-class TwitterProfileAnalytics(SproutSocialStream):
-    primary_key = "dimensions"
+
+class Messages(SproutSocialStream, IncrementalMixin):
+    """
+    This endpoint retrieves the inbound and outbound messages of the customer's profiles from the `messages`
+    endpoint as a post request, paged with the `next_cursor` of each response rather than a page number.
+
+    The stream is sliced into `messages_window_hours` windows of `created_time`, from the state's cursor, or
+    `messages_start_date` on the first sync, up to now. Within a window the profiles are queried in groups of
+    `messages_profiles_per_query`, and `messages_concurrency` groups are paged at the same time. The cursor only
+    advances once every group of a window has been read, so an interrupted sync resumes from the first unfinished window.
+
+    Under a `timebox.TimeBox` of the sync, no new window is started once the time left is shorter than the longest window so far.
+    """
+
+    primary_key = "guid"
+    cursor_field = "created_time"
     http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/profiles` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]     
-     """
-    
-    def __init__(self, **kwargs):
+    endpoint = "messages"
+    endpoint_kind = deadlines.MESSAGES
+    page_limit = 100
+
+    def __init__(self, profile_ids: List[int], **kwargs):
         super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="twitter", endpoint=f"{self._get_customer_id()}/analytics/profiles")
-        
-    
-    def request_body_json(
+        self.profile_ids = profile_ids
+        self._state = {}
+
+    @property
+    def state(self) -> MutableMapping[str, Any]:
+        return self._state
+
+    @state.setter
+    def state(self, value: MutableMapping[str, Any]):
+        self._state = value or {}
+
+    @property
+    def availability_strategy(self) -> Optional[AvailabilityStrategy]:
+        """
+        The CDK checks availability before setting the state, which would page through the first window of a first sync
+        for nothing; `check` already covers access to the API.
+        """
+
+        return None
+
+    def path(self, **kwargs) -> str:
+        return f"{self._get_customer_id()}/{self.endpoint}"
+
+    def stream_slices(self, stream_state: Mapping[str, Any] = None, **kwargs) -> Iterable[Optional[Mapping[str, Any]]]:
+        return self.sync_context.slices(self.name, self._windows())
+
+    def _windows(self) -> Iterable[Mapping[str, Any]]:
+        window = timedelta(hours=self.config.get("messages_window_hours", 24))
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        start = self._start_time()
+        while start < now:
+            end = min(start + window, now)
+            yield {"start": start.isoformat(), "end": end.isoformat()}
+            start = end
+
+    def _start_time(self) -> datetime:
+        cursor = self._state.get(self.cursor_field)
+        if cursor:
+            return datetime.fromisoformat(cursor)
+        start_date = self.config.get("messages_start_date")
+        start = date.fromisoformat(start_date) if start_date else self.year_ago
+        return datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+
+    def read_records(
         self,
-        stream_state: Optional[Mapping[str, Any]],
-        stream_slice: Optional[Mapping[str, Any]] = None,
-        next_page_token: Optional[Mapping[str, Any]] = None,
-    ) -> Optional[Mapping[str, Any]]:
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
         """
-        Override when creating POST/PUT/PATCH requests to populate the body of the request with a JSON payload.
+        Read every profile group of the `stream_slice` window, then move the cursor to the end of the window.
 
-        At the same time only one of the 'request_body_data' and 'request_body_json' functions can be overridden.
+        In preview mode, reading stops after `preview_max_records` records and the cursor is left where it was.
         """
 
-        site_profile_id = self._get_customer_profile_ids()['twitter']
+        group_size = self.config.get("messages_profiles_per_query", 50)
+        group_slices = [
+            dict(stream_slice, profile_ids=self.profile_ids[offset : offset + group_size]) for offset in range(0, len(self.profile_ids), group_size)
+        ]
+        concurrency = min(self.config.get("messages_concurrency", 4), len(group_slices))
+        if concurrency > 1:
+            records = interleave([partial(self._read_profile_group, group_slice) for group_slice in group_slices], max_workers=concurrency)
+        else:
+            records = (record for group_slice in group_slices for record in self._read_profile_group(group_slice))
+        yield from islice(records, self.config.get("preview_max_records"))
 
-        twitter_analytics_profiles = {
-            "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"reporting_period.in({self.year_ago}...{self.yesterday})"
-            ],
-            "metrics": [
-                "lifetime_snapshot.followers_count",
-                "net_follower_growth",
-                "impressions",
-                "post_media_views",
-                "video_views",
-                "reactions",
-                "likes",
-                "comments_count",
-                "shares_count",
-                "post_link_clicks",
-                "post_content_clicks",
-                "post_content_clicks_other",
-                "post_media_clicks",
-                "post_hashtag_clicks",
-                "post_detail_expand_clicks",
-                "post_profile_clicks",
-                "engagements_other",
-                "post_app_engagements",
-                "post_app_installs",
-                "post_app_opens",
-                "post_sent_count",
-                "post_sent_by_post_type",
-                "post_sent_by_content_type",
-            ],
-            "sort": [
-                "created_time:asc"
-            ],
-            "page": self.page
-            }
+        if not self.preview:
+            self._state = {self.cursor_field: stream_slice["end"]}
 
-        return twitter_analytics_profiles
+    def _read_profile_group(self, group_slice: Mapping[str, Any]) -> Iterable[Mapping[str, Any]]:
+        """
+        Page through the messages of one group of profiles. The paging state lives here rather than on the stream,
+        so several groups can be paged at once.
+        """
 
-    def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/profiles"
+        max_pages = self.config.get("preview_max_pages")
+        next_page_token, pages = None, 0
+        while True:
+            _, response = self._fetch_next_page(group_slice, self._state, next_page_token)
+            with self.sync_context.phase(self.name, "parse"):
+                body = response.json()
+            yield from body["data"]
+            pages += 1
 
-        return endpoint
+            next_page_token = self._page_cursor(body)
+            if not next_page_token or (max_pages and pages >= max_pages):
+                return
+
+    def next_page_token(self, response: requests.Response) -> Optional[Mapping[str, Any]]:
+        return self._page_cursor(response.json())
+
+    @staticmethod
+    def _page_cursor(body: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        next_cursor = (body.get("paging") or {}).get("next_cursor")
+        return {"page_cursor": next_cursor} if next_cursor else None
 
-class TwitterPostAnalytics(SproutSocialStream):
-    primary_key = "perma_link"
-    http_method = "POST"
-    
-    """This endpoint retrieves data from the `analytics/posts` endpoint as a post request.   
-    The request needs: 
-      - a customer_id from _get_customer_id(),
-      - a json specifically filtered for each `network_type` (aka social media site) including the following vars:
-        - dates: spanning from `year_ago` to `yesterday` 
-        - site_profile_id: retrieved from CustomerProfile endpoint 
-            site_profile_id = self._get_customer_profile_ids()[{site}]
-     """
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.total_pages = self._get_total_pages(platform_name="twitter", endpoint=f"{self._get_customer_id()}/analytics/posts")
-        
-    
     def request_body_json(
         self,
         stream_state: Optional[Mapping[str, Any]],
         stream_slice: Optional[Mapping[str, Any]] = None,
         next_page_token: Optional[Mapping[str, Any]] = None,
-        ) -> Optional[Mapping[str, Any]]:
-
-        site_profile_id = self._get_customer_profile_ids()['twitter']
-        
-        twitter_analytics_posts = {
-            "fields": [
-                "customer_profile_id",
-                "created_time",
-                "perma_link",
-                "text",
-                "internal.tags.id",
-                "internal.sent_by.id",
-                "internal.sent_by.email",
-                "internal.sent_by.first_name",
-                "internal.sent_by.last_name"
-            ],
+    ) -> Optional[Mapping[str, Any]]:
+        # `created_time.in` includes both ends, so the window stops a second before the next one starts
+        start = datetime.fromisoformat(stream_slice["start"])
+        end = datetime.fromisoformat(stream_slice["end"]) - timedelta(seconds=1)
+        messages = {
             "filters": [
-                f"customer_profile_id.eq({site_profile_id})",
-                f"created_time.in({self.year_ago}T00:00:00..{self.yesterday}T23:59:59)"
-            ],
-            "metrics": [
-                "lifetime.impressions",
-                "lifetime.post_media_views",
-                "lifetime.video_views",
-                "lifetime.reactions",
-                "lifetime.likes",
-                "lifetime.comments_count",
-                "lifetime.shares_count",
-                "lifetime.post_content_clicks",
-                "lifetime.post_link_clicks",
-                "lifetime.post_content_clicks_other",
-                "lifetime.post_media_clicks",
-                "lifetime.post_hashtag_clicks",
-                "lifetime.post_detail_expand_clicks",
-                "lifetime.post_profile_clicks",
-                "lifetime.engagements_other",
-                "lifetime.post_followers_gained",
-                "lifetime.post_followers_lost",
-                "lifetime.post_app_engagements",
-                "lifetime.post_app_installs",
-                "lifetime.post_app_opens"
-            ],
-            "sort": [
-                "created_time:asc"
+                f"customer_profile_id.eq({','.join(str(profile_id) for profile_id in stream_slice['profile_ids'])})",
+                f"created_time.in({start:%Y-%m-%dT%H:%M:%S}..{end:%Y-%m-%dT%H:%M:%S})",
             ],
-            "page": self.page
-            }
-        return twitter_analytics_posts
-    
-    def path(
-        self, stream_state: Mapping[str, Any], 
-        stream_slice: Mapping[str, Any] = None, 
-        next_page_token: Mapping[str, Any] = None,
-        **kwargs,
-    ) -> str:
-        
-        customer_id = self._get_customer_id()
-        endpoint = f"{customer_id}/analytics/posts"
-
-        return endpoint
+            "sort": ["created_time:asc"],
+            "limit": self.page_limit,
+        }
+        if next_page_token:
+            messages.update(next_page_token)
+        return messages
 
 
 # # Source
@@ -1044,33 +1235,330 @@ class SourceSproutSocial(AbstractSource):
         :param logger:  logger object
         :return Tuple[bool, any]: (True, None) if the input config can be used to connect to the API successfully, (False, error) otherwise.
         """
-        connection_url = f"https://api.sproutsocial.com/v1/metadata/client"
-        headers = {'Authorization': f"Bearer {config['api_key']}", 'Content-type': 'application/json'}
+        return api.check_connection(config)
+
+    def spec(self, logger: logging.Logger) -> ConnectorSpecification:
+        bundle = load_bundle()
+        if bundle:
+            return ConnectorSpecification.parse_obj(bundle["spec"])
+        return super().spec(logger)
+
+    def read(
+        self,
+        logger: logging.Logger,
+        config: Mapping[str, Any],
+        catalog: ConfiguredAirbyteCatalog,
+        state: Any = None,
+    ) -> Iterable[AirbyteMessage]:
+        """
+        Every stream of the read shares one `sync_context.SyncContext`, set up from the config:
+
+        - `max_concurrent_requests` / `max_requests_per_second`: every request attempt waits for a slot of one
+          `throttle.RequestBudget`;
+        - `adaptive_concurrency`: the number of in-flight analytics requests is tuned during the sync, starting from the
+          level saved by the previous one, and the last good level is saved for the next, see `autotune`;
+        - `hedge_percentile`: page requests slower than that percentile of their stream are hedged, see `hedging`;
+        - `profiling_dir` (or `SPROUT_SOCIAL_PROFILING_DIR` in the environment): the sync is profiled, and the time the
+          caller spends consuming each message is recorded as the `emit` phase of its stream, see `profiling`;
+        - `max_sync_minutes` / `max_stream_minutes`: streams stop at a checkpoint before their budget runs out and
+          streams that would start after the sync budget are skipped, see `timebox`.
+        """
+
+        context = SyncContext.from_config(config, state, logger=logger)
+        context.log_start(logger)
+        failure = None
+        with context:
+            try:
+                messages = self._read_streams(logger, config, catalog, state, context)
+                if context.profiler is None:
+                    yield from messages
+                else:
+                    for message in messages:
+                        with context.phase(message.record.stream if message.type == Type.RECORD else "sync", "emit"):
+                            yield message
+            except AirbyteTracedException as error:
+                # what the sync learned is still worth keeping when it fails
+                failure = error
+        context.log_summary(logger)
+        yield from context.state_messages()
+        if failure is not None:
+            raise failure
+
+    def _read_streams(
+        self, logger: logging.Logger, config: Mapping[str, Any], catalog: ConfiguredAirbyteCatalog, state: Any, context: SyncContext
+    ) -> Iterable[AirbyteMessage]:
+        """
+        The streams are built once at the start of the read and shared by every `AbstractSource.read` below.
+
+        With `coalesce_networks` set in the config, the selected analytics streams of each endpoint share one query.
+        A profile analytics stream with a selected rollup stream reads its rows once for itself and its rollups.
+
+        With `stream_concurrency` above 1 in the config, the configured streams are read in that many threads at once,
+        each through its own `AbstractSource.read` over a catalog of just that stream. Their messages are interleaved
+        on the calling thread, and a stream failing does not stop the others; the sync still fails at the end. Under a
+        time box the streams are read that way too, one at a time by default, so each can be skipped when it would start.
+
+        The customer metadata the streams are built from is reused from the state while it is fresh, see `metadata_cache`.
+        """
+
+        sharding.validate(config)
+        metadata = metadata_cache.load(config, state)
+        if metadata is not None and self._outdates_cached_metadata(config, catalog, metadata, logger):
+            metadata = None
+        if metadata is None:
+            metadata = self._take_prefetched_metadata(config) or self._fetch_customer_metadata(config, context)
+            if metadata_cache.ttl(config):
+                yield metadata_cache.state_message(config, metadata)
+        else:
+            logger.info(f"Using the customer metadata cached at {metadata.fetched_at.isoformat()}")
+        self._stream_instances = self._build_streams(config, metadata.customer_id, metadata.profile_ids)
+        for stream in self._stream_instances:
+            stream.sync_context = context
         try:
-            response = requests.get(url=connection_url, headers=headers)
-            response.raise_for_status()
-            return True, None
-        except Exception as e:
-            return False, e
+            selected_names = {configured_stream.stream.name for configured_stream in catalog.streams}
+            selected = [stream for stream in self._stream_instances if stream.name in selected_names]
+            # a preview caps each stream on its own, which a query shared by several streams cannot
+            if config.get("coalesce_networks") and not is_preview(config):
+                self._coalesce_analytics_streams(selected, logger)
+            destination_sync_modes = {configured_stream.stream.name: configured_stream.destination_sync_mode for configured_stream in catalog.streams}
+            for stream in selected:
+                if isinstance(stream, ProfileAnalyticsRollupStream) and stream.daily.daily_rows is None:
+                    stream.daily.daily_rows = rollups.DailyRows(stream.daily._read_daily_rows)
+                if isinstance(stream, PostAnalyticsStream):
+                    stream.pending_change_stores = []
+                    if config.get("post_change_store_dir"):
+                        stream.changes_only = self._appends_posts(stream, destination_sync_modes[stream.name], logger)
+            change_tracking = {stream.name: stream for stream in selected if isinstance(stream, PostAnalyticsStream)}
+
+            failure = None
+            stream_concurrency = config.get("stream_concurrency", 1)
+            try:
+                if (stream_concurrency <= 1 or len(catalog.streams) <= 1) and context.time_box is None:
+                    messages = super().read(logger, config, catalog, state)
+                else:
+                    messages = self._read_stream_by_stream(logger, config, catalog, state, context, stream_concurrency)
+                for message in messages:
+                    yield message
+                    # the caller is done with every record of the stream
+                    completed = completed_stream(message)
+                    if completed in change_tracking:
+                        change_tracking[completed].commit_changes()
+            except AirbyteTracedException as error:
+                failure = error
+
+            for stream in selected:
+                if getattr(stream, "excluded_profile_ids", None):
+                    logger.warning(
+                        f"{stream.name} was read without the rejected profiles {', '.join(str(profile_id) for profile_id in stream.excluded_profile_ids)}"
+                    )
+            if metadata.cached and any(getattr(stream, "profiles_rejected", False) for stream in self._stream_instances):
+                logger.info("An analytics request was rejected with cached customer metadata, refreshing it for the next sync")
+                yield metadata_cache.state_message(config, self._fetch_customer_metadata(config, context))
+            if failure is not None:
+                raise failure
+        finally:
+            for stream in self._stream_instances:
+                if isinstance(stream, AnalyticsStream):
+                    stream.coalesced_read = None
+                if isinstance(stream, PostAnalyticsStream):
+                    stream.discard_changes()
+                    stream.pending_change_stores = None
+                    stream.changes_only = False
+                if isinstance(stream, ProfileAnalyticsStream):
+                    stream.daily_rows = None
+            self._stream_instances = None
+
+    @staticmethod
+    def _appends_posts(stream: PostAnalyticsStream, destination_sync_mode: DestinationSyncMode, logger: logging.Logger) -> bool:
+        """
+        Whether the post stream can leave out the posts that did not change: an overwritten destination table would
+        lose them.
+        """
+
+        if destination_sync_mode == DestinationSyncMode.overwrite:
+            logger.warning(f"{stream.name} overwrites its destination, so every post is emitted despite `post_change_store_dir`")
+            return False
+        return True
+
+    @classmethod
+    def _outdates_cached_metadata(
+        cls, config: Mapping[str, Any], catalog: ConfiguredAirbyteCatalog, metadata: metadata_cache.CustomerMetadata, logger: logging.Logger
+    ) -> bool:
+        """
+        Whether the read needs the customer metadata looked up again rather than taken from the cache: the catalog
+        comes from a discover that did not use the cache, so it may name streams of profiles added since, and the
+        messages stream moves its cursor past whatever profiles it does not read.
+        """
+
+        selected_names = {configured_stream.stream.name for configured_stream in catalog.streams}
+        built = {stream.name: stream for stream in cls._build_streams(config, metadata.customer_id, metadata.profile_ids)}
+        if any(isinstance(built.get(name), Messages) for name in selected_names):
+            logger.info("Looking up the customer metadata again, since the messages cursor must cover every current profile")
+            return True
+        missing_names = selected_names - built.keys()
+        if missing_names:
+            logger.info(f"Looking up the customer metadata again, since the cached profiles build none of {', '.join(sorted(missing_names))}")
+            return True
+        return False
+
+    def _read_stream_by_stream(
+        self,
+        logger: logging.Logger,
+        config: Mapping[str, Any],
+        catalog: ConfiguredAirbyteCatalog,
+        state: Any,
+        context: SyncContext,
+        stream_concurrency: int,
+    ) -> Iterable[AirbyteMessage]:
+        failed_streams = []
+        streams = {stream.name: stream for stream in self._stream_instances}
+
+        def read_stream(configured_stream) -> Iterable[AirbyteMessage]:
+            # analytics streams are full refresh, with no checkpoint to stop at once started
+            stream = streams.get(configured_stream.stream.name)
+            planned_pages = stream.planned_pages if isinstance(stream, AnalyticsStream) else None
+            if not context.start_stream(configured_stream.stream.name, planned_pages):
+                return
+            try:
+                yield from super(SourceSproutSocial, self).read(logger, config, ConfiguredAirbyteCatalog(streams=[configured_stream]), state)
+            except AirbyteTracedException:
+                # the stream's own error trace message has already been emitted
+                failed_streams.append(configured_stream.stream.name)
+
+        sources = [partial(read_stream, configured_stream) for configured_stream in catalog.streams]
+        if stream_concurrency > 1:
+            logger.info(f"Reading {len(catalog.streams)} streams with a concurrency of {stream_concurrency}")
+            yield from interleave(sources, max_workers=stream_concurrency)
+        else:
+            for source in sources:
+                yield from source()
+
+        if failed_streams:
+            error_message = f"During the sync, the following streams did not sync successfully: {', '.join(sorted(failed_streams))}"
+            raise AirbyteTracedException(message=error_message, internal_message=error_message, failure_type=FailureType.config_error)
+
+    @staticmethod
+    def _coalesce_analytics_streams(streams: List[Stream], logger: logging.Logger) -> Dict[AnalyticsStream, List[AnalyticsStream]]:
+        """
+        Give the analytics streams of each endpoint a shared `coalesce.CoalescedRead` when more than one network is selected.
+
+        :return: the streams of each shared query, by the stream that runs it.
+        """
+
+        coalesced = {}
+        for stream_class in (ProfileAnalyticsStream, PostAnalyticsStream):
+            members = [stream for stream in streams if type(stream) is stream_class]
+            if len(members) < 2:
+                continue
+
+            combined_kwargs = dict(
+                config=members[0].config,
+                customer_id=members[0]._get_customer_id(),
+                network=combined_network([stream.network for stream in members]),
+                profile_ids=[profile_id for stream in members for profile_id in stream.profile_ids],
+            )
+            if stream_class is PostAnalyticsStream:
+                combined_kwargs["post_filters"] = members[0].post_filters
+            combined = stream_class(**combined_kwargs)
+            combined.sync_context = members[0].sync_context
+            combined.combines_networks = True
+            coalesced_read = CoalescedRead(
+                read_rows=partial(combined.read_records, sync_mode=SyncMode.full_refresh),
+                profile_networks={profile_id: stream.network.network_type for stream in members for profile_id in stream.profile_ids},
+                profile_id=stream_class.row_profile_id,
+            )
+            logger.info(f"Coalescing {', '.join(stream.name for stream in members)} into one query")
+            for stream in members:
+                stream.coalesced_read = coalesced_read
+            coalesced[combined] = members
+        return coalesced
+
+    @property
+    def raise_exception_on_missing_stream(self) -> bool:
+        """
+        Analytics streams only exist for networks the customer has profiles on, so a configured catalog may name
+        streams that are not built for this account. Those are skipped instead of failing the sync.
+        """
+        return False
 
     def streams(self, config: Mapping[str, Any]) -> List[Stream]:
         """
         :param config: A Mapping of the user input configuration as defined in the connector spec.
+
+        Analytics streams are built for every network type in `networks.NETWORKS` that has at least one profile.
+        During a read, the streams built at its start are returned again, so they are shared by every stream's read.
         """
 
-        return [ClientMetadata(config=config),
-                CustomerProfiles(config=config),
-                CustomerTags(config=config),
-                CustomerGroups(config=config),
-                CustomerUsers(config=config),
-                TiktokProfileAnalytics(config=config),
-                TiktokPostAnalytics(config=config),
-                FacebookProfileAnalytics(config=config),
-                FacebookPostAnalytics(config=config),
-                InstagramProfileAnalytics(config=config),
-                InstagramPostAnalytics(config=config),
-                TwitterProfileAnalytics(config=config),
-                TwitterPostAnalytics(config=config),
-                ]
-        
-        
+        if getattr(self, "_stream_instances", None):
+            return list(self._stream_instances)
+
+        metadata = self._fetch_customer_metadata(config)
+        # kept for a read following right away with the same config, e.g. an export's, so it does not look it up again
+        self._prefetched_metadata = (config, metadata)
+        return self._build_streams(config, metadata.customer_id, metadata.profile_ids)
+
+    def _take_prefetched_metadata(self, config: Mapping[str, Any]) -> Optional[metadata_cache.CustomerMetadata]:
+        """
+        :return: the metadata `streams` last looked up, if it was for `config`, once.
+        """
+
+        prefetched, self._prefetched_metadata = getattr(self, "_prefetched_metadata", None), None
+        if prefetched is None or prefetched[0] != config:
+            return None
+        return prefetched[1]
+
+    @staticmethod
+    def _fetch_customer_metadata(config: Mapping[str, Any], context: SyncContext = IDLE) -> metadata_cache.CustomerMetadata:
+        sharding.validate(config)
+        customer_profiles = CustomerProfiles(config=config)
+        customer_profiles.sync_context = context
+        customer_id = customer_profiles._get_customer_id()
+        profile_ids = customer_profiles._get_customer_profile_ids()
+
+        for network_type in sorted(profile_ids.keys() - NETWORKS.keys()):
+            logger.info(f"Skipping analytics for network type {network_type}: no metrics are defined for it")
+
+        return metadata_cache.CustomerMetadata(customer_id=customer_id, profile_ids=profile_ids)
+
+    @staticmethod
+    def _build_streams(config: Mapping[str, Any], customer_id: int, profile_ids: Mapping[str, List[int]]) -> List[Stream]:
+        """
+        With `shard_count` set, only this shard's profiles get analytics streams, and only shard 0 gets the metadata streams.
+        With `profile_rollups` set, each profile analytics stream is followed by its rollup streams.
+        """
+
+        streams = []
+        if sharding.is_primary_shard(config):
+            streams += [ClientMetadata(config=config, customer_id=customer_id),
+                        CustomerProfiles(config=config, customer_id=customer_id),
+                        CustomerTags(config=config, customer_id=customer_id),
+                        CustomerGroups(config=config, customer_id=customer_id),
+                        CustomerUsers(config=config, customer_id=customer_id),
+                        ]
+        profile_ids = sharding.shard_profile_ids(config, customer_id, profile_ids)
+
+        # tags and users are looked up once per sync, on the first post read
+        metadata_timeout = deadlines.timeout(config, deadlines.METADATA)
+        lookups = (
+            LookupIndexes(config["api_key"], customer_id, url_base=SproutSocialStream.url_base, timeout=metadata_timeout)
+            if config.get("enrich_posts")
+            else None
+        )
+        post_filters = (
+            filters.PostFilters(config, customer_id, url_base=SproutSocialStream.url_base, timeout=metadata_timeout)
+            if filters.PostFilters.configured(config)
+            else None
+        )
+        for network in analytics_networks(profile_ids):
+            analytics_kwargs = dict(config=config, customer_id=customer_id, network=network, profile_ids=profile_ids[network.network_type])
+            profile_stream = ProfileAnalyticsStream(**analytics_kwargs)
+            streams.append(profile_stream)
+            streams.append(PostAnalyticsStream(lookups=lookups, post_filters=post_filters, **analytics_kwargs))
+            streams += [ProfileAnalyticsRollupStream(daily=profile_stream, period=period) for period in config.get("profile_rollups") or []]
+
+        # messages are read for the profiles of every network, including those without analytics
+        message_profile_ids = sorted(profile_id for ids in profile_ids.values() for profile_id in ids)
+        if message_profile_ids:
+            streams.append(Messages(config=config, customer_id=customer_id, profile_ids=message_profile_ids))
+
+        return streams
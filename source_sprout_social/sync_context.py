@@ -0,0 +1,173 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+The state one `read` shares between its streams.
+
+Each optional behaviour of a sync is set up from the config by its own module, and a `SyncContext` holds the ones
+that are switched on:
+
+- `budget`, a `throttle.RequestBudget`, from `max_concurrent_requests` / `max_requests_per_second`;
+- `controller`, an `autotune.ConcurrencyController`, from `adaptive_concurrency`;
+- `hedger`, a `hedging.Hedger`, from `hedge_percentile`;
+- `profiler`, a `profiling.SyncProfiler`, from `profiling_dir`;
+- `time_box`, a `timebox.TimeBox`, from `max_sync_minutes` / `max_stream_minutes`.
+
+`read` builds one context and hands it to every stream it builds, which send their requests, time their phases and
+slice their reads through it. A hook whose behaviour is off does nothing. Streams built outside a read, e.g. for
+`discover`, keep `IDLE`, which has every behaviour off. Nothing is process-wide, so two reads in one process, e.g. an
+`export` next to a sync, never share or overwrite each other's state.
+"""
+
+import logging
+from contextlib import contextmanager, nullcontext
+from time import monotonic
+from typing import Any, Callable, ContextManager, Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+from airbyte_cdk.models import AirbyteMessage
+
+from .autotune import ConcurrencyController
+from .hedging import Hedger
+from .profiling import SyncProfiler
+from .throttle import RequestBudget
+from .timebox import TimeBox
+
+T = TypeVar("T")
+
+
+class SyncContext:
+    def __init__(
+        self,
+        budget: Optional[RequestBudget] = None,
+        controller: Optional[ConcurrencyController] = None,
+        hedger: Optional[Hedger] = None,
+        profiler: Optional[SyncProfiler] = None,
+        time_box: Optional[TimeBox] = None,
+    ):
+        self.budget = budget
+        self.controller = controller
+        self.hedger = hedger
+        self.profiler = profiler
+        self.time_box = time_box
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], state: Any = None, logger: Optional[logging.Logger] = None) -> "SyncContext":
+        return cls(
+            budget=RequestBudget.from_config(config),
+            controller=ConcurrencyController.from_config(config, state, logger=logger),
+            hedger=Hedger.from_config(config),
+            profiler=SyncProfiler.from_config(config),
+            time_box=TimeBox.from_config(config, logger=logger),
+        )
+
+    def phase(self, stream: str, name: str) -> ContextManager[None]:
+        """
+        Time the enclosed block as phase `name` of `stream` when the sync is profiled.
+        """
+
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(stream, name)
+
+    @contextmanager
+    def request_slot(self, tuned: bool = False) -> Iterator[None]:
+        """
+        Hold a slot of the request budget for the enclosed request attempt, and one of the concurrency controller when
+        the request is `tuned`.
+        """
+
+        with self.budget.slot() if self.budget is not None else nullcontext():
+            with self.controller.slot() if tuned and self.controller is not None else nullcontext():
+                yield
+
+    def send(self, key: str, send_attempt: Callable[[], T], retry: bool = False) -> T:
+        """
+        Call `send_attempt`, hedging it when the sync hedges requests, and time it for the time box.
+        """
+
+        with self.timed_request():
+            return send_attempt() if self.hedger is None else self.hedger.send(key, send_attempt, retry=retry)
+
+    @contextmanager
+    def timed_request(self) -> Iterator[None]:
+        """
+        Time the enclosed request, when it succeeds, for the time box to plan the streams with.
+        """
+
+        started = monotonic()
+        yield
+        if self.time_box is not None:
+            self.time_box.record_request(monotonic() - started)
+
+    def backoff_started(self, key: str) -> None:
+        if self.hedger is not None:
+            self.hedger.backoff_started(key)
+
+    def backoff_ended(self, key: str) -> None:
+        if self.hedger is not None:
+            self.hedger.backoff_ended(key)
+
+    def start_stream(self, stream: str, planned_pages: Optional[Callable[[], Optional[int]]] = None) -> bool:
+        """
+        :return: whether `stream` may be read within the time box, always True without one.
+        """
+
+        return self.time_box is None or self.time_box.start_stream(stream, planned_pages)
+
+    def slices(self, stream: str, stream_slices: Iterable[T]) -> Iterable[T]:
+        """
+        :return: the slices of `stream` that fit in the time box, all of them without one.
+        """
+
+        if self.time_box is None:
+            return stream_slices
+        return self.time_box.slices(stream, stream_slices)
+
+    def state_messages(self) -> List[AirbyteMessage]:
+        """
+        :return: what the sync learned for the next one.
+        """
+
+        return [self.controller.state_message()] if self.controller is not None else []
+
+    def log_start(self, logger: logging.Logger) -> None:
+        if self.controller is not None:
+            logger.info(
+                f"Adaptive concurrency: starting at {self.controller.limit} in-flight analytics requests, at most {self.controller.max_limit}"
+            )
+        if self.profiler is not None:
+            logger.info(f"Profiling sync phases into {self.profiler.output_dir}")
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        if self.budget is not None:
+            logger.info(f"Request budget: {self.budget.requests} requests, {self.budget.wait_seconds:.2f}s spent waiting for a slot")
+        if self.controller is not None:
+            controller = self.controller
+            logger.info(
+                f"Adaptive concurrency: ended at {controller.limit}, last good level {controller.good_limit}, "
+                f"{controller.increases} increases and {controller.decreases} decreases over {controller.requests} requests"
+            )
+        if self.hedger is not None:
+            logger.info(f"Hedging: {self.hedger.hedges} of {self.hedger.requests} requests hedged, {self.hedger.hedges_won} hedges answered first")
+        time_box = self.time_box
+        if time_box is not None and (time_box.stopped_streams or time_box.skipped_streams):
+            logger.warning(
+                f"Time box: stopped early {', '.join(sorted(time_box.stopped_streams)) or 'no streams'}, "
+                f"skipped {', '.join(sorted(time_box.skipped_streams)) or 'no streams'}; the next sync continues from the last state"
+            )
+
+    def __enter__(self) -> "SyncContext":
+        if self.profiler is not None:
+            self.profiler.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.hedger is not None:
+            self.hedger.close()
+        if self.profiler is not None:
+            self.profiler.__exit__(*exc)
+
+
+# the context of streams built outside a read, with every behaviour off
+IDLE = SyncContext()
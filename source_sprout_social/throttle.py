@@ -0,0 +1,68 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+A request budget shared by every stream of a sync.
+
+When `max_concurrent_requests` or `max_requests_per_second` is set in the config, the `sync_context.SyncContext` of
+a read holds a `RequestBudget`, and every API request attempt of the read waits for a slot in it, whichever stream or
+thread it is sent from. This keeps concurrent stream reads and metric groups within one global limit.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping, Optional
+
+
+class RequestBudget:
+    def __init__(self, max_concurrent_requests: Optional[int] = None, max_requests_per_second: Optional[float] = None):
+        if max_concurrent_requests is not None and max_concurrent_requests < 1:
+            raise ValueError(f"max_concurrent_requests must be a positive integer, got {max_concurrent_requests}")
+        if max_requests_per_second is not None and max_requests_per_second <= 0:
+            raise ValueError(f"max_requests_per_second must be positive, got {max_requests_per_second}")
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_requests_per_second = max_requests_per_second
+        self._semaphore = threading.BoundedSemaphore(max_concurrent_requests) if max_concurrent_requests else None
+        self._lock = threading.Lock()
+        self._next_request_at = 0.0
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> Optional["RequestBudget"]:
+        max_concurrent_requests = config.get("max_concurrent_requests")
+        max_requests_per_second = config.get("max_requests_per_second")
+        if not max_concurrent_requests and not max_requests_per_second:
+            return None
+        return cls(max_concurrent_requests or None, max_requests_per_second or None)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one of the concurrent request slots for the enclosed request, once the rate limit lets it start.
+        """
+
+        started = time.perf_counter()
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            self._wait_for_rate()
+            with self._lock:
+                self.requests += 1
+                self.wait_seconds += time.perf_counter() - started
+            yield
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def _wait_for_rate(self) -> None:
+        if not self.max_requests_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at)
+            self._next_request_at = start_at + 1 / self.max_requests_per_second
+        if start_at > now:
+            time.sleep(start_at - now)
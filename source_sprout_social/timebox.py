@@ -0,0 +1,136 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+Wall-clock budgets for a sync and for each of its streams, so a sync stops on its own at a checkpoint instead of
+being killed mid-stream.
+
+When `max_sync_minutes` or `max_stream_minutes` is set in the config, the `sync_context.SyncContext` of a read holds a
+`TimeBox`. Streams are then read one by one (or `stream_concurrency` at a time), and a stream that would start once
+the sync budget is spent is skipped. A sliced stream checks the budgets before each slice: once the time left is less
+than its longest slice so far, it stops slicing, so the slice in flight finishes, its state is emitted by the CDK as
+usual, and the stream ends cleanly. The next sync continues from that state.
+
+Only the slices of incremental streams are checkpoints; a full refresh stream that has started is read to the end.
+The analytics streams are full refresh, so one is only started when its planned duration fits in the time left: its
+page count, from the page-count query its read sends anyway, times the mean duration of the requests of the sync so far.
+Page-count queries ask for less than the pages, and metadata requests are faster, so the plan is a lower bound.
+"""
+
+import logging
+import threading
+from time import monotonic
+from typing import Any, Callable, Iterable, List, Mapping, MutableMapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TimeBox:
+    def __init__(self, max_sync_seconds: Optional[float] = None, max_stream_seconds: Optional[float] = None, logger: Optional[logging.Logger] = None):
+        if max_sync_seconds is not None and max_sync_seconds <= 0:
+            raise ValueError(f"the sync time budget must be positive, got {max_sync_seconds}s")
+        if max_stream_seconds is not None and max_stream_seconds <= 0:
+            raise ValueError(f"the stream time budget must be positive, got {max_stream_seconds}s")
+        self.max_sync_seconds = max_sync_seconds
+        self.max_stream_seconds = max_stream_seconds
+        self.logger = logger or logging.getLogger("airbyte")
+        self.started_at = monotonic()
+        self.skipped_streams: List[str] = []
+        self.stopped_streams: List[str] = []
+        self._stream_started_at: MutableMapping[str, float] = {}
+        self._requests = 0
+        self._request_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], logger: Optional[logging.Logger] = None) -> Optional["TimeBox"]:
+        max_sync_minutes = config.get("max_sync_minutes")
+        max_stream_minutes = config.get("max_stream_minutes")
+        if not max_sync_minutes and not max_stream_minutes:
+            return None
+        return cls(
+            max_sync_seconds=max_sync_minutes * 60 if max_sync_minutes else None,
+            max_stream_seconds=max_stream_minutes * 60 if max_stream_minutes else None,
+            logger=logger,
+        )
+
+    def remaining(self, stream: str) -> float:
+        """
+        :return: the seconds left to `stream`, the lower of what is left of the sync budget and of its own.
+        """
+
+        now = monotonic()
+        remaining = float("inf")
+        if self.max_sync_seconds is not None:
+            remaining = self.max_sync_seconds - (now - self.started_at)
+        if self.max_stream_seconds is not None:
+            remaining = min(remaining, self.max_stream_seconds - (now - self._stream_started_at.get(stream, now)))
+        return remaining
+
+    @property
+    def request_seconds(self) -> Optional[float]:
+        """
+        The mean duration of the requests of the sync so far, None before the first one.
+        """
+
+        with self._lock:
+            return self._request_seconds / self._requests if self._requests else None
+
+    def record_request(self, seconds: float) -> None:
+        with self._lock:
+            self._requests += 1
+            self._request_seconds += seconds
+
+    def start_stream(self, stream: str, planned_pages: Optional[Callable[[], Optional[int]]] = None) -> bool:
+        """
+        Start the budget of `stream`, unless the sync budget is already spent, or the stream cannot stop early and its
+        planned duration exceeds the time left.
+
+        :param planned_pages: for a stream without checkpoints, returns the pages it reads one after the other, or None
+            when they are unknown.
+        :return: whether the stream may be read.
+        """
+
+        if self.remaining(stream) > 0 and planned_pages is not None:
+            pages = planned_pages()
+            request_seconds = self.request_seconds
+            if pages is not None and request_seconds is not None:
+                planned = pages * request_seconds
+                remaining = self.remaining(stream)
+                if planned > remaining:
+                    with self._lock:
+                        self.skipped_streams.append(stream)
+                    self.logger.warning(
+                        f"Time box: skipping {stream}, its {pages} pages are planned to take {planned:.0f}s and {max(remaining, 0):.0f}s are left"
+                    )
+                    return False
+
+        with self._lock:
+            if self.remaining(stream) <= 0:
+                self.skipped_streams.append(stream)
+                self.logger.warning(f"Time box: skipping {stream}, the sync budget is spent")
+                return False
+            self._stream_started_at[stream] = monotonic()
+            return True
+
+    def slices(self, stream: str, stream_slices: Iterable[T]) -> Iterable[T]:
+        """
+        Yield the slices of `stream` while the time left exceeds the longest slice so far.
+        """
+
+        longest = 0.0
+        for stream_slice in stream_slices:
+            remaining = self.remaining(stream)
+            if remaining <= longest:
+                with self._lock:
+                    self.stopped_streams.append(stream)
+                self.logger.warning(
+                    f"Time box: stopping {stream} at its last completed slice, {max(remaining, 0):.0f}s left "
+                    f"and the longest slice took {longest:.0f}s"
+                )
+                return
+            started = monotonic()
+            yield stream_slice
+            # the CDK asks for the next slice once the records of this one have been emitted and checkpointed
+            longest = max(longest, monotonic() - started)
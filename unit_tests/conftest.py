@@ -0,0 +1,91 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+"""
+What the unit tests share: the API they mock with `requests_mock`, the account behind it, its post analytics, a post
+analytics stream, and configured catalogs.
+"""
+
+from typing import Any, Iterable, List, Mapping, Optional
+
+import pytest
+from airbyte_cdk.models import ConfiguredAirbyteCatalog
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import PostAnalyticsStream
+
+API = "https://api.sproutsocial.com/v1/"
+CUSTOMER_ID = 7
+TWITTER_PROFILE = {"customer_profile_id": 1, "network_type": "twitter"}
+POSTS_URL = API + f"{CUSTOMER_ID}/analytics/posts"
+
+
+def twitter_profiles(profile_ids: Iterable[int]) -> List[Mapping[str, Any]]:
+    return [{"customer_profile_id": profile_id, "network_type": "twitter"} for profile_id in profile_ids]
+
+
+def posts_page(rows: Iterable[Mapping[str, Any]], total_pages: int = 1, current_page: int = 1) -> Mapping[str, Any]:
+    return {"data": list(rows), "paging": {"current_page": current_page, "total_pages": total_pages}}
+
+
+def configured_catalog(
+    names: Iterable[str], sync_mode: str = "full_refresh", destination_sync_mode: Optional[str] = None
+) -> ConfiguredAirbyteCatalog:
+    return ConfiguredAirbyteCatalog.parse_obj(
+        {
+            "streams": [
+                {
+                    "stream": {"name": name, "json_schema": {}, "supported_sync_modes": ["full_refresh", "incremental"]},
+                    "sync_mode": sync_mode,
+                    "destination_sync_mode": destination_sync_mode or ("append" if sync_mode == "incremental" else "overwrite"),
+                }
+                for name in names
+            ]
+        }
+    )
+
+
+@pytest.fixture
+def mock_account(requests_mock):
+    """
+    :return: a function mocking the customer lookups of customer 7 with `profiles`, one twitter profile by default,
+        and returning the `metadata/client` and `metadata/customer` matchers.
+    """
+
+    def mock(profiles: Iterable[Mapping[str, Any]] = (TWITTER_PROFILE,)):
+        client = requests_mock.get(API + "metadata/client", json={"data": [{"customer_id": CUSTOMER_ID}]})
+        customer = requests_mock.get(API + f"{CUSTOMER_ID}/metadata/customer", json={"data": list(profiles)})
+        return client, customer
+
+    return mock
+
+
+@pytest.fixture
+def mock_posts(requests_mock):
+    """
+    :return: a function mocking the post analytics of customer 7 with the `requests_mock` responses it is given, one
+        page holding one post by default, and returning the matcher.
+    """
+
+    def mock(*responses, **response):
+        if not responses and not response:
+            response = {"json": posts_page([{"perma_link": "a"}])}
+        return requests_mock.post(POSTS_URL, *responses, **response)
+
+    return mock
+
+
+@pytest.fixture
+def post_stream():
+    """
+    :return: a function building the twitter post analytics stream of customer 7 over `profile_ids` with `config`,
+        whose page count is set to `total_pages` when given, instead of being requested.
+    """
+
+    def build(total_pages: Optional[int] = None, profile_ids: Iterable[int] = (1,), **config) -> PostAnalyticsStream:
+        stream = PostAnalyticsStream(config=dict({"api_key": "key"}, **config), customer_id=CUSTOMER_ID, network=TWITTER, profile_ids=list(profile_ids))
+        if total_pages is not None:
+            stream.total_pages = total_pages
+        return stream
+
+    return build
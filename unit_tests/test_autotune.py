@@ -0,0 +1,155 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+import threading
+import time
+
+import pytest
+import requests
+from airbyte_cdk.models import Type
+from airbyte_cdk.sources.connector_state_manager import ConnectorStateManager
+from source_sprout_social import autotune, connector_state
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import configured_catalog
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} error", response=response)
+
+
+def throttled():
+    return http_error(429)
+
+
+def complete(controller, count, error=None):
+    for _ in range(count):
+        try:
+            with controller.slot():
+                if error is not None:
+                    raise error
+        except type(error):
+            pass
+
+
+def test_limit_grows_by_one_per_healthy_window():
+    controller = autotune.ConcurrencyController(initial_limit=2, max_limit=4)
+
+    complete(controller, 2)
+    assert controller.limit == 3
+    complete(controller, 3)
+    assert controller.limit == 4
+    complete(controller, 10)
+    assert (controller.limit, controller.good_limit, controller.increases) == (4, 4, 2)
+
+
+def test_throttling_halves_the_limit_at_once_then_once_per_window():
+    controller = autotune.ConcurrencyController(initial_limit=8, max_limit=8)
+
+    complete(controller, 1, error=throttled())
+    assert controller.limit == 4
+    complete(controller, 3, error=throttled())
+    assert controller.limit == 4
+    complete(controller, 1, error=throttled())
+    assert (controller.limit, controller.good_limit, controller.decreases) == (2, 2, 2)
+
+
+@pytest.mark.parametrize("error", [http_error(500), http_error(503), requests.exceptions.ReadTimeout("timed out")], ids=["500", "503", "timeout"])
+def test_server_errors_and_timeouts_neither_grow_nor_shrink_the_limit(error):
+    controller = autotune.ConcurrencyController(initial_limit=2, max_limit=4)
+
+    complete(controller, 10, error=error)
+    assert (controller.limit, controller.increases, controller.decreases) == (2, 0, 0)
+    # and break a healthy streak
+    complete(controller, 1)
+    complete(controller, 1, error=error)
+    complete(controller, 1)
+    assert controller.limit == 2
+
+
+def test_latency_spike_halves_the_limit():
+    controller = autotune.ConcurrencyController(initial_limit=16, max_limit=16)
+    # attempts as if they had been in flight at once
+    controller.in_flight = 17
+    for _ in range(16):
+        controller._complete(0.1, autotune.HEALTHY)
+
+    controller._complete(1.0, autotune.HEALTHY)
+
+    assert controller.limit == 8
+
+
+def test_client_errors_do_not_count_as_overload():
+    controller = autotune.ConcurrencyController(initial_limit=1, max_limit=4)
+
+    complete(controller, 1, error=ValueError("bad record"))
+
+    assert controller.limit == 2
+
+
+def test_in_flight_requests_stay_within_the_limit():
+    controller = autotune.ConcurrencyController(initial_limit=2, max_limit=2)
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def request():
+        with controller.slot():
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+
+
+@pytest.mark.parametrize("config, saved, expected", [({}, None, 2), ({}, 5, 5), ({"max_concurrent_requests": 4}, 20, 4)])
+def test_starts_from_the_saved_level(config, saved, expected):
+    state = [connector_state.message(autotune.LEVEL_STREAM, {"limit": saved}).state] if saved else None
+
+    controller = autotune.ConcurrencyController.from_config(dict(config, adaptive_concurrency=True), state)
+
+    assert controller.limit == expected
+
+
+def test_read_saves_the_last_good_level(mock_posts, mock_account):
+    mock_account()
+    mock_posts()
+    catalog = configured_catalog([TWITTER.post_stream_name])
+    state = [connector_state.message(autotune.LEVEL_STREAM, {"limit": 1}).state]
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), {"api_key": "key", "adaptive_concurrency": True}, catalog, state))
+
+    (level,) = [
+        message.state.stream.stream_state.dict()
+        for message in messages
+        if message.type == Type.STATE and message.state.stream.stream_descriptor.name == autotune.LEVEL_STREAM
+    ]
+    # the page count, the availability check and the read each completed a healthy window
+    assert level["limit"] > 1
+
+
+def test_saved_level_round_trips_through_the_cdk_state_manager(caplog):
+    saved = autotune.ConcurrencyController(initial_limit=6, max_limit=16)
+    message = saved.state_message().state
+    # what an orchestrator hands back from the emitted message, per stream or as a legacy dict
+    manager = ConnectorStateManager(stream_instance_map={}, state=[message])
+    legacy = {autotune.LEVEL_STREAM: manager.get_stream_state(autotune.LEVEL_STREAM, None)}
+
+    for state in ([message], legacy):
+        assert autotune.ConcurrencyController.from_config({"adaptive_concurrency": True}, state).limit == 6
+
+    dropped = autotune.ConcurrencyController.from_config({"adaptive_concurrency": True}, {"messages": {"created_time": "2024-01-01"}})
+    assert dropped.limit == autotune.DEFAULT_INITIAL_LIMIT
+    assert "adaptive concurrency starts again from 2" in caplog.text
@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+from airbyte_cdk.models import SyncMode
+from source_sprout_social.change_detection import ChangeTracker, content_hash
+from source_sprout_social.source import CustomerTags
+
+from .conftest import API
+
+TAGS = [{"tag_id": 1, "text": "launch", "active": True}, {"tag_id": 2, "text": "promo", "active": True}]
+
+
+def read_tags(requests_mock, tags, state=None, **config):
+    requests_mock.get(API + "7/metadata/customer/tags", json={"data": tags})
+    stream = CustomerTags(config=dict({"api_key": "key"}, **config), customer_id=7)
+    stream.state = state
+    records = list(stream.read_records(sync_mode=SyncMode.incremental))
+    return records, stream.state
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": {"c": 2, "d": 3}}) == content_hash({"b": {"d": 3, "c": 2}, "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+    assert len(content_hash({"a": 1})) == 16
+
+
+def test_change_tracker_reports_changed_and_deleted_keys():
+    previous = ChangeTracker()
+    previous.observe(1, {"text": "a"})
+    previous.observe(2, {"text": "b"})
+
+    tracker = ChangeTracker(previous.hashes)
+    assert not tracker.observe(1, {"text": "a"})
+    assert tracker.observe(3, {"text": "c"})
+    assert list(tracker.deleted_keys()) == [2]
+
+
+def test_first_incremental_sync_emits_every_record(requests_mock):
+    records, state = read_tags(requests_mock, TAGS)
+
+    assert [record["tag_id"] for record in records] == [1, 2]
+    assert all(record["_ab_cdc_updated_at"] for record in records)
+    assert set(state["hashes"]) == {"1", "2"}
+
+
+def test_incremental_sync_emits_only_changed_records(requests_mock):
+    _, state = read_tags(requests_mock, TAGS)
+    changed = [TAGS[0], dict(TAGS[1], active=False), {"tag_id": 3, "text": "new", "active": True}]
+
+    records, state = read_tags(requests_mock, changed, state=state)
+
+    assert [record["tag_id"] for record in records] == [2, 3]
+    assert read_tags(requests_mock, changed, state=state)[0] == []
+
+
+def test_tombstones_are_emitted_for_removed_records_only_when_enabled(requests_mock):
+    _, state = read_tags(requests_mock, TAGS)
+
+    assert read_tags(requests_mock, TAGS[:1], state=state)[0] == []
+
+    records, new_state = read_tags(requests_mock, TAGS[:1], state=state, metadata_tombstones=True)
+    assert len(records) == 1
+    assert records[0]["tag_id"] == 2
+    assert records[0]["_ab_cdc_deleted_at"] == records[0]["_ab_cdc_updated_at"]
+    assert set(new_state["hashes"]) == {"1"}
+
+
+def test_full_refresh_emits_every_record(requests_mock):
+    _, state = read_tags(requests_mock, TAGS)
+    stream = CustomerTags(config={"api_key": "key"}, customer_id=7)
+    stream.state = state
+
+    assert len(list(stream.read_records(sync_mode=SyncMode.full_refresh))) == 2
@@ -0,0 +1,82 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+import json
+import logging
+
+import pytest
+from airbyte_cdk.models import Type
+from source_sprout_social.coalesce import CoalescedRead, combined_network
+from source_sprout_social.networks import FACEBOOK, TWITTER
+from source_sprout_social.source import SourceSproutSocial
+from .conftest import API, configured_catalog
+PROFILES = [
+    {"customer_profile_id": 1, "network_type": "facebook"},
+    {"customer_profile_id": 2, "network_type": "twitter"},
+]
+
+def profile_rows(request, context):
+    body = request.json()
+    return {
+        "data": [
+            {"dimensions": {"customer_profile_id": profile_id, "reporting_period.by(day)": "2023-01-01"}, "metrics": {m: 1 for m in body["metrics"]}}
+            for profile_id in (1, 2)
+            if str(profile_id) in body["filters"][0]
+        ],
+        "paging": {"current_page": 1, "total_pages": 1},
+    }
+
+def test_combined_network_unions_metrics_in_order():
+    network = combined_network([TWITTER, FACEBOOK])
+
+    assert network.profile_metrics[: len(TWITTER.profile_metrics)] == TWITTER.profile_metrics
+    assert set(network.profile_metrics) == set(TWITTER.profile_metrics) | set(FACEBOOK.profile_metrics)
+    assert len(network.profile_metrics) == len(set(network.profile_metrics))
+
+def test_coalesced_read_runs_the_query_once():
+    calls = []
+
+    def read_rows():
+        calls.append(1)
+        return [{"customer_profile_id": 1}, {"customer_profile_id": 2}, {"customer_profile_id": 3}]
+
+    coalesced = CoalescedRead(read_rows, {1: "facebook", 2: "twitter"}, lambda row: row["customer_profile_id"])
+
+    assert coalesced.rows_for("twitter") == [{"customer_profile_id": 2}]
+    assert coalesced.rows_for("facebook") == [{"customer_profile_id": 1}]
+    assert coalesced.rows_for("tiktok") == []
+    assert len(calls) == 1
+    # handed out once, so the stream that took them holds the only reference
+    assert coalesced.rows_for("twitter") == []
+
+def test_failed_query_is_raised_to_every_network_without_running_again():
+    calls = []
+    def read_rows():
+        calls.append(1)
+        yield {"customer_profile_id": 1}
+        raise ConnectionError("reset")
+
+    coalesced = CoalescedRead(read_rows, {1: "facebook", 2: "twitter"}, lambda row: row["customer_profile_id"])
+
+    for network_type in ("facebook", "twitter"):
+        with pytest.raises(ConnectionError):
+            coalesced.rows_for(network_type)
+    assert len(calls) == 1
+
+def test_profile_analytics_of_selected_networks_share_one_query(requests_mock, mock_account):
+    mock_account(PROFILES)
+    analytics = requests_mock.post(API + "7/analytics/profiles", json=profile_rows)
+    config = {"api_key": "key", "coalesce_networks": True}
+    messages = list(
+        SourceSproutSocial().read(
+            logging.getLogger("airbyte"), config, configured_catalog(["facebook_profile_analytics", "twitter_profile_analytics"])
+        )
+    )
+    records = {message.record.stream: message.record.data for message in messages if message.type == Type.RECORD}
+    assert records["facebook_profile_analytics"]["dimensions"]["customer_profile_id"] == 1
+    assert set(records["facebook_profile_analytics"]["metrics"]) == set(FACEBOOK.profile_metrics)
+    assert records["twitter_profile_analytics"]["dimensions"]["customer_profile_id"] == 2
+    assert set(records["twitter_profile_analytics"]["metrics"]) == set(TWITTER.profile_metrics)
+    data_requests = [json.loads(request.body) for request in analytics.request_history if len(json.loads(request.body)["metrics"]) > 1]
+    assert len(data_requests) == 1
+    assert data_requests[0]["filters"][0] == "customer_profile_id.eq(1,2)"
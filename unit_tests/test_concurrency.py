@@ -0,0 +1,158 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+import threading
+import time
+
+import pytest
+from airbyte_cdk.models import SyncMode, Type
+from airbyte_cdk.utils.traced_exception import AirbyteTracedException
+from source_sprout_social import throttle
+from source_sprout_social.concurrency import interleave
+from source_sprout_social.source import CustomerTags, SourceSproutSocial
+from source_sprout_social.sync_context import IDLE, SyncContext
+
+from .conftest import API, configured_catalog
+
+METADATA_STREAMS = ["customer_profiles", "customer_tags", "customer_groups", "customer_users"]
+
+
+@pytest.fixture
+def metadata_api(requests_mock, mock_account):
+    mock_account()
+    requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": 1}, {"tag_id": 2}]})
+    requests_mock.get(API + "7/metadata/customer/groups", json={"data": [{"group_id": 1}]})
+    requests_mock.get(API + "7/metadata/customer/users", json={"data": [{"id": 1}]})
+
+
+def test_interleave_keeps_the_order_of_each_source():
+    def source(name, delay):
+        def items():
+            for i in range(5):
+                time.sleep(delay)
+                yield name, i
+
+        return items
+
+    items = list(interleave([source("a", 0.002), source("b", 0.001), source("c", 0)], max_workers=3))
+
+    assert len(items) == 15
+    for name in "abc":
+        assert [i for item_name, i in items if item_name == name] == list(range(5))
+
+
+def test_interleave_reraises_source_errors():
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(interleave([failing, lambda: iter(range(3))], max_workers=2))
+
+
+def test_concurrent_read_emits_every_stream(requests_mock, metadata_api):
+    config = {"api_key": "key", "stream_concurrency": 4}
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, configured_catalog(METADATA_STREAMS)))
+
+    records = [message.record for message in messages if message.type == Type.RECORD]
+    assert sorted(record.stream for record in records) == sorted(
+        ["customer_profiles", "customer_tags", "customer_tags", "customer_groups", "customer_users"]
+    )
+    # customers and profiles are looked up once for the whole sync
+    assert len([request for request in requests_mock.request_history if request.path == "/v1/metadata/client"]) == 1
+    for name in METADATA_STREAMS:
+        stream_messages = [
+            message.type
+            for message in messages
+            if (message.type == Type.RECORD and message.record.stream == name)
+            or (message.type == Type.STATE and message.state.stream.stream_descriptor.name == name)
+        ]
+        assert stream_messages[-1] == Type.STATE
+
+
+def test_concurrent_read_finishes_other_streams_when_one_fails(requests_mock, metadata_api):
+    requests_mock.get(API + "7/metadata/customer/groups", status_code=400, json={})
+    config = {"api_key": "key", "stream_concurrency": 2}
+
+    messages = []
+    with pytest.raises(AirbyteTracedException, match="customer_groups"):
+        for message in SourceSproutSocial().read(logging.getLogger("airbyte"), config, configured_catalog(METADATA_STREAMS)):
+            messages.append(message)
+
+    streams = {message.record.stream for message in messages if message.type == Type.RECORD}
+    assert streams == {"customer_profiles", "customer_tags", "customer_users"}
+
+
+def test_request_budget_limits_concurrent_requests():
+    budget = throttle.RequestBudget(max_concurrent_requests=2)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def request():
+        with budget.slot():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+    assert budget.requests == 6
+
+
+def test_request_budget_spaces_requests_by_rate():
+    budget = throttle.RequestBudget(max_requests_per_second=100)
+    started = time.monotonic()
+    for _ in range(5):
+        with budget.slot():
+            pass
+    assert time.monotonic() - started >= 0.04
+
+
+def test_request_slot_uses_the_budget_of_the_sync():
+    context = SyncContext(budget=throttle.RequestBudget.from_config({"max_concurrent_requests": 1}))
+    with context.request_slot():
+        pass
+    with IDLE.request_slot():
+        pass
+    assert context.budget.requests == 1
+    assert throttle.RequestBudget.from_config({"api_key": "key"}) is None
+
+
+def test_every_attempt_takes_its_own_request_slot(requests_mock):
+    requests_mock.get(API + "7/metadata/customer/tags", [{"status_code": 429, "json": {}}, {"json": {"data": [{"tag_id": 1}]}}])
+    stream = CustomerTags(config={"api_key": "key"}, customer_id=7)
+    stream.backoff_time = lambda response: 0.01
+    budget = throttle.RequestBudget(max_concurrent_requests=1)
+    stream.sync_context = SyncContext(budget=budget)
+
+    assert [record["tag_id"] for record in stream.read_records(sync_mode=SyncMode.full_refresh)] == [1]
+    # the retry waited for a slot again, rather than holding the first one through its backoff
+    assert budget.requests == 2
+
+
+def test_reads_in_one_process_keep_their_own_budgets(caplog, metadata_api):
+    logger = logging.getLogger("airbyte")
+    config = {"api_key": "key", "max_concurrent_requests": 1, "customer_metadata_ttl_hours": 24}
+    budgeted = SourceSproutSocial().read(logger, config, configured_catalog(["customer_tags"]))
+    # suspended after caching the customer metadata, before any stream request
+    assert next(budgeted).type == Type.STATE
+
+    # a second read runs to the end while the first one is suspended
+    list(SourceSproutSocial().read(logger, {"api_key": "key", "max_requests_per_second": 1000}, configured_catalog(["customer_tags"])))
+    caplog.clear()
+    list(budgeted)
+
+    # the availability check and the read of its own stream, none of the other read's
+    assert "Request budget: 2 requests" in caplog.text
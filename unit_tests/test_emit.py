@@ -0,0 +1,68 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import io
+import json
+
+from airbyte_cdk.entrypoint import AirbyteEntrypoint
+from airbyte_cdk.models import AirbyteLogMessage, AirbyteMessage, AirbyteRecordMessage, Level, Type
+from source_sprout_social import emit
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API
+
+
+def record(data, **kwargs):
+    return AirbyteMessage(type=Type.RECORD, record=AirbyteRecordMessage(stream="customer_tags", data=data, emitted_at=1, **kwargs))
+
+
+def test_serialize_message_matches_cdk():
+    messages = [
+        record({"tag_id": 1, "text": "é", "nested": {"a": [1, 2.5, None]}}),
+        record({"tag_id": 1}, namespace="sprout"),
+        record({1: "non-string key"}),
+        AirbyteMessage(type=Type.LOG, log=AirbyteLogMessage(level=Level.INFO, message="hello")),
+    ]
+    for message in messages:
+        assert json.loads(emit.serialize_message(message)) == json.loads(AirbyteEntrypoint.airbyte_message_to_string(message))
+
+
+def test_batched_writer_flushes_by_size():
+    output = io.BytesIO()
+    writer = emit.BatchedWriter(output, batch_bytes=10)
+    writer.write(b"1234")
+    assert output.getvalue() == b""
+    writer.write(b"5678")
+    assert output.getvalue() == b"1234\n5678\n"
+    writer.write(b"x", flush=True)
+    assert output.getvalue() == b"1234\n5678\nx\n"
+
+
+def test_launch_read_with_fast_emit(monkeypatch, requests_mock, tmp_path, mock_account):
+    mock_account([])
+    requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": i, "text": str(i)} for i in range(5)]})
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"api_key": "key"}))
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(
+        json.dumps(
+            {
+                "streams": [
+                    {
+                        "stream": {"name": "customer_tags", "json_schema": {}, "supported_sync_modes": ["full_refresh"]},
+                        "sync_mode": "full_refresh",
+                        "destination_sync_mode": "overwrite",
+                    }
+                ]
+            }
+        )
+    )
+    monkeypatch.setenv(emit.FAST_EMIT_ENV, "1")
+    output = io.BytesIO()
+
+    emit.launch(SourceSproutSocial(), ["read", "--config", str(config), "--catalog", str(catalog)], output=output)
+
+    messages = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [message["record"]["data"]["tag_id"] for message in messages if message["type"] == "RECORD"] == list(range(5))
+    assert any(message["type"] == "TRACE" for message in messages)
@@ -0,0 +1,60 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+from airbyte_cdk.models import SyncMode
+from source_sprout_social.enrichment import LookupIndexes
+from source_sprout_social.networks import FACEBOOK, TWITTER
+from source_sprout_social.source import PostAnalyticsStream, SourceSproutSocial
+
+from .conftest import API, posts_page
+
+POSTS = [
+    {
+        "perma_link": "https://example.com/1",
+        "internal": {"tags": [{"id": 10}, {"id": 99}], "sent_by": {"id": 5, "email": "sender@example.com"}},
+    },
+    {"perma_link": "https://example.com/2", "text": "no internal data"},
+]
+
+
+def mock_metadata(requests_mock):
+    tags = requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": 10, "text": "launch", "type": "campaign"}]})
+    users = requests_mock.get(API + "7/metadata/customer/users", json={"data": [{"id": 5, "name": "Sam Sender"}]})
+    return tags, users
+
+
+def test_enrich_post_adds_tag_and_sender_metadata(requests_mock):
+    mock_metadata(requests_mock)
+
+    enriched = LookupIndexes("key", 7).enrich_post(POSTS[0])
+
+    assert enriched["internal"]["tags"] == [{"id": 10, "text": "launch", "type": "campaign"}, {"id": 99}]
+    assert enriched["internal"]["sent_by"] == {"id": 5, "email": "sender@example.com", "name": "Sam Sender"}
+    assert POSTS[0]["internal"]["tags"] == [{"id": 10}, {"id": 99}]
+
+
+def test_post_streams_share_one_lookup_per_sync(requests_mock, mock_posts):
+    tags, users = mock_metadata(requests_mock)
+    mock_posts(json=posts_page(POSTS))
+    profile_ids = {FACEBOOK.network_type: [1], TWITTER.network_type: [2]}
+    streams = SourceSproutSocial._build_streams({"api_key": "key", "enrich_posts": True}, 7, profile_ids)
+    post_streams = [stream for stream in streams if isinstance(stream, PostAnalyticsStream)]
+
+    records = [record for stream in post_streams for record in stream.read_records(sync_mode=SyncMode.full_refresh)]
+
+    assert len(records) == 4
+    assert records[2]["internal"]["sent_by"]["name"] == "Sam Sender"
+    assert records[3] == POSTS[1]
+    assert tags.call_count == 1
+    assert users.call_count == 1
+
+
+def test_posts_are_not_enriched_by_default(requests_mock, mock_posts, post_stream):
+    tags, _ = mock_metadata(requests_mock)
+    mock_posts(json=posts_page(POSTS))
+    stream = post_stream(profile_ids=[2])
+    stream.total_pages = 1
+
+    assert list(stream.read_records(sync_mode=SyncMode.full_refresh)) == POSTS
+    assert tags.call_count == 0
@@ -0,0 +1,142 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import gzip
+import io
+import json
+import logging
+import os
+
+import pytest
+from airbyte_cdk.models import Type
+from source_sprout_social import export
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import configured_catalog, posts_page
+
+
+@pytest.fixture
+def posts_account(mock_account, mock_posts):
+    client, _ = mock_account()
+    posts = [
+        {"perma_link": "a", "customer_profile_id": 1, "created_time": "2024-01-01T10:00:00Z", "sent": True},
+        {"perma_link": "b", "customer_profile_id": 1, "created_time": "2024-01-01T11:00:00Z", "metrics": {"likes": 2}},
+        {"perma_link": "c", "customer_profile_id": 1, "created_time": "2024-01-02T09:00:00Z", "extra": [1]},
+    ]
+    mock_posts(json=posts_page(posts))
+    return client
+
+
+def write_catalog(tmp_path):
+    catalog = {
+        "streams": [
+            {
+                "stream": {
+                    "name": TWITTER.post_stream_name,
+                    "json_schema": json.load(open(os.path.join("source_sprout_social", "schemas", f"{TWITTER.post_stream_name}.json"))),
+                    "supported_sync_modes": ["full_refresh"],
+                },
+                "sync_mode": "full_refresh",
+                "destination_sync_mode": "overwrite",
+            }
+        ]
+    }
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(catalog))
+    return str(path)
+
+
+def partition_files(output_dir):
+    stream_dir = output_dir / TWITTER.post_stream_name
+    return {day: sorted(os.listdir(stream_dir / day)) for day in sorted(os.listdir(stream_dir))}
+
+
+@pytest.mark.parametrize(
+    "record, expected",
+    [
+        ({"created_time": "2024-03-04T05:06:07Z"}, "2024-03-04"),
+        ({"dimensions": {"customer_profile_id": 1, "reporting_period.by(day)": "2024-03-05"}}, "2024-03-05"),
+        ({"customer_profile_id": 1}, "2024-12-31"),
+    ],
+)
+def test_partition_date(record, expected):
+    assert export.partition_date(record, "2024-12-31") == expected
+
+
+def test_batches_rotate_files_within_a_partition(tmp_path):
+    writer = export.PartitionedWriter(str(tmp_path), file_format="jsonl", batch_rows=2, writers=2)
+    for i in range(5):
+        writer.write("stream", {"id": i, "created_time": "2024-01-01T00:00:00Z"})
+    writer.close()
+
+    (day,) = os.listdir(tmp_path / "stream")
+    files = sorted(os.listdir(tmp_path / "stream" / day))
+    assert files == [f"part-{writer.run_id}-{part:05d}.jsonl.gz" for part in range(3)]
+    rows = [json.loads(line) for name in files for line in gzip.open(tmp_path / "stream" / day / name, "rt")]
+    assert sorted(row["id"] for row in rows) == list(range(5))
+    assert writer.rows == {"stream": 5}
+
+
+def test_export_writes_jsonl_partitions_and_state(tmp_path, posts_account):
+    output = io.StringIO()
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"api_key": "key", "customer_metadata_ttl_hours": 24}))
+    export.main(
+        ["--config", str(config_path), "--output-dir", str(tmp_path / "out"), "--catalog", write_catalog(tmp_path), "--format", "jsonl"],
+        output=output,
+    )
+
+    files = partition_files(tmp_path / "out")
+    assert list(files) == ["date=2024-01-01", "date=2024-01-02"]
+    assert all(len(names) == 1 and names[0].endswith(".jsonl.gz") for names in files.values())
+    states = json.load(open(tmp_path / "out" / "state.json"))
+    assert "_customer_metadata" in [state["stream"]["stream_descriptor"]["name"] for state in states]
+    summary = json.loads(output.getvalue())
+    assert (summary["format"], summary["files"], summary["records"]) == ("jsonl", 2, {TWITTER.post_stream_name: 3})
+
+
+def test_export_writes_parquet_with_the_stream_schema(tmp_path, posts_account):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    summary = export.export({"api_key": "key"}, str(tmp_path), catalog_path=write_catalog(tmp_path))
+
+    assert summary["files"] == 2 and summary["records"] == {TWITTER.post_stream_name: 3}
+    (name,) = partition_files(tmp_path)["date=2024-01-01"]
+    table = pq.read_table(tmp_path / TWITTER.post_stream_name / "date=2024-01-01" / name)
+    assert str(table.schema.field("sent").type) == "bool"
+    assert str(table.schema.field("metrics").type) == "string"
+    rows = sorted(table.to_pylist(), key=lambda row: row["perma_link"])
+    assert [row["customer_profile_id"] for row in rows] == ["1", "1"]
+    assert json.loads(rows[1]["metrics"]) == {"likes": 2}
+    (name,) = partition_files(tmp_path)["date=2024-01-02"]
+    assert pq.read_table(tmp_path / TWITTER.post_stream_name / "date=2024-01-02" / name).to_pylist()[0]["extra"] == "[1]"
+
+
+def test_fractional_values_widen_an_integer_column_instead_of_being_truncated(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    schema = {"properties": {"count": {"type": ["null", "integer"]}}}
+
+    export._write_parquet(str(tmp_path / "integral.parquet"), [{"count": 1}, {"count": 2.0}, {"count": None}], schema)
+    export._write_parquet(str(tmp_path / "fractional.parquet"), [{"count": 1}, {"count": 2.5}], schema)
+
+    integral, fractional = pq.read_table(tmp_path / "integral.parquet"), pq.read_table(tmp_path / "fractional.parquet")
+    assert (str(integral.schema.field("count").type), integral.column("count").to_pylist()) == ("int64", [1, 2, None])
+    assert (str(fractional.schema.field("count").type), fractional.column("count").to_pylist()) == ("double", [1.0, 2.5])
+
+
+def test_read_reuses_the_customer_lookup_of_the_export_catalog(posts_account):
+    config = {"api_key": "key"}
+    source = SourceSproutSocial()
+    catalog = export._catalog(source, config, catalog_path=None)
+    assert TWITTER.post_stream_name in [configured_stream.stream.name for configured_stream in catalog.streams]
+
+    posts_catalog = configured_catalog([TWITTER.post_stream_name])
+    records = [message for message in source.read(logging.getLogger("airbyte"), config, posts_catalog) if message.type == Type.RECORD]
+
+    assert len(records) == 3
+    assert posts_account.call_count == 1
+    # taken once: a later read looks the customer up again
+    list(source.read(logging.getLogger("airbyte"), config, posts_catalog))
+    assert posts_account.call_count == 2
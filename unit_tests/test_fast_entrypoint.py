@@ -0,0 +1,130 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+from source_sprout_social import api, bundle, fast_entrypoint
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API
+
+
+@pytest.fixture
+def built_bundle(tmp_path, monkeypatch):
+    built = bundle.build_bundle(str(tmp_path / "bundle.json"))
+    monkeypatch.setattr(fast_entrypoint, "load_bundle", lambda: built)
+    return built
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"api_key": "key"}))
+    return str(path)
+
+
+def run(args):
+    output = io.StringIO()
+    handled = fast_entrypoint.run(args, output=output)
+    return handled, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_bundle_matches_source(built_bundle):
+    source = SourceSproutSocial()
+    assert built_bundle["spec"] == source.spec(logging.getLogger("airbyte")).dict(exclude_unset=True)
+    assert "facebook_profile_analytics" in built_bundle["streams"]
+    assert built_bundle["metadata_streams"][0] == "client_metadata"
+
+
+def test_spec(built_bundle):
+    assert run(["spec"]) == (True, [{"type": "SPEC", "spec": built_bundle["spec"]}])
+
+
+def test_spec_does_not_import_requests(tmp_path):
+    path = str(tmp_path / "bundle.json")
+    bundle.build_bundle(path)
+    script = (
+        "import io, json, sys\n"
+        "from source_sprout_social import bundle, fast_entrypoint\n"
+        f"fast_entrypoint.load_bundle = lambda: bundle.load_bundle({path!r})\n"
+        "assert fast_entrypoint.run(['spec'], output=io.StringIO())\n"
+        "print(json.dumps([name for name in ('requests', 'airbyte_cdk') if name in sys.modules]))\n"
+    )
+    # a fresh interpreter, since this one has long imported both
+    connector_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    imported = subprocess.run([sys.executable, "-c", script], cwd=connector_dir, capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(imported) == []
+
+
+def test_check(built_bundle, config_path, mock_account):
+    mock_account()
+    handled, messages = run(["check", "--config", config_path])
+    assert handled
+    assert messages[-1] == {"type": "CONNECTION_STATUS", "connectionStatus": {"status": "SUCCEEDED"}}
+
+
+def test_discover_lists_streams_of_networks_with_profiles(built_bundle, config_path, mock_account):
+    mock_account()
+    handled, messages = run(["discover", "--config", config_path])
+    assert handled
+    names = [stream["name"] for stream in messages[0]["catalog"]["streams"]]
+    assert names == built_bundle["metadata_streams"] + ["twitter_profile_analytics", "twitter_post_analytics", "messages"]
+
+
+@pytest.mark.parametrize("args", [["read", "--config", "config.json", "--catalog", "catalog.json"], ["check", "--config", "missing.json"], ["spec", "--debug"]])
+def test_unhandled_commands_fall_back_to_cdk(built_bundle, args):
+    assert run(args) == (False, [])
+
+
+def test_falls_back_without_bundle(monkeypatch):
+    monkeypatch.setattr(fast_entrypoint, "load_bundle", lambda: None)
+    assert run(["spec"]) == (False, [])
+
+
+def test_discover_lists_the_configured_rollups(built_bundle, tmp_path, mock_account):
+    mock_account()
+    path = tmp_path / "rollups.json"
+    path.write_text(json.dumps({"api_key": "key", "profile_rollups": ["monthly"]}))
+
+    handled, messages = run(["discover", "--config", str(path)])
+
+    names = [stream["name"] for stream in messages[0]["catalog"]["streams"]]
+    assert names[-3:] == ["twitter_post_analytics", "twitter_profile_analytics_monthly", "messages"]
+    source_streams = SourceSproutSocial()._build_streams({"profile_rollups": ["monthly"]}, 7, {"twitter": [1]})
+    assert names == [stream.name for stream in source_streams]
+
+
+def test_discover_filters_profiles_by_group(built_bundle, tmp_path, requests_mock, mock_account):
+    mock_account(
+        [
+            {"customer_profile_id": 1, "network_type": "twitter", "groups": [10]},
+            {"customer_profile_id": 2, "network_type": "linkedin_company", "groups": [11]},
+        ]
+    )
+    requests_mock.get(API + "7/metadata/customer/groups", json={"data": [{"group_id": 10, "name": "Brand"}]})
+    path = tmp_path / "groups.json"
+    path.write_text(json.dumps({"api_key": "key", "filter_groups": ["Brand"]}))
+
+    handled, messages = run(["discover", "--config", str(path)])
+
+    names = [stream["name"] for stream in messages[0]["catalog"]["streams"]]
+    assert "twitter_post_analytics" in names and "linkedin_post_analytics" not in names
+
+
+def test_metadata_errors_surface_as_http_errors(requests_mock):
+    requests_mock.get(API + "metadata/client", status_code=401, json={"error": "unauthorized"})
+    requests_mock.get(API + "7/metadata/customer", status_code=503, json={})
+
+    with pytest.raises(requests.HTTPError, match="401"):
+        api.get_customer_id("key")
+    with pytest.raises(requests.HTTPError, match="503"):
+        api.get_customer_profiles("key", 7)
@@ -0,0 +1,67 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+
+import pytest
+from source_sprout_social import filters, metadata_cache
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API, configured_catalog
+
+GROUPS = [{"group_id": 10, "name": "Brand"}, {"group_id": 11, "name": "Support"}]
+TAGS = [{"tag_id": 5, "text": "Campaign"}, {"tag_id": 6, "text": "Launch"}]
+PROFILES = [
+    {"customer_profile_id": 1, "network_type": "twitter", "groups": [10]},
+    {"customer_profile_id": 2, "network_type": "twitter", "groups": [11]},
+    {"customer_profile_id": 3, "network_type": "linkedin_company", "groups": [11]},
+]
+
+
+@pytest.fixture
+def grouped_account(requests_mock, mock_account):
+    mock_account(PROFILES)
+    requests_mock.get(API + "7/metadata/customer/groups", json={"data": GROUPS})
+    return requests_mock.get(API + "7/metadata/customer/tags", json={"data": TAGS})
+
+
+def test_resolve_matches_names_case_insensitively_and_ids():
+    assert filters.resolve(GROUPS, "group_id", "name", ["support", "10"], "group") == ["11", "10"]
+
+
+def test_resolve_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Marketing"):
+        filters.resolve(GROUPS, "group_id", "name", ["Brand", "Marketing"], "group")
+
+
+def test_group_filter_keeps_the_profiles_of_the_groups(grouped_account):
+
+    metadata = SourceSproutSocial._fetch_customer_metadata({"api_key": "key", "filter_groups": ["Brand"]})
+
+    assert metadata.profile_ids == {"twitter": [1]}
+
+
+def test_cached_profiles_are_not_reused_for_other_groups(grouped_account):
+    config = {"api_key": "key", "filter_groups": ["Brand"], "customer_metadata_ttl_hours": 24}
+    state = [metadata_cache.state_message(config, SourceSproutSocial._fetch_customer_metadata(config)).state]
+
+    assert metadata_cache.load(config, state) is not None
+    assert metadata_cache.load(dict(config, filter_groups=["Support"]), state) is None
+
+
+def test_tag_and_post_type_filters_are_pushed_into_post_queries(mock_posts, grouped_account):
+    tags = grouped_account
+    posts = mock_posts()
+    catalog = configured_catalog([TWITTER.post_stream_name])
+    config = {"api_key": "key", "filter_groups": ["brand"], "filter_tags": ["Launch", "5"], "filter_post_types": ["TWEET"]}
+
+    list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog))
+
+    # the page count query and the pages carry the same filters
+    assert posts.call_count >= 2
+    for request in posts.request_history:
+        assert request.json()["filters"][0] == "customer_profile_id.eq(1)"
+        assert request.json()["filters"][2:] == ["tag_id.eq(6,5)", "post_type.eq(TWEET)"]
+    assert tags.call_count == 1
@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import time
+
+import pytest
+
+from airbyte_cdk.models import SyncMode
+from source_sprout_social import deadlines, hedging, throttle
+from source_sprout_social.source import CustomerTags
+from source_sprout_social.sync_context import SyncContext
+
+from .conftest import API, posts_page
+
+
+def primed_hedger(key, latency=0.01):
+    hedger = hedging.Hedger(percentile=90, min_samples=5)
+    for _ in range(5):
+        hedger.latencies.record(key, latency)
+    return hedger
+
+
+def test_percentile_needs_min_samples():
+    tracker = hedging.LatencyTracker()
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        tracker.record("posts", latency)
+
+    assert tracker.percentile("posts", 50, min_samples=5) is None
+    tracker.record("posts", 0.5)
+    assert tracker.percentile("posts", 50, min_samples=5) == 0.3
+    assert tracker.percentile("posts", 99, min_samples=5) == 0.5
+
+
+def test_fast_request_is_not_hedged():
+    attempts = []
+    hedger = primed_hedger("posts", latency=1.0)
+    assert hedger.send("posts", lambda: attempts.append(1) or "page") == "page"
+
+    assert attempts == [1]
+    assert (hedger.requests, hedger.hedges) == (1, 0)
+
+
+def test_slow_request_is_hedged_and_first_response_wins():
+    attempts = []
+
+    def send_attempt():
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(1)
+            return "slow"
+        return "fast"
+
+    hedger = primed_hedger("posts")
+    started = time.perf_counter()
+    assert hedger.send("posts", send_attempt) == "fast"
+
+    assert time.perf_counter() - started < 0.5
+    assert (hedger.requests, hedger.hedges, hedger.hedges_won) == (1, 1, 1)
+
+
+def test_failed_hedge_falls_back_to_primary():
+    attempts = []
+
+    def send_attempt():
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.2)
+            return "primary"
+        raise ConnectionError("hedge failed")
+
+    hedger = primed_hedger("posts")
+    assert hedger.send("posts", send_attempt) == "primary"
+
+    assert hedger.hedges_won == 0
+
+
+def test_hedged_page_requests_count_against_the_budget(mock_posts, post_stream):
+    calls = []
+
+    def page(request, context):
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.2)
+        return posts_page([{"perma_link": "a"}])
+
+    mock_posts(json=page)
+    stream = post_stream(total_pages=1)
+
+    budget, hedger = throttle.RequestBudget(max_concurrent_requests=4), primed_hedger(stream.name)
+    with SyncContext(budget=budget, hedger=hedger) as stream.sync_context:
+        records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    assert [record["perma_link"] for record in records] == ["a"]
+    assert budget.requests == 2
+    # requests_mock serves one request at a time, so which attempt wins is not deterministic here
+    assert hedger.hedges == 1
+
+
+def test_requests_have_per_endpoint_timeouts(requests_mock, mock_posts, post_stream):
+    config = {"connect_timeout_seconds": 3, "read_timeout_seconds": {"post_analytics": 42}}
+    posts = mock_posts(json=posts_page([]))
+    tags = requests_mock.get(API + "7/metadata/customer/tags", json={"data": []})
+
+    list(post_stream(total_pages=1, **config).read_records(sync_mode=SyncMode.full_refresh))
+    list(CustomerTags(config=dict({"api_key": "key"}, **config), customer_id=7).read_records(sync_mode=SyncMode.full_refresh))
+
+    assert posts.last_request.timeout == (3, 42)
+    assert tags.last_request.timeout == (3, deadlines.DEFAULT_READ_TIMEOUTS[deadlines.METADATA])
+
+
+def test_retries_and_failed_attempts_are_neither_hedged_nor_timed():
+    hedger = primed_hedger("posts")
+
+    def slow():
+        time.sleep(0.1)
+        return "page"
+
+    assert hedger.send("posts", slow, retry=True) == "page"
+    with pytest.raises(ConnectionError):
+        hedger.send("posts", lambda: (_ for _ in ()).throw(ConnectionError("reset")))
+
+    assert hedger.hedges == 0
+    assert hedger.latencies.percentile("posts", 100, min_samples=1) == 0.01
+
+
+def test_nothing_is_hedged_while_a_request_backs_off():
+    hedger = primed_hedger("posts")
+    attempts = []
+
+    def slow():
+        attempts.append(1)
+        time.sleep(0.1)
+        return "page"
+
+    hedger.backoff_started("posts")
+    assert hedger.send("posts", slow) == "page"
+    hedger.backoff_ended("posts")
+
+    assert (attempts, hedger.hedges) == ([1], 0)
+
+
+def test_throttled_page_is_retried_without_hedging(mock_posts, post_stream):
+    def slow_page(request, context):
+        # slower than the hedging threshold, so only being a retry keeps it from being hedged
+        time.sleep(0.2)
+        return posts_page([{"perma_link": "a"}])
+
+    posts = mock_posts([{"status_code": 429, "json": {}}, {"json": slow_page}])
+    stream = post_stream(total_pages=1)
+    stream.backoff_time = lambda response: 0.01
+    hedger = primed_hedger(stream.name, latency=0.1)
+    stream.sync_context = SyncContext(hedger=hedger)
+
+    assert [record["perma_link"] for record in stream.read_records(sync_mode=SyncMode.full_refresh)] == ["a"]
+
+    assert posts.call_count == 2
+    assert hedger.hedges == 0
+    # the throttled attempt and the retry were not timed, and the backoff is over
+    assert len(hedger.latencies._latencies[stream.name]) == 5
+    assert hedger._backing_off[stream.name] == 0
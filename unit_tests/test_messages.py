@@ -0,0 +1,120 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from airbyte_cdk.models import AirbyteStateMessage, SyncMode, Type
+from source_sprout_social.source import Messages, SourceSproutSocial
+
+from .conftest import API, configured_catalog
+
+
+def mock_messages(requests_mock, pages_per_group=2):
+    """
+    Serve `pages_per_group` pages of two messages for every profile filter, chained by `next_cursor`.
+    """
+
+    def messages(request, context):
+        body = request.json()
+        profiles = body["filters"][0]
+        page = int(body.get("page_cursor", "0"))
+        next_cursor = str(page + 1) if page + 1 < pages_per_group else None
+        data = [{"guid": f"{profiles}-{page}-{i}", "created_time": "2024-01-01T00:00:00Z"} for i in range(2)]
+        return {"data": data, "paging": {"next_cursor": next_cursor}}
+
+    return requests_mock.post(API + "7/messages", json=messages)
+
+
+def messages_stream(profile_ids=(1,), **config):
+    return Messages(config=dict({"api_key": "key"}, **config), customer_id=7, profile_ids=list(profile_ids))
+
+
+def window(hours_ago=24):
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    return {"start": (end - timedelta(hours=hours_ago)).isoformat(), "end": end.isoformat()}
+
+
+def test_pages_follow_the_next_cursor(requests_mock):
+    messages = mock_messages(requests_mock)
+    stream_slice = {"start": "2024-01-01T00:00:00+00:00", "end": "2024-01-02T00:00:00+00:00"}
+
+    records = list(messages_stream().read_records(sync_mode=SyncMode.incremental, stream_slice=stream_slice))
+
+    assert len(records) == 4
+    first, second = [request.json() for request in messages.request_history]
+    assert first["filters"] == ["customer_profile_id.eq(1)", "created_time.in(2024-01-01T00:00:00..2024-01-01T23:59:59)"]
+    assert "page_cursor" not in first
+    assert second["page_cursor"] == "1"
+
+
+def test_profile_groups_are_read_concurrently_before_the_cursor_moves(requests_mock):
+    messages = mock_messages(requests_mock, pages_per_group=1)
+    stream = messages_stream(profile_ids=[1, 2, 3], messages_profiles_per_query=2, messages_concurrency=2)
+    stream_slice = window()
+
+    records = list(stream.read_records(sync_mode=SyncMode.incremental, stream_slice=stream_slice))
+
+    assert len(records) == 4
+    assert sorted(request.json()["filters"][0] for request in messages.request_history) == [
+        "customer_profile_id.eq(1,2)",
+        "customer_profile_id.eq(3)",
+    ]
+    assert stream.state == {"created_time": stream_slice["end"]}
+
+
+def test_slices_start_at_the_cursor():
+    stream = messages_stream(messages_window_hours=12)
+    stream.state = {"created_time": (datetime.now(timezone.utc) - timedelta(hours=30)).isoformat()}
+
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state=stream.state))
+
+    assert len(slices) == 3
+    assert slices[0]["start"] == stream.state["created_time"]
+    assert all(previous["end"] == following["start"] for previous, following in zip(slices, slices[1:]))
+
+
+def test_first_sync_starts_at_the_start_date():
+    start = (datetime.now(timezone.utc) - timedelta(days=2)).date()
+    stream = messages_stream(messages_start_date=start.isoformat())
+
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state={}))
+
+    assert slices[0]["start"] == f"{start}T00:00:00+00:00"
+    assert len(slices) == 3
+
+
+def test_preview_keeps_the_cursor(requests_mock):
+    mock_messages(requests_mock)
+    stream = messages_stream(preview_max_records=1)
+    stream.state = {"created_time": "2024-01-01T00:00:00+00:00"}
+
+    records = list(stream.read_records(sync_mode=SyncMode.incremental, stream_slice=window()))
+
+    assert len(records) == 1
+    assert stream.state == {"created_time": "2024-01-01T00:00:00+00:00"}
+
+
+def test_incremental_read_checkpoints_each_window(requests_mock, mock_account):
+    mock_account()
+    mock_messages(requests_mock, pages_per_group=1)
+    started = (datetime.now(timezone.utc) - timedelta(hours=36)).isoformat()
+    catalog = configured_catalog(["messages"], sync_mode="incremental")
+    state = [
+        AirbyteStateMessage.parse_obj(
+            {"type": "STREAM", "stream": {"stream_descriptor": {"name": "messages"}, "stream_state": {"created_time": started}}}
+        )
+    ]
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), {"api_key": "key"}, catalog, state))
+
+    records = [message for message in messages if message.type == Type.RECORD]
+    states = [
+        message.state.stream.stream_state.dict()
+        for message in messages
+        if message.type == Type.STATE and message.state.stream.stream_descriptor.name == "messages"
+    ]
+    assert len(records) == 4
+    assert len(states) == 2
+    assert states[0]["created_time"] == (datetime.fromisoformat(started) + timedelta(hours=24)).isoformat()
@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from airbyte_cdk.models import Type
+from airbyte_cdk.sources.connector_state_manager import ConnectorStateManager
+from source_sprout_social import metadata_cache
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API, configured_catalog, twitter_profiles
+
+
+def read(config, state=None, names=(TWITTER.post_stream_name,)):
+    config = dict({"api_key": "key", "customer_metadata_ttl_hours": 24}, **config)
+    return list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, configured_catalog(names), state))
+
+
+def cache_states(messages):
+    return [
+        message.state
+        for message in messages
+        if message.type == Type.STATE and message.state.stream.stream_descriptor.name == metadata_cache.CACHE_STREAM
+    ]
+
+
+def test_cold_sync_caches_the_metadata_and_warm_sync_reuses_it(mock_posts, mock_account):
+    client, profiles = mock_account()
+    mock_posts()
+
+    (cached,) = cache_states(read({}))
+    assert cached.stream.stream_state.dict()["profile_ids"] == {"twitter": [1]}
+    assert (client.call_count, profiles.call_count) == (1, 1)
+
+    messages = read({}, state=[cached])
+
+    assert not cache_states(messages)
+    assert (client.call_count, profiles.call_count) == (1, 1)
+    assert [message.record.data["perma_link"] for message in messages if message.type == Type.RECORD] == ["a"]
+
+
+@pytest.mark.parametrize(
+    "config, fetched_ago",
+    [({"customer_metadata_ttl_hours": 1}, timedelta(hours=2)), ({"api_key": "other"}, timedelta(0))],
+    ids=["expired", "other_api_key"],
+)
+def test_stale_cache_is_refetched(mock_posts, config, fetched_ago, mock_account):
+    client, _ = mock_account()
+    mock_posts()
+    metadata = metadata_cache.CustomerMetadata(customer_id=7, profile_ids={"twitter": [1]}, fetched_at=datetime.now(timezone.utc) - fetched_ago)
+    state = [metadata_cache.state_message({"api_key": "key"}, metadata).state]
+
+    messages = read(config, state=state)
+
+    assert client.call_count == 1
+    assert len(cache_states(messages)) == 1
+
+
+def test_cache_is_off_by_default(mock_posts, mock_account):
+    mock_account()
+    mock_posts()
+    catalog = configured_catalog([TWITTER.post_stream_name])
+
+    assert not cache_states(SourceSproutSocial().read(logging.getLogger("airbyte"), {"api_key": "key"}, catalog))
+    assert not cache_states(read({"customer_metadata_ttl_hours": 0}))
+
+
+@pytest.mark.parametrize("names", [["messages"], [TWITTER.post_stream_name, "facebook_post_analytics"]], ids=["messages", "new_network"])
+def test_cache_is_not_used_for_streams_it_cannot_build(requests_mock, mock_posts, mock_account, caplog, names):
+    client, _ = mock_account([{"customer_profile_id": 1, "network_type": "twitter"}, {"customer_profile_id": 2, "network_type": "facebook"}])
+    mock_posts()
+    requests_mock.post(API + "7/messages", json={"data": [], "paging": {}})
+    # cached before the facebook profile was added
+    state = [metadata_cache.state_message({"api_key": "key"}, metadata_cache.CustomerMetadata(customer_id=7, profile_ids={"twitter": [1]})).state]
+
+    messages = read({"messages_start_date": "2024-01-01"}, state=state, names=names)
+
+    assert client.call_count == 1
+    (refreshed,) = cache_states(messages)
+    assert refreshed.stream.stream_state.dict()["profile_ids"] == {"twitter": [1], "facebook": [2]}
+    assert "Looking up the customer metadata again" in caplog.text
+
+
+def test_rejected_profile_refreshes_the_cache(mock_posts, mock_account):
+    client, _ = mock_account(twitter_profiles([2]))
+    mock_posts(status_code=403, json={"error": "profile 1 is not accessible"})
+    metadata = metadata_cache.CustomerMetadata(customer_id=7, profile_ids={"twitter": [1]})
+    state = [metadata_cache.state_message({"api_key": "key"}, metadata).state]
+
+    # the CDK's availability check gets the rejection first, and skips the stream
+    messages = read({}, state=state)
+
+    (refreshed,) = cache_states(messages)
+    assert refreshed.stream.stream_state.dict()["profile_ids"] == {"twitter": [2]}
+    assert client.call_count == 1
+
+
+def test_cache_round_trips_through_the_cdk_state_manager(mock_posts, mock_account):
+    client, _ = mock_account()
+    mock_posts()
+    (cached,) = cache_states(read({}))
+
+    # what an orchestrator hands back from the emitted message, per stream or as a legacy dict
+    manager = ConnectorStateManager(stream_instance_map={}, state=[cached])
+    legacy = {metadata_cache.CACHE_STREAM: manager.get_stream_state(metadata_cache.CACHE_STREAM, None)}
+    for state in ([cached], legacy):
+        assert not cache_states(read({}, state=state))
+    assert client.call_count == 1
+
+
+def test_dropped_cache_is_logged(mock_posts, caplog, mock_account):
+    client, _ = mock_account()
+    mock_posts()
+
+    read({}, state={"messages": {"created_time": "2024-01-01T00:00:00+00:00"}})
+
+    assert client.call_count == 1
+    assert f"The state holds no {metadata_cache.CACHE_STREAM} entry" in caplog.text
+    assert "the customer metadata is looked up again" in caplog.text
@@ -0,0 +1,53 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import json
+
+import pytest
+from airbyte_cdk.models import SyncMode
+from source_sprout_social.metric_groups import merge_metric_groups, split_metrics
+from source_sprout_social.networks import FACEBOOK
+from source_sprout_social.source import ProfileAnalyticsStream
+
+from .conftest import API
+
+
+def test_split_metrics():
+    assert split_metrics(["a", "b", "c", "d", "e"], 2) == [["a", "b"], ["c", "d"], ["e"]]
+    assert split_metrics(["a", "b"], 10) == [["a", "b"]]
+    with pytest.raises(ValueError):
+        split_metrics(["a"], 0)
+
+
+def test_merge_metric_groups_keeps_one_row_per_dimensions():
+    day_1 = {"customer_profile_id": 1, "reporting_period.by(day)": "2023-01-01"}
+    day_2 = {"reporting_period.by(day)": "2023-01-02", "customer_profile_id": 1}
+    partials = [
+        [{"dimensions": day_1, "metrics": {"impressions": 1}}, {"dimensions": day_2, "metrics": {"impressions": 2}}],
+        [{"dimensions": dict(reversed(list(day_2.items()))), "metrics": {"likes": 4}}, {"dimensions": day_1, "metrics": {"likes": 3}}],
+    ]
+    assert merge_metric_groups(partials) == [
+        {"dimensions": day_1, "metrics": {"impressions": 1, "likes": 3}},
+        {"dimensions": day_2, "metrics": {"impressions": 2, "likes": 4}},
+    ]
+
+
+def test_profile_analytics_reads_metric_groups(requests_mock):
+    def analytics(request, context):
+        body = json.loads(request.body)
+        if body["metrics"] == ["impressions"]:
+            return {"data": [], "paging": {"current_page": 1, "total_pages": 1}}
+        dimensions = {"customer_profile_id": 1, "reporting_period.by(day)": "2023-01-01"}
+        return {"data": [{"dimensions": dimensions, "metrics": {metric: 1 for metric in body["metrics"]}}], "paging": {"total_pages": 1}}
+
+    requests_mock.post(API + "7/analytics/profiles", json=analytics)
+
+    stream = ProfileAnalyticsStream(config={"api_key": "key", "metric_group_size": 30}, customer_id=7, network=FACEBOOK, profile_ids=[1])
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    wide_metrics = stream.request_body_json(stream_state={})["metrics"]
+    group_requests = [json.loads(r.body) for r in requests_mock.request_history if r.method == "POST"][1:]
+    assert len(group_requests) == len(split_metrics(wide_metrics, 30))
+    assert len(records) == 1
+    assert set(records[0]["metrics"]) == set(wide_metrics)
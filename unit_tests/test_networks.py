@@ -0,0 +1,79 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import pytest
+from source_sprout_social.networks import NETWORKS, group_profiles_by_network
+from source_sprout_social.source import AnalyticsStream, PostAnalyticsStream, ProfileAnalyticsStream, SourceSproutSocial
+
+from .conftest import API
+
+PROFILES = [
+    {"customer_profile_id": 1, "network_type": "facebook"},
+    {"customer_profile_id": 2, "network_type": "linkedin_company"},
+    {"customer_profile_id": 3, "network_type": "facebook"},
+    {"customer_profile_id": 4, "network_type": "threads"},
+    {"customer_profile_id": 5, "network_type": "youtube"},
+]
+
+
+def test_group_profiles_by_network_keeps_every_profile():
+    assert group_profiles_by_network(PROFILES) == {"facebook": [1, 3], "linkedin_company": [2], "threads": [4], "youtube": [5]}
+
+
+def test_network_metrics_are_not_concatenated():
+    assert {"video_views_total", "comments_count_total"} <= set(NETWORKS["tiktok"].profile_metrics)
+    assert {"lifetime_snapshot.following_count", "impressions", "video_views", "reactions"} <= set(NETWORKS["fb_instagram_account"].profile_metrics)
+
+
+def test_streams_are_built_only_for_networks_with_profiles(requests_mock, mock_account):
+    mock_account(PROFILES)
+
+    streams = SourceSproutSocial().streams(config={"api_key": "key"})
+
+    assert [stream.name for stream in streams] == [
+        "client_metadata",
+        "customer_profiles",
+        "customer_tags",
+        "customer_groups",
+        "customer_users",
+        "facebook_profile_analytics",
+        "facebook_post_analytics",
+        "linkedin_profile_analytics",
+        "linkedin_post_analytics",
+        "youtube_profile_analytics",
+        "youtube_post_analytics",
+        "messages",
+    ]
+    # building the streams only needs the two metadata requests
+    assert requests_mock.call_count == 2
+    for stream in streams:
+        assert stream.get_json_schema()["properties"]
+
+
+def test_analytics_request_body_filters_on_network_profiles():
+    kwargs = dict(config={"api_key": "key"}, customer_id=7, network=NETWORKS["facebook"], profile_ids=[1, 3])
+    profile_body = ProfileAnalyticsStream(**kwargs).request_body_json(stream_state={})
+    post_body = PostAnalyticsStream(**kwargs).request_body_json(stream_state={})
+
+    assert profile_body["filters"][0] == "customer_profile_id.eq(1,3)"
+    assert post_body["filters"][0] == "customer_profile_id.eq(1,3)"
+    assert post_body["metrics"] == list(NETWORKS["facebook"].post_metrics)
+    assert ProfileAnalyticsStream(**kwargs).path() == "7/analytics/profiles"
+
+
+def test_analytics_stream_without_its_hooks_cannot_be_built():
+    class IncompleteStream(AnalyticsStream):
+        endpoint = "analytics/profiles"
+
+    with pytest.raises(TypeError, match="metrics"):
+        IncompleteStream(config={"api_key": "key"}, customer_id=7, network=NETWORKS["twitter"], profile_ids=[1])
+
+
+def test_page_count_asks_for_a_metric_of_the_network(requests_mock):
+    page_count = requests_mock.post(API + "7/analytics/profiles", json={"data": [], "paging": {"current_page": 1, "total_pages": 2}})
+    stream = ProfileAnalyticsStream(config={"api_key": "key"}, customer_id=7, network=NETWORKS["youtube"], profile_ids=[5])
+
+    assert stream.total_pages == 2
+    (metric,) = page_count.last_request.json()["metrics"]
+    assert metric in NETWORKS["youtube"].profile_metrics
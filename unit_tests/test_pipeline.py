@@ -0,0 +1,69 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import threading
+
+import pytest
+from airbyte_cdk.models import SyncMode
+from source_sprout_social.pipeline import BoundedPagePipeline
+
+from .conftest import posts_page
+
+
+def pages(count, size):
+    return [([{"page": page, "record": i} for i in range(3)], size) for page in range(count)]
+
+
+def test_pipeline_yields_pages_in_order_within_budget():
+    pipeline = BoundedPagePipeline(max_buffered_bytes=300)
+    consumed = []
+    for records in pipeline.run(pages(20, 100)):
+        consumed.append(records[0]["page"])
+        assert pipeline._buffered_bytes <= 300
+    assert consumed == list(range(20))
+    assert pipeline.stats.pages == 20
+    assert pipeline.stats.max_buffered_bytes <= 300
+    assert 1 <= pipeline.stats.max_queue_depth <= 3
+
+
+def test_pipeline_lets_oversized_pages_through_one_at_a_time():
+    pipeline = BoundedPagePipeline(max_buffered_bytes=10)
+    assert len(list(pipeline.run(pages(5, 1000)))) == 5
+    assert pipeline.stats.max_buffered_bytes == 1000
+
+
+def test_pipeline_reraises_producer_errors():
+    def failing_pages():
+        yield [{"id": 1}], 10
+        raise RuntimeError("page 2 failed")
+
+    pipeline = BoundedPagePipeline(max_buffered_bytes=100)
+    iterator = pipeline.run(failing_pages())
+    assert next(iterator) == [{"id": 1}]
+    with pytest.raises(RuntimeError, match="page 2 failed"):
+        next(iterator)
+
+
+def test_pipeline_stops_producer_when_consumer_stops_early():
+    produced = []
+
+    def endless_pages():
+        while True:
+            produced.append(1)
+            yield [{}], 50
+
+    iterator = BoundedPagePipeline(max_buffered_bytes=100).run(endless_pages())
+    next(iterator)
+    iterator.close()
+    assert len(produced) < 10
+    assert not [thread for thread in threading.enumerate() if thread.name.endswith("-producer")]
+
+
+def test_stream_reads_pages_through_pipeline(mock_posts, post_stream):
+    mock_posts([{"json": posts_page([{"perma_link": f"{page}-{i}"} for i in range(2)], 3, current_page=page)} for page in (1, 2, 3)])
+    stream = post_stream(total_pages=3, max_buffered_bytes=1024)
+
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    assert [record["perma_link"] for record in records] == ["1-0", "1-1", "2-0", "2-1", "3-0", "3-1"]
@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import io
+import json
+import re
+from datetime import date
+
+import pytest
+from source_sprout_social import planner
+from source_sprout_social.networks import FACEBOOK, TWITTER
+
+from .conftest import API
+
+PROFILES = [{"customer_profile_id": 1, "network_type": "twitter"}, {"customer_profile_id": 2, "network_type": "twitter"}]
+
+
+def first_page(request, context):
+    pages = 3 if "(1,2)" in request.json()["filters"][0] else 2
+    return {"data": [{}] * 10, "paging": {"current_page": 1, "total_pages": pages}}
+
+
+@pytest.fixture
+def analytics_api(requests_mock, mock_account, mock_posts):
+    mock_account(PROFILES)
+    requests_mock.post(API + "7/analytics/profiles", json=first_page)
+    mock_posts(json=first_page)
+
+
+def test_plan_estimates_each_stream_from_page_counts(requests_mock, analytics_api):
+    config = {"api_key": "key", "metric_group_size": 10, "max_requests_per_second": 2}
+
+    plan = planner.SyncPlanner(config).plan([TWITTER.profile_stream_name, TWITTER.post_stream_name, "customer_profiles"])
+
+    streams = {stream_plan["stream"]: stream_plan for stream_plan in plan["streams"]}
+    groups = -(-len(TWITTER.profile_metrics) // 10)
+    assert streams[TWITTER.profile_stream_name]["pages"] == 3
+    assert streams[TWITTER.profile_stream_name]["requests"] == 1 + 4 * groups
+    assert streams[TWITTER.post_stream_name]["requests"] == 1 + 4
+    assert streams[TWITTER.post_stream_name]["records"] == 30
+    assert streams["customer_profiles"]["records"] == 2
+    # the rate limit bounds the duration
+    assert plan["total"]["seconds"] >= plan["total"]["requests"] / 2
+    assert plan["planning_requests"] == 4
+    assert requests_mock.call_count == 4
+
+
+def test_plan_by_profile_from_command_line(tmp_path, analytics_api):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"api_key": "key"}))
+    output = io.StringIO()
+
+    planner.main(["--config", str(config_path), "--by-profile"], output=output)
+
+    plan = json.loads(output.getvalue())
+    (post_plan,) = [stream_plan for stream_plan in plan["streams"] if stream_plan["stream"] == TWITTER.post_stream_name]
+    assert [profile["customer_profile_id"] for profile in post_plan["slices"][0]["profiles"]] == [1, 2]
+    assert [profile["pages"] for profile in post_plan["slices"][0]["profiles"]] == [2, 2]
+    assert len(plan["streams"]) == 8
+
+
+def test_plan_follows_the_post_windows_of_the_read(mock_posts, analytics_api):
+
+    def pages_by_days(request, context):
+        start, end = re.search(r"created_time.in\((\d{4}-\d\d-\d\d)T.*\.\.(\d{4}-\d\d-\d\d)T", request.json()["filters"][1]).groups()
+        days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+        return {"data": [{}] * 10, "paging": {"current_page": 1, "total_pages": -(-days // 120)}}
+
+    mock_posts(json=pages_by_days)
+    config = {"api_key": "key", "post_window_max_pages": 2, "post_window_concurrency": 2}
+
+    (post_plan,) = planner.SyncPlanner(config).plan([TWITTER.post_stream_name])["streams"]
+
+    # a year of 4 pages split in two windows of 2, planned with the read's own three page-count queries
+    assert [window["pages"] for window in post_plan["slices"]] == [2, 2]
+    assert [window["records"] for window in post_plan["slices"]] == [20, 20]
+    assert post_plan["requests"] == 3 + 4 + 1
+
+
+def test_plan_coalesces_the_queries_of_selected_networks(requests_mock, analytics_api):
+    requests_mock.get(API + "7/metadata/customer", json={"data": PROFILES + [{"customer_profile_id": 3, "network_type": "facebook"}]})
+    config = {"api_key": "key", "coalesce_networks": True}
+
+    plan = planner.SyncPlanner(config).plan([TWITTER.post_stream_name, FACEBOOK.post_stream_name])
+
+    combined, *members = plan["streams"]
+    assert combined["stream"] == "coalesced_post_analytics"
+    # the page count and the pages of the shared query, which skips the availability check
+    assert (combined["pages"], combined["requests"]) == (2, 1 + 2)
+    assert {member["stream"]: (member["coalesced_into"], member["requests"]) for member in members} == {
+        TWITTER.post_stream_name: ("coalesced_post_analytics", 0),
+        FACEBOOK.post_stream_name: ("coalesced_post_analytics", 0),
+    }
+    assert plan["assumptions"]["coalesce_networks"]
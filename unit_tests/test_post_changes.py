@@ -0,0 +1,131 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+
+import pytest
+from airbyte_cdk.models import SyncMode, Type
+from source_sprout_social.networks import FACEBOOK, TWITTER
+from source_sprout_social.post_changes import PostHashStore
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import configured_catalog, posts_page
+
+
+def posts(count, changed=(), edited=()):
+    return [
+        {"perma_link": f"https://example.com/{i}", "text": "edited" if i in edited else "", "metrics": {"lifetime.likes": i + (100 if i in changed else 0)}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def read_posts(mock_posts, post_stream, tmp_path):
+    """
+    :return: a function reading `rows` with a change store in `tmp_path`, as an appended stream does.
+    """
+
+    def read(rows, **config):
+        mock_posts(json=posts_page(rows))
+        stream = post_stream(total_pages=1, post_change_store_dir=str(tmp_path), **config)
+        stream.changes_only = True
+        return list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    return read
+
+
+def test_only_new_or_changed_posts_are_emitted(read_posts, tmp_path):
+    assert len(read_posts(posts(3))) == 3
+    assert read_posts(posts(3)) == []
+
+    records = read_posts(posts(5, changed={1}))
+
+    assert [record["perma_link"] for record in records] == ["https://example.com/1", "https://example.com/3", "https://example.com/4"]
+    assert (tmp_path / f"{TWITTER.post_stream_name}.sqlite").exists()
+
+
+def test_posts_with_changed_fields_are_emitted(read_posts):
+    read_posts(posts(3))
+
+    assert [record["perma_link"] for record in read_posts(posts(3, edited={2}))] == ["https://example.com/2"]
+
+
+def test_preview_does_not_update_the_store(read_posts):
+    read_posts(posts(2), preview_max_pages=1)
+
+    assert len(read_posts(posts(2))) == 2
+
+
+def test_store_is_left_unchanged_when_a_read_fails(tmp_path):
+    path = str(tmp_path / "posts.sqlite")
+
+    def failing_rows():
+        yield from posts(2)
+        raise RuntimeError("page 2 failed")
+
+    store = PostHashStore(path)
+    with pytest.raises(RuntimeError):
+        list(store.changed_posts(failing_rows()))
+    store.close()
+
+    store = PostHashStore(path)
+    assert len(list(store.changed_posts(posts(2)))) == 2
+    store.close()
+
+
+def test_store_handles_many_posts_in_batches(tmp_path):
+    path = str(tmp_path / "posts.sqlite")
+    store = PostHashStore(path)
+    assert len(list(store.changed_posts(posts(5000)))) == 5000
+    store.commit()
+    store.close()
+
+    store = PostHashStore(path)
+    assert [row["perma_link"] for row in store.changed_posts(posts(5000, changed={4321}))] == ["https://example.com/4321"]
+    assert store.seen == 5000
+    store.close()
+
+
+def test_interrupted_coalesced_read_emits_its_posts_again(mock_account, mock_posts, tmp_path):
+    mock_account([{"customer_profile_id": 1, "network_type": "facebook"}, {"customer_profile_id": 2, "network_type": "twitter"}])
+    rows = [{"perma_link": f"https://example.com/{i}", "customer_profile_id": 1 + i % 2, "metrics": {"lifetime.likes": i}} for i in range(4)]
+    mock_posts(json=posts_page(rows))
+    names = [FACEBOOK.post_stream_name, TWITTER.post_stream_name]
+    catalog = configured_catalog(names, destination_sync_mode="append")
+    config = {"api_key": "key", "coalesce_networks": True, "post_change_store_dir": str(tmp_path)}
+
+    def read(stop_after=None):
+        emitted = []
+        messages = SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog)
+        for message in messages:
+            if message.type == Type.RECORD:
+                emitted.append(message.record.stream)
+                if len(emitted) == stop_after:
+                    messages.close()
+                    break
+        return emitted
+
+    # interrupted after the first facebook post, before the stream completed
+    assert read(stop_after=1) == [FACEBOOK.post_stream_name]
+
+    assert sorted(read()) == sorted(names * 2)
+    assert read() == []
+    # only the streams of the networks keep a store, the query they share does not
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(f"{name}.sqlite" for name in names)
+
+
+@pytest.mark.parametrize("destination_sync_mode, emitted", [("overwrite", [2, 2]), ("append", [2, 0])])
+def test_only_appended_post_streams_leave_out_unchanged_posts(mock_account, mock_posts, caplog, tmp_path, destination_sync_mode, emitted):
+    mock_account()
+    mock_posts(json=posts_page(posts(2)))
+    catalog = configured_catalog([TWITTER.post_stream_name], destination_sync_mode=destination_sync_mode)
+    config = {"api_key": "key", "post_change_store_dir": str(tmp_path)}
+
+    def read():
+        messages = SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog)
+        return sum(message.type == Type.RECORD for message in messages)
+
+    assert [read(), read()] == emitted
+    # an overwritten table would lose the posts left out
+    assert ("every post is emitted" in caplog.text) == (destination_sync_mode == "overwrite")
@@ -0,0 +1,78 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import re
+from datetime import date, timedelta
+
+import pytest
+import requests
+from airbyte_cdk.models import SyncMode
+
+
+def paged_by_days(days_per_page, timeout_over_days=None):
+    """
+    :return: a response serving post analytics with one page per `days_per_page` days of the queried window, whose
+        page-count queries over more than `timeout_over_days` days time out.
+    """
+
+    def posts(request, context):
+        body = request.json()
+        start, end = re.search(r"created_time.in\((\S+)T00:00:00\.\.(\S+)T23:59:59\)", body["filters"][1]).groups()
+        days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+        if "fields" not in body and timeout_over_days is not None and days > timeout_over_days:
+            raise requests.exceptions.ReadTimeout("page count timed out")
+        total_pages = -(-days // days_per_page)
+        return {"data": [{"perma_link": f"{start}-{body['page']}"}], "paging": {"current_page": body["page"], "total_pages": total_pages}}
+
+    return posts
+
+
+def planned_windows(posts):
+    return [request.json()["filters"][1] for request in posts.request_history if "fields" not in request.json()]
+
+
+def test_sparse_account_is_read_in_one_window(mock_posts, post_stream):
+    posts = mock_posts(json=paged_by_days(200))
+    stream = post_stream(post_window_max_pages=5)
+
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    assert len(planned_windows(posts)) == 1
+    assert len(records) == 2
+    assert posts.call_count == 3
+
+
+def test_dense_account_is_split_into_windows_under_the_threshold(mock_posts, post_stream):
+    posts = mock_posts(json=paged_by_days(3))
+    stream = post_stream(post_window_max_pages=10, post_window_concurrency=4)
+
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+
+    windows = stream._windows
+    assert all(window["total_pages"] <= 10 for window in windows)
+    assert windows[0]["start"] == stream.year_ago.isoformat()
+    assert windows[-1]["end"] == stream.yesterday.isoformat()
+    for previous, following in zip(windows, windows[1:]):
+        assert date.fromisoformat(previous["end"]) + timedelta(days=1) == date.fromisoformat(following["start"])
+    # one page-count query for the whole year, then one per piece
+    assert len(planned_windows(posts)) == 1 + len(windows)
+    assert len(records) == sum(window["total_pages"] for window in windows)
+
+
+def test_timed_out_page_count_halves_the_window(mock_posts, post_stream):
+    posts = mock_posts(json=paged_by_days(50, timeout_over_days=100))
+    stream = post_stream(post_window_max_pages=5)
+
+    stream._windows = stream._plan_windows(date(2024, 1, 1), date(2024, 12, 31), max_pages=5)
+
+    assert [window["start"] for window in stream._windows] == ["2024-01-01", "2024-04-01", "2024-07-02", "2024-10-01"]
+    assert len(planned_windows(posts)) == 7
+
+
+def test_single_day_is_not_split(mock_posts, post_stream):
+    mock_posts(json=paged_by_days(1, timeout_over_days=0))
+    stream = post_stream(post_window_max_pages=5)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        stream._plan_windows(date(2024, 1, 1), date(2024, 1, 1), max_pages=5)
@@ -0,0 +1,63 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+
+from airbyte_cdk.models import SyncMode, Type
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import CustomerTags, SourceSproutSocial
+
+from .conftest import API, configured_catalog, posts_page
+
+
+def post_pages(mock_posts, total_pages=10):
+    return mock_posts(
+        [{"json": posts_page([{"perma_link": f"{page}-{i}"} for i in range(5)], total_pages, current_page=page)} for page in range(1, total_pages + 1)]
+    )
+
+
+def test_preview_max_pages_stops_pagination(mock_posts, post_stream):
+    posts = post_pages(mock_posts)
+
+    records = list(post_stream(total_pages=10, preview_max_pages=2).read_records(sync_mode=SyncMode.full_refresh))
+
+    assert len(records) == 10
+    assert posts.call_count == 2
+
+
+def test_preview_max_records_stops_reading(mock_posts, post_stream):
+    posts = post_pages(mock_posts)
+
+    records = list(post_stream(total_pages=10, preview_max_records=7, max_buffered_bytes=10**6).read_records(sync_mode=SyncMode.full_refresh))
+
+    assert [record["perma_link"] for record in records] == ["1-0", "1-1", "1-2", "1-3", "1-4", "2-0", "2-1"]
+    assert posts.call_count == 2
+
+
+def test_preview_keeps_metadata_state(requests_mock):
+    requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": 1}, {"tag_id": 2}]})
+    stream = CustomerTags(config={"api_key": "key", "preview_max_records": 1, "metadata_tombstones": True}, customer_id=7)
+    stream.state = {"hashes": {"3": "0123456789abcdef"}}
+
+    records = list(stream.read_records(sync_mode=SyncMode.incremental))
+
+    assert [record["tag_id"] for record in records] == [1]
+    assert stream.state == {"hashes": {"3": "0123456789abcdef"}}
+
+
+def test_preview_read_touches_every_stream(requests_mock, mock_account, mock_posts):
+    mock_account()
+    post_pages(mock_posts)
+    requests_mock.post(
+        API + "7/analytics/profiles",
+        json={"data": [{"dimensions": {"customer_profile_id": 1}, "metrics": {}}] * 5, "paging": {"current_page": 1, "total_pages": 50}},
+    )
+    catalog = configured_catalog((TWITTER.profile_stream_name, TWITTER.post_stream_name))
+    config = {"api_key": "key", "preview_max_pages": 1, "coalesce_networks": True}
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog))
+
+    records = [message.record.stream for message in messages if message.type == Type.RECORD]
+    assert records.count(TWITTER.profile_stream_name) == 5
+    assert records.count(TWITTER.post_stream_name) == 5
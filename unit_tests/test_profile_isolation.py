@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+import re
+
+import pytest
+
+from airbyte_cdk.models import Type
+from airbyte_cdk.utils.traced_exception import AirbyteTracedException
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import PostAnalyticsStream, SourceSproutSocial
+
+from .conftest import configured_catalog, posts_page, twitter_profiles
+
+
+def queried_profiles(request):
+    (profile_filter,) = [value for value in request.json()["filters"] if value.startswith("customer_profile_id.eq(")]
+    return [int(profile_id) for profile_id in re.findall(r"\d+", profile_filter)]
+
+
+def rejecting(rejected, status_code=403):
+    """
+    :return: a response serving one post per queried profile, unless the query holds one of the `rejected` profiles.
+    """
+
+    def respond(request, context):
+        profile_ids = queried_profiles(request)
+        if set(profile_ids) & set(rejected):
+            context.status_code = status_code
+            return {"error": "profile is not accessible"}
+        return posts_page([{"perma_link": str(profile_id)} for profile_id in profile_ids])
+
+    return respond
+
+
+def read(config=None):
+    catalog = configured_catalog([TWITTER.post_stream_name])
+    return list(SourceSproutSocial().read(logging.getLogger("airbyte"), dict({"api_key": "key"}, **(config or {})), catalog))
+
+
+def records(messages):
+    return sorted(message.record.data["perma_link"] for message in messages if message.type == Type.RECORD)
+
+
+def test_rejected_profile_is_isolated_and_the_others_are_read(mock_posts, caplog, mock_account):
+    profile_ids = list(range(1, 17))
+    mock_account(twitter_profiles(profile_ids))
+    posts = mock_posts(json=rejecting([11]))
+
+    messages = read()
+
+    assert records(messages) == sorted(str(profile_id) for profile_id in profile_ids if profile_id != 11)
+    queries = [queried_profiles(request) for request in posts.request_history]
+    # between the rejected query and the first one over the other 15 profiles
+    isolation = queries[1 : queries.index([profile_id for profile_id in profile_ids if profile_id != 11])]
+    # both halves of every rejected list down to the profile: 2 log2(16) queries
+    assert len(isolation) == 8
+    assert [11] in isolation
+    assert "read without the rejected profiles 11" in caplog.text
+
+
+def test_several_rejected_profiles_are_isolated(mock_posts, mock_account):
+    mock_account(twitter_profiles([1, 2, 3, 4, 5]))
+    mock_posts(json=rejecting([2, 5], status_code=400))
+
+    assert records(read()) == ["1", "3", "4"]
+
+
+def test_stream_fails_when_every_profile_is_rejected(mock_posts, mock_account):
+    mock_account(twitter_profiles([1, 2]))
+    mock_posts(json=rejecting([1, 2]))
+
+    # the CDK's availability check gets the rejection first, and skips the stream
+    assert records(read()) == []
+
+
+def test_other_errors_are_not_bisected(mock_posts, mock_account):
+    mock_account(twitter_profiles([1, 2]))
+    # a bad API key, not a profile
+    posts = mock_posts(status_code=401, json={"error": "unauthorized"})
+
+    with pytest.raises(AirbyteTracedException):
+        read()
+    assert posts.call_count == 1
+    assert queried_profiles(posts.last_request) == [1, 2]
+
+
+def test_errors_of_every_profile_stop_after_the_first_split(mock_posts, mock_account):
+    mock_account(twitter_profiles(list(range(1, 17))))
+    # an invalid filter, which no subset of the profiles gets past
+    posts = mock_posts(status_code=400, json={"error": "invalid value for filter post_type"})
+
+    with pytest.raises(AirbyteTracedException):
+        read()
+    # the rejected read, then only both halves of the first split
+    assert [len(queried_profiles(request)) for request in posts.request_history] == [16, 8, 8]
+
+
+def test_bisection_gives_up_after_its_request_cap(mock_posts, monkeypatch, caplog, mock_account):
+    monkeypatch.setattr(PostAnalyticsStream, "max_bisection_requests", 4)
+    mock_account(twitter_profiles(list(range(1, 17))))
+    posts = mock_posts(json=rejecting([3, 11]))
+
+    # the CDK's availability check gets the rejection, and skips the stream
+    assert records(read()) == []
+    assert posts.call_count == 1 + 4
+    assert "gave up isolating the rejected profiles after 4 queries" in caplog.text
@@ -0,0 +1,52 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import json
+import logging
+import pstats
+
+import pytest
+from airbyte_cdk.models import Type
+from source_sprout_social import profiling
+from source_sprout_social.sync_context import IDLE
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API, configured_catalog
+
+CATALOG = configured_catalog(["customer_tags"])
+
+
+@pytest.fixture
+def tags_api(requests_mock, mock_account):
+    mock_account([])
+    requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": 1, "text": "a"}, {"tag_id": 2, "text": "b"}]})
+
+
+def test_phase_is_a_noop_without_profiler():
+    with IDLE.phase("stream", "http"):
+        pass
+    assert IDLE.profiler is None
+
+
+def test_read_writes_profile_and_phase_summary(tmp_path, tags_api):
+    config = {"api_key": "key", "profiling_dir": str(tmp_path)}
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, CATALOG))
+
+    assert len([message for message in messages if message.type == Type.RECORD]) == 2
+    (profile_dump,) = tmp_path.glob("*.prof")
+    (summary_file,) = tmp_path.glob("*-phases.json")
+    assert pstats.Stats(str(profile_dump)).total_calls > 0
+    summary = json.loads(summary_file.read_text())
+    assert summary["streams"]["customer_tags"]["emit"]["calls"] == 2
+    assert summary["streams"]["customer_tags"]["http"]["seconds"] > 0
+    assert summary["streams"]["customer_tags"]["parse"]["calls"] >= 1
+    assert summary["streams"]["customer_profiles"]["metadata"]["calls"] == 2
+
+
+def test_profiling_dir_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv(profiling.PROFILING_DIR_ENV, str(tmp_path))
+    assert profiling.SyncProfiler.from_config({"api_key": "key"}).output_dir == str(tmp_path)
+    monkeypatch.delenv(profiling.PROFILING_DIR_ENV)
+    assert profiling.SyncProfiler.from_config({"api_key": "key"}) is None
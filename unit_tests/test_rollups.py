@@ -0,0 +1,88 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+
+import pytest
+from airbyte_cdk.models import Type
+from source_sprout_social import rollups
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import SourceSproutSocial
+
+from .conftest import API, configured_catalog
+
+
+@pytest.fixture(params=["numpy", "loops"])
+def aggregation(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(rollups, "numpy", None)
+    return request.param
+
+
+def daily(profile_id, day, **metrics):
+    return {"dimensions": {"customer_profile_id": profile_id, "reporting_period.by(day)": f"{day}T00:00:00Z"}, "metrics": metrics}
+
+
+def test_weekly_rollup_follows_each_metric_kind(aggregation):
+    rows = [
+        # Sunday, the end of the week before
+        daily(1, "2024-01-07", impressions=5, **{"lifetime_snapshot.followers_count": 99}),
+        daily(1, "2024-01-09", impressions="7", impressions_unique=3, posts_sent_by_post_type={"photo": 1}),
+        daily(1, "2024-01-08", impressions=10, **{"lifetime_snapshot.followers_count": 100}, posts_sent_by_post_type={"photo": 2, "text": 1}),
+        daily(1, "2024-01-10", impressions=None, **{"lifetime_snapshot.followers_by_country": {"US": 4}}),
+    ]
+
+    previous_week, week = rollups.roll_up(rows, "weekly")
+
+    assert previous_week == {
+        "dimensions": {"customer_profile_id": 1, "reporting_period.by(week)": "2024-01-01"},
+        "metrics": {"impressions": 5, "lifetime_snapshot.followers_count": 99},
+        "days": 1,
+    }
+    assert week["dimensions"] == {"customer_profile_id": 1, "reporting_period.by(week)": "2024-01-08"}
+    assert week["days"] == 3
+    assert week["metrics"] == {
+        "impressions": 17,
+        "lifetime_snapshot.followers_count": 100,
+        "lifetime_snapshot.followers_by_country": {"US": 4},
+        "posts_sent_by_post_type": {"photo": 3, "text": 1},
+    }
+
+
+def test_monthly_rollup_is_per_profile(aggregation):
+    rows = [daily(2, "2024-02-01", likes=1.5), daily(1, "2024-01-31", likes=1), daily(1, "2024-01-01", likes=2), daily(2, "2024-02-29", likes=1)]
+
+    rolled_up = rollups.roll_up(rows, "monthly")
+
+    assert [(row["dimensions"]["customer_profile_id"], row["dimensions"]["reporting_period.by(month)"]) for row in rolled_up] == [
+        (1, "2024-01-01"),
+        (2, "2024-02-01"),
+    ]
+    assert [(row["metrics"]["likes"], row["days"]) for row in rolled_up] == [(3, 2), (2.5, 2)]
+
+
+def test_metrics_missing_from_a_whole_period_are_left_out(aggregation):
+    (week,) = rollups.roll_up([daily(1, "2024-01-08", impressions=None), daily(1, "2024-01-09")], "weekly")
+
+    assert week["metrics"] == {}
+
+
+def test_daily_rows_are_read_once_for_the_daily_stream_and_its_rollups(requests_mock, mock_account):
+    mock_account()
+    rows = [daily(1, "2024-01-08", impressions=1), daily(1, "2024-01-09", impressions=2)]
+    profiles = requests_mock.post(API + "7/analytics/profiles", json={"data": rows, "paging": {"current_page": 1, "total_pages": 1}})
+    names = [TWITTER.profile_stream_name, TWITTER.rollup_stream_name("weekly"), TWITTER.rollup_stream_name("monthly")]
+    catalog = configured_catalog(names)
+    config = {"api_key": "key", "profile_rollups": ["weekly", "monthly"]}
+
+    messages = list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog))
+
+    records = {name: [message.record.data for message in messages if message.type == Type.RECORD and message.record.stream == name] for name in names}
+    assert len(records[TWITTER.profile_stream_name]) == 2
+    assert records[TWITTER.rollup_stream_name("weekly")][0]["metrics"] == {"impressions": 3}
+    assert records[TWITTER.rollup_stream_name("monthly")][0]["dimensions"]["reporting_period.by(month)"] == "2024-01-01"
+    # one page read, after the page count
+    assert profiles.call_count == 2
@@ -0,0 +1,81 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from source_sprout_social import api, bundle, fast_entrypoint, sharding
+from source_sprout_social.source import AnalyticsStream, Messages, SourceSproutSocial
+
+PROFILE_IDS = {"facebook": list(range(1, 41)), "twitter": list(range(41, 81)), "tiktok": [81]}
+
+
+def test_shards_split_profiles_without_overlap():
+    shards = [sharding.shard_profile_ids({"shard_count": 3, "shard_index": index}, 7, PROFILE_IDS) for index in range(3)]
+
+    for network_type, ids in PROFILE_IDS.items():
+        assigned = [profile_id for shard in shards for profile_id in shard.get(network_type, [])]
+        assert sorted(assigned) == ids
+    assert all(shard["facebook"] for shard in shards)
+    # networks without a profile in the shard are dropped
+    assert sum("tiktok" in shard for shard in shards) == 1
+
+
+def test_shard_assignment_is_stable_when_profiles_are_added():
+    config = {"shard_count": 4, "shard_index": 1}
+    before = sharding.shard_profile_ids(config, 7, {"facebook": list(range(1, 41))})["facebook"]
+    after = sharding.shard_profile_ids(config, 7, {"facebook": list(range(1, 81))})["facebook"]
+
+    assert [profile_id for profile_id in after if profile_id <= 40] == before
+
+
+def test_unsharded_config_keeps_every_profile():
+    assert sharding.shard_profile_ids({}, 7, PROFILE_IDS) == PROFILE_IDS
+    assert sharding.shard_suffix({}) == ""
+    assert sharding.shard_suffix({"shard_count": 4, "shard_index": 2}) == "-shard2of4"
+
+
+@pytest.mark.parametrize("config", [{"shard_count": 0}, {"shard_count": 2, "shard_index": 2}, {"shard_count": 2, "shard_index": -1}])
+def test_invalid_shard_settings_fail_the_check(config):
+    succeeded, error = api.check_connection(dict(config, api_key="key"))
+
+    assert not succeeded
+    assert isinstance(error, ValueError)
+
+
+def test_unsharded_config_has_nothing_to_validate():
+    # nothing is compared, so a config mock without shard settings passes too
+    sharding.validate({"api_key": "key"})
+    sharding.validate(MagicMock())
+
+
+def test_only_the_first_shard_builds_metadata_streams():
+    primary = SourceSproutSocial._build_streams({"api_key": "key", "shard_count": 2, "shard_index": 0}, 7, PROFILE_IDS)
+    secondary = SourceSproutSocial._build_streams({"api_key": "key", "shard_count": 2, "shard_index": 1}, 7, PROFILE_IDS)
+
+    assert "customer_tags" in [stream.name for stream in primary]
+    assert all(isinstance(stream, (AnalyticsStream, Messages)) for stream in secondary)
+    primary_profiles = {p for stream in primary if isinstance(stream, (AnalyticsStream, Messages)) for p in stream.profile_ids}
+    secondary_profiles = {p for stream in secondary for p in stream.profile_ids}
+    assert not primary_profiles & secondary_profiles
+    assert primary_profiles | secondary_profiles == {p for ids in PROFILE_IDS.values() for p in ids}
+
+
+def test_fast_discover_applies_sharding(tmp_path, monkeypatch, mock_account):
+    built = bundle.build_bundle(str(tmp_path / "bundle.json"))
+    monkeypatch.setattr(fast_entrypoint, "load_bundle", lambda: built)
+    mock_account([{"customer_profile_id": 81, "network_type": "tiktok"}])
+    shard = sharding.shard_of(7, 81, 2)
+    names = {}
+    for index in range(2):
+        config_path = tmp_path / f"config{index}.json"
+        config_path.write_text(json.dumps({"api_key": "key", "shard_count": 2, "shard_index": index}))
+        output = io.StringIO()
+        assert fast_entrypoint.run(["discover", "--config", str(config_path)], output=output)
+        names[index] = [stream["name"] for stream in json.loads(output.getvalue())["catalog"]["streams"]]
+
+    assert ("tiktok_profile_analytics" in names[shard]) and ("tiktok_profile_analytics" not in names[1 - shard])
+    assert "client_metadata" in names[0] and "client_metadata" not in names[1]
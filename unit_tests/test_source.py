@@ -6,17 +6,20 @@ from unittest.mock import MagicMock
 
 from source_sprout_social.source import SourceSproutSocial
 
+CONFIG = {"api_key": "key"}
 
-def test_check_connection(mocker):
+
+def test_check_connection(mock_account):
+    mock_account()
     source = SourceSproutSocial()
-    logger_mock, config_mock = MagicMock(), MagicMock()
-    assert source.check_connection(logger_mock, config_mock) == (True, None)
+    logger_mock = MagicMock()
+    assert source.check_connection(logger_mock, CONFIG) == (True, None)
 
 
-def test_streams(mocker):
+def test_streams(mock_account):
+    mock_account()
     source = SourceSproutSocial()
-    config_mock = MagicMock()
-    streams = source.streams(config_mock)
-    # TODO: replace this with your streams number
-    expected_streams_number = 3
+    streams = source.streams(CONFIG)
+    # the five metadata streams, the profile and post analytics of the one network with profiles, and messages
+    expected_streams_number = 8
     assert len(streams) == expected_streams_number
@@ -0,0 +1,158 @@
+#
+# Copyright (c) 2023 Airbyte, Inc., all rights reserved.
+#
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from airbyte_cdk.models import AirbyteStateMessage, ConfiguredAirbyteCatalog, Type
+from source_sprout_social import sync_context, timebox
+from source_sprout_social.sync_context import IDLE
+from source_sprout_social.networks import TWITTER
+from source_sprout_social.source import ProfileAnalyticsStream, SourceSproutSocial
+
+from .conftest import API, configured_catalog, posts_page
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(timebox, "monotonic", lambda: now[0])
+    return now
+
+
+def configured_stream(name, sync_mode="full_refresh"):
+    return {
+        "stream": {"name": name, "json_schema": {}, "supported_sync_modes": ["full_refresh", "incremental"]},
+        "sync_mode": sync_mode,
+        "destination_sync_mode": "append" if sync_mode == "incremental" else "overwrite",
+    }
+
+
+def test_slices_stop_when_the_longest_slice_no_longer_fits(clock):
+    time_box = timebox.TimeBox(max_stream_seconds=100)
+    assert time_box.start_stream("stream")
+
+    read = []
+    for stream_slice in time_box.slices("stream", range(10)):
+        read.append(stream_slice)
+        clock[0] += 30
+
+    # 30s per slice: the fourth would start with 10s left
+    assert read == [0, 1, 2]
+    assert time_box.stopped_streams == ["stream"]
+
+
+def test_stream_budgets_are_independent_but_share_the_sync_budget(clock):
+    time_box = timebox.TimeBox(max_sync_seconds=100, max_stream_seconds=60)
+
+    assert time_box.start_stream("first")
+    clock[0] += 50
+    assert time_box.start_stream("second")
+    assert time_box.remaining("first") == 10
+    assert time_box.remaining("second") == 50
+    clock[0] += 50
+    assert not time_box.start_stream("third")
+    assert time_box.skipped_streams == ["third"]
+
+
+def test_without_time_box_every_slice_is_read():
+    assert list(IDLE.slices("stream", range(3))) == [0, 1, 2]
+    assert IDLE.start_stream("stream")
+
+
+def test_read_stops_messages_at_a_checkpoint_and_goes_on_with_the_next_stream(requests_mock, clock, mock_account):
+    mock_account()
+
+    def messages(request, context):
+        # every window takes 20 minutes
+        clock[0] += 20 * 60
+        return {"data": [{"guid": request.json()["filters"][1], "created_time": "2024-01-01T00:00:00Z"}], "paging": {}}
+
+    requests_mock.post(API + "7/messages", json=messages)
+    tags = requests_mock.get(API + "7/metadata/customer/tags", json={"data": []})
+    started = (datetime.now(timezone.utc) - timedelta(days=5)).isoformat()
+    catalog = ConfiguredAirbyteCatalog.parse_obj({"streams": [configured_stream("messages", "incremental"), configured_stream("customer_tags")]})
+    state = [
+        AirbyteStateMessage.parse_obj(
+            {"type": "STREAM", "stream": {"stream_descriptor": {"name": "messages"}, "stream_state": {"created_time": started}}}
+        )
+    ]
+
+    output = list(SourceSproutSocial().read(logging.getLogger("airbyte"), {"api_key": "key", "max_sync_minutes": 50}, catalog, state))
+
+    records = [message for message in output if message.type == Type.RECORD]
+    states = [
+        message.state.stream.stream_state.dict()
+        for message in output
+        if message.type == Type.STATE and message.state.stream.stream_descriptor.name == "messages"
+    ]
+    # the third window would start with 10 minutes left, under the 20 the others took
+    assert len(records) == 2
+    assert states[-1]["created_time"] == (datetime.fromisoformat(started) + timedelta(hours=48)).isoformat()
+    # 10 minutes are left to start the next stream
+    assert tags.called
+
+
+def test_stream_without_checkpoints_starts_only_when_its_plan_fits(clock):
+    time_box = timebox.TimeBox(max_stream_seconds=100)
+    # no request timed yet, nothing to plan with
+    assert time_box.start_stream("first", lambda: 50)
+
+    time_box.record_request(5)
+    time_box.record_request(15)
+    assert not time_box.start_stream("posts", lambda: 12)
+    assert time_box.start_stream("profiles", lambda: 9)
+    assert time_box.start_stream("unknown", lambda: None)
+    assert time_box.skipped_streams == ["posts"]
+
+
+def test_read_skips_an_analytics_stream_planned_past_the_time_left(requests_mock, mock_posts, clock, monkeypatch):
+    monkeypatch.setattr(sync_context, "monotonic", lambda: clock[0])
+
+    def slow(payload):
+        def respond(request, context):
+            # every request takes a minute
+            clock[0] += 60
+            return payload
+
+        return respond
+
+    requests_mock.get(API + "metadata/client", json=slow({"data": [{"customer_id": 7}]}))
+    requests_mock.get(API + "7/metadata/customer", json=slow({"data": [{"customer_profile_id": 1, "network_type": "twitter"}]}))
+    posts = mock_posts(json=slow(posts_page([], 30)))
+    tags = requests_mock.get(API + "7/metadata/customer/tags", json={"data": [{"tag_id": 1}]})
+    catalog = configured_catalog(["twitter_post_analytics", "customer_tags"])
+
+    output = list(SourceSproutSocial().read(logging.getLogger("airbyte"), {"api_key": "key", "max_sync_minutes": 20}, catalog))
+
+    # 30 pages of a minute with 17 minutes left, after the metadata lookups and the page count
+    assert posts.call_count == 1
+    assert [message.record.stream for message in output if message.type == Type.RECORD] == ["customer_tags"]
+    assert tags.called
+
+
+def test_windowed_post_stream_is_planned_from_its_windows(mock_posts, clock, mock_account):
+    mock_account()
+    posts = mock_posts(json=posts_page([], 3))
+    catalog = configured_catalog(["twitter_post_analytics"])
+    page_counts = {}
+    for config in ({}, {"max_sync_minutes": 20}):
+        config = dict({"api_key": "key", "post_window_max_pages": 5}, **config)
+        list(SourceSproutSocial().read(logging.getLogger("airbyte"), config, catalog))
+        page_counts[bool(config.get("max_sync_minutes"))] = sum("fields" not in request.json() for request in posts.request_history)
+        posts.reset()
+
+    # the plan, the availability check and the read share one page count of the single window
+    assert page_counts == {False: 1, True: 1}
+
+
+def test_metric_groups_multiply_the_planned_pages():
+    config = {"api_key": "key", "metric_group_size": 2, "metric_group_concurrency": 2}
+    stream = ProfileAnalyticsStream(config=config, customer_id=7, network=TWITTER, profile_ids=[1])
+    stream.total_pages = 3
+    # each page waits for its groups of 2 metrics, 2 groups at a time
+    rounds = -(-len(stream.metrics) // 4)
+
+    assert stream.planned_pages() == 3 * rounds